@@ -0,0 +1,353 @@
+"""
+배치(대량 비동기) 처리 모드
+
+프로젝트 전체를 밤새 다시 추출하는 작업은 대화형 지연이 필요 없으므로, 모든 페이지/셀 요청을 요청 파일로 만든 뒤
+배치 작업으로 한꺼번에 제출하고, 주기적으로 상태를 확인해 끝난 결과를 일반 처리 결과(CSV)에 합칩니다.
+Gemini Batch API는 같은 요청을 동기 호출의 절반 비용으로 처리하고 동기 호출 속도 제한과 별도로 동작합니다.
+
+전송(transport)은 교체할 수 있습니다:
+    GeminiBatchTransport - Gemini Batch API (client.batches)
+    LocalBatchTransport  - 동기 API를 백그라운드 스레드로 돌리는 로컬 대체 (fake_gemini_server와 함께 테스트용)
+
+작업 폴더(workdir)에 요청 파일(requests.jsonl), 제출한 작업 목록(jobs.json), 받은 결과(results.jsonl)를 남기므로
+중간에 프로세스가 끝나도 같은 요청으로 다시 실행하면 이미 제출한 작업을 이어서 기다립니다.
+
+사용 예:
+    python main.py               (메뉴 5: 배치 모드)
+    python gemini_ocr.py batch   (영수증 배치 처리, single 모드 프롬프트 사용)
+    GEMINI_BATCH_TRANSPORT=local GEMINI_BASE_URL=http://127.0.0.1:8089 python gemini_ocr.py batch
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from gemini_client import STATS, make_client, generate_content, parse_json_response
+
+TRANSPORT_ENV = "GEMINI_BATCH_TRANSPORT"
+# 작업 상태 확인 간격 (초)
+POLL_INTERVAL = 30
+# 인라인 요청 작업 하나의 최대 크기 (bytes). API의 인라인 한도(20MB)보다 여유 있게
+MAX_JOB_BYTES = 15 * 1024 * 1024
+
+REQUESTS_FILE = "requests.jsonl"
+JOBS_FILE = "jobs.json"
+RESULTS_FILE = "results.jsonl"
+
+# contents: 이미지 파트/프롬프트 목록, config: GenerateContentConfig (없으면 None)
+BatchRequest = namedtuple("BatchRequest", ["key", "model", "contents", "config"])
+# text: 응답 텍스트 (실패하면 None), error: 오류 메시지
+BatchResult = namedtuple("BatchResult", ["key", "text", "error"])
+
+def request_to_record(request):
+    """요청을 요청 파일의 한 줄(JSON)로 바꾸는 함수 (이미지 바이트는 base64)"""
+    contents = [{"text": part} if isinstance(part, str) else part.model_dump(mode="json", exclude_none=True)
+                for part in request.contents]
+    record = {"key": request.key, "model": request.model, "contents": contents}
+    if request.config is not None:
+        record["config"] = request.config.model_dump(mode="json", exclude_none=True)
+    return record
+
+def record_to_request(record):
+    """요청 파일의 한 줄을 요청으로 되돌리는 함수"""
+    from google.genai import types
+
+    contents = [types.Part.model_validate(part) for part in record["contents"]]
+    config = types.GenerateContentConfig.model_validate(record["config"]) if "config" in record else None
+    return BatchRequest(record["key"], record["model"], contents, config)
+
+def write_request_file(path, requests):
+    """요청 파일을 저장하고 내용 해시를 반환하는 함수 (같은 요청으로 다시 실행했는지 확인용)"""
+    digest = hashlib.sha256()
+    with open(path, "w", encoding="utf-8") as f:
+        for request in requests:
+            line = json.dumps(request_to_record(request), ensure_ascii=False) + "\n"
+            digest.update(line.encode("utf-8"))
+            f.write(line)
+    return digest.hexdigest()
+
+def read_request_file(path):
+    with open(path, encoding="utf-8") as f:
+        return [record_to_request(json.loads(line)) for line in f if line.strip()]
+
+class GeminiBatchTransport:
+    """Gemini Batch API 전송 (인라인 요청, 결과는 보통 수 분~24시간 안에 나옴)"""
+
+    SUCCEEDED = ("JOB_STATE_SUCCEEDED", "JOB_STATE_PARTIALLY_SUCCEEDED")
+    FAILED = ("JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED")
+
+    def __init__(self, api_key):
+        self.client = make_client(api_key)
+
+    def submit(self, model, requests, display_name):
+        """요청 목록을 작업 하나로 제출하고 작업 이름을 반환하는 함수"""
+        from google.genai import types
+
+        src = [types.InlinedRequest(contents=[types.Content(role="user", parts=[
+                   types.Part(text=part) if isinstance(part, str) else part for part in request.contents])],
+                   config=request.config, metadata={"key": request.key})
+               for request in requests]
+        job = self.client.batches.create(model=model, src=src, config={"display_name": display_name})
+        return job.name
+
+    def status(self, job_name):
+        """'running' / 'succeeded' / 'failed'"""
+        state = self.client.batches.get(name=job_name).state.name
+        if state in self.SUCCEEDED:
+            return "succeeded"
+        if state in self.FAILED:
+            return "failed"
+        return "running"
+
+    def results(self, job_name, keys):
+        """끝난 작업의 결과 목록 (keys: 제출한 순서의 요청 키)"""
+        job = self.client.batches.get(name=job_name)
+        responses = (job.dest.inlined_responses if job.dest else None) or []
+        results = []
+        for index, item in enumerate(responses):
+            key = (item.metadata or {}).get("key") or keys[index]
+            if item.error is not None or item.response is None:
+                results.append(BatchResult(key, None, str(item.error or "응답 없음")))
+                continue
+            # 배치 응답은 지연 시간이 의미 없으므로 토큰 사용량만 통계에 반영
+            STATS.record(0.0, item.response)
+            results.append(BatchResult(key, item.response.text, None))
+        return results
+
+class LocalBatchTransport:
+    """동기 API를 백그라운드 스레드로 실행해 배치 인터페이스를 흉내내는 전송 (테스트/로컬 대체 서버용)
+
+    작업은 프로세스 메모리에만 있으므로 프로세스가 끝나면 이어서 기다릴 수 없습니다. (다시 제출됨)
+    """
+
+    def __init__(self, api_key, max_workers=8):
+        self.api_key = api_key
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.jobs = {}
+        self.lock = threading.Lock()
+
+    def _run(self, model, request):
+        try:
+            response = generate_content(make_client(self.api_key), model=model,
+                                        contents=request.contents, config=request.config)
+            return BatchResult(request.key, response.text, None)
+        except Exception as e:
+            return BatchResult(request.key, None, str(e))
+
+    def submit(self, model, requests, display_name):
+        with self.lock:
+            job_name = f"local/{display_name}-{len(self.jobs)}"
+            self.jobs[job_name] = [self.executor.submit(self._run, model, request) for request in requests]
+        return job_name
+
+    def status(self, job_name):
+        with self.lock:
+            futures = self.jobs[job_name]
+        return "succeeded" if all(future.done() for future in futures) else "running"
+
+    def results(self, job_name, keys):
+        with self.lock:
+            futures = self.jobs.pop(job_name)
+        return [future.result() for future in futures]
+
+def make_transport(api_key, kind=None):
+    """전송 종류(gemini/local, 기본은 GEMINI_BATCH_TRANSPORT 또는 gemini)에 맞는 전송 객체"""
+    kind = kind or os.getenv(TRANSPORT_ENV, "gemini")
+    if kind == "local":
+        return LocalBatchTransport(api_key)
+    if kind == "gemini":
+        return GeminiBatchTransport(api_key)
+    raise ValueError(f"지원하지 않는 배치 전송입니다: {kind}")
+
+def split_jobs(requests, max_job_bytes=MAX_JOB_BYTES):
+    """요청을 모델별, 크기별 작업 단위로 나누는 함수 → [(모델, [요청])]"""
+    chunks = []
+    by_model = {}
+    for request in requests:
+        by_model.setdefault(request.model, []).append(request)
+    for model, model_requests in by_model.items():
+        chunk, size = [], 0
+        for request in model_requests:
+            request_size = len(json.dumps(request_to_record(request)))
+            if chunk and size + request_size > max_job_bytes:
+                chunks.append((model, chunk))
+                chunk, size = [], 0
+            chunk.append(request)
+            size += request_size
+        if chunk:
+            chunks.append((model, chunk))
+    return chunks
+
+def run_batch(requests, transport, workdir, display_name="extraction", poll_interval=POLL_INTERVAL):
+    """요청들을 배치 작업으로 제출하고 모두 끝날 때까지 기다려 {키: BatchResult}를 반환하는 함수
+
+    workdir에 같은 요청으로 제출한 작업 기록이 있으면 다시 제출하지 않고 그 작업을 이어서 기다립니다.
+    제출/조회 중 API 오류가 난 작업(만료/삭제된 작업 등)은 실패 결과로 남기고 나머지 작업은 계속 기다립니다.
+    """
+    if not requests:
+        return {}
+    os.makedirs(workdir, exist_ok=True)
+    digest = write_request_file(os.path.join(workdir, REQUESTS_FILE), requests)
+    jobs_path = os.path.join(workdir, JOBS_FILE)
+    results_path = os.path.join(workdir, RESULTS_FILE)
+
+    jobs, results = None, {}
+    if os.path.exists(jobs_path):
+        with open(jobs_path, encoding="utf-8") as f:
+            saved = json.load(f)
+        if saved.get("digest") == digest:
+            jobs = saved["jobs"]
+            if os.path.exists(results_path):
+                with open(results_path, encoding="utf-8") as f:
+                    for line in f:
+                        result = BatchResult(*json.loads(line))
+                        results[result.key] = result
+            print(f"이전에 제출한 배치 작업 {len(jobs)}개를 이어서 기다립니다. (받은 결과 {len(results)}개)")
+
+    by_key = {request.key: request for request in requests}
+    # 제출/상태 조회/결과 조회 중 API 오류(만료/삭제된 작업의 404, 네트워크 오류 등)가 난 작업 → 오류 메시지
+    # (작업 하나의 오류로 전체 실행이 멈추지 않도록 그 작업만 실패로 두고, 호출한 쪽에서 동기 방식으로 처리)
+    errors = {}
+    if jobs is None:
+        jobs = []
+        for model, chunk in split_jobs(requests):
+            try:
+                name = transport.submit(model, chunk, f"{display_name}-{len(jobs)}")
+            except Exception as e:
+                name = f"{display_name}-{len(jobs)} (제출 실패)"
+                errors[name] = e
+                print(f"배치 작업 제출 실패: {e} ({model}, 요청 {len(chunk)}개는 동기 방식으로 처리)")
+            else:
+                print(f"배치 작업 제출: {name} ({model}, 요청 {len(chunk)}개)")
+            jobs.append({"name": name, "model": model, "keys": [request.key for request in chunk]})
+        with open(jobs_path, "w", encoding="utf-8") as f:
+            json.dump({"digest": digest, "jobs": jobs}, f, ensure_ascii=False)
+        if os.path.exists(results_path):
+            os.remove(results_path)
+
+    pending = [job for job in jobs if not all(key in results for key in job["keys"])]
+    start = time.time()
+    # 짧은 작업은 빨리 끝나므로 1초부터 두 배씩 늘려 poll_interval까지 확인 간격을 늘림
+    delay = 1.0
+    while pending:
+        for job in list(pending):
+            try:
+                state = "failed" if job["name"] in errors else transport.status(job["name"])
+            except KeyError:
+                # 로컬 전송은 프로세스가 바뀌면 작업이 없으므로 다시 제출
+                try:
+                    job["name"] = transport.submit(job["model"], [by_key[key] for key in job["keys"]], display_name)
+                except Exception as e:
+                    errors[job["name"]] = e
+                with open(jobs_path, "w", encoding="utf-8") as f:
+                    json.dump({"digest": digest, "jobs": jobs}, f, ensure_ascii=False)
+                continue
+            except Exception as e:
+                state, errors[job["name"]] = "failed", e
+            if state == "running":
+                continue
+            if state == "succeeded":
+                try:
+                    job_results = transport.results(job["name"], job["keys"])
+                except Exception as e:
+                    state, errors[job["name"]] = "failed", e
+            if state != "succeeded":
+                reason = f"배치 작업 실패: {job['name']}" + (f" ({errors[job['name']]})" if job["name"] in errors else "")
+                job_results = [BatchResult(key, None, reason) for key in job["keys"]]
+            with open(results_path, "a", encoding="utf-8") as f:
+                for result in job_results:
+                    results[result.key] = result
+                    f.write(json.dumps(list(result), ensure_ascii=False) + "\n")
+            pending.remove(job)
+            print(f"배치 작업 완료: {job['name']} ({state}, 경과 {time.time() - start:.0f}s, 남은 작업 {len(pending)}개)")
+        if pending:
+            time.sleep(min(delay, poll_interval))
+            delay *= 2
+    return results
+
+def batch_extract_tables(jobs, transport, workdir="batch_tables", poll_interval=POLL_INTERVAL):
+    """[(이미지 경로, 표 영역)] 작업의 표 전체 추출(AI 방식)을 배치로 처리하는 함수
+
+    반환값: {작업 번호: 표 데이터}. 실패하거나 응답을 해석하지 못한 작업은 빠지며, 호출한 쪽에서 동기 방식으로 다시 처리
+    """
+    from main import TABLE_MODEL, table_request_contents
+    from structured_output import json_config, table_schema
+
+    config = json_config(table_schema())
+    requests = [BatchRequest(f"table-{i}", TABLE_MODEL, table_request_contents(image_path, bbox=bbox), config)
+                for i, (image_path, bbox) in enumerate(jobs)]
+    results = run_batch(requests, transport, workdir, "tables", poll_interval)
+
+    tables = {}
+    for i in range(len(jobs)):
+        result = results.get(f"table-{i}")
+        if result is None or result.error:
+            continue
+        try:
+            tables[i] = parse_json_response(result.text)
+        except ValueError as e:
+            print(f"배치 응답 해석 실패 (동기 방식으로 다시 처리): {jobs[i][0]} ({e})")
+    return tables
+
+def batch_prefetch_cells(jobs, transport, dedup_index, memory_budget_mb=None, workdir="batch_cells",
+                         poll_interval=POLL_INTERVAL):
+    """컴퓨터 비전 방식의 셀 OCR을 배치로 미리 처리해 dedup_index에 채워두는 함수
+
+    모든 페이지의 셀을 검출해 같은 모양의 셀끼리 묶고 대표 셀만 배치로 OCR합니다.
+    이후 같은 dedup_index로 extract_table_with_cv를 실행하면 셀 OCR은 인덱스에서 바로 가져옵니다.
+    (실패한 셀은 인덱스에 없으므로 그때 동기 방식으로 OCR)
+    """
+    from cell_dedup import cell_signature
+    from table_cv_extraction import CELL_OCR_MODEL, detect_page_cells, crop_cell, cell_ocr_contents
+
+    signatures, crops = [], []
+    for image_path, bbox in jobs:
+        img, cell_boxes, row_height = detect_page_cells(image_path, bbox, memory_budget_mb)
+        for cell_box in cell_boxes:
+            cell_img = crop_cell(img, cell_box)
+            signature = cell_signature(img, cell_box)
+            if cell_img.size and dedup_index.lookup(signature) is None:
+                signatures.append(signature)
+                crops.append((cell_img, row_height))
+
+    representatives, _ = dedup_index.group(signatures)
+    print(f"배치 셀 OCR: 셀 {len(signatures)}개 → 요청 {len(representatives)}개")
+    requests = [BatchRequest(f"cell-{n}", CELL_OCR_MODEL, cell_ocr_contents(*crops[index]), None)
+                for n, index in enumerate(representatives)]
+    results = run_batch(requests, transport, workdir, "cells", poll_interval)
+
+    filled = 0
+    for n, index in enumerate(representatives):
+        result = results.get(f"cell-{n}")
+        if result is not None and not result.error:
+            dedup_index.add(signatures[index], (result.text or "").strip())
+            filled += 1
+    return filled
+
+def batch_extract_receipts(image_files, transport, workdir="batch_receipts", poll_interval=POLL_INTERVAL):
+    """영수증들을 single 모드 프롬프트(1회 호출)로 배치 처리하는 함수
+
+    반환값: {작업 번호: (front_info, handwritten_info)}. 실패한 영수증은 빠지며, 호출한 쪽에서 동기 방식으로 다시 처리
+    """
+    from gemini_ocr import (RECEIPT_MODEL, COMBINED_PROMPT, PRINTED_KEYS, HINT_KEYS,
+                            receipt_config, receipt_image_part, split_combined)
+
+    config = receipt_config(PRINTED_KEYS + HINT_KEYS)
+    requests = [BatchRequest(f"receipt-{i}", RECEIPT_MODEL, [receipt_image_part(image_path), COMBINED_PROMPT], config)
+                for i, image_path in enumerate(image_files)]
+    results = run_batch(requests, transport, workdir, "receipts", poll_interval)
+
+    receipts = {}
+    for i in range(len(image_files)):
+        result = results.get(f"receipt-{i}")
+        if result is None or result.error:
+            continue
+        try:
+            receipts[i] = split_combined(parse_json_response(result.text))
+        except ValueError as e:
+            print(f"배치 응답 해석 실패 (동기 방식으로 다시 처리): {image_files[i]} ({e})")
+    return receipts
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+OCR 방식별 요청 수/토큰/지연/정확도 비교 벤치마크
+
+표 전체 1회 요청(Gemini AI), 셀 단위 요청(컴퓨터 비전), 행 띠 요청(N행/요청)을 같은 이미지에 실행하고
+gemini_client.STATS로 요청 수와 토큰 사용량을 집계합니다. 일치율은 첫 번째 방식 결과를 기준으로 계산합니다.
+
+사용 예:
+    python bench_ocr_modes.py --strips 1,4,8
+    GEMINI_BASE_URL=http://127.0.0.1:8089 python bench_ocr_modes.py   # 녹화 재생 서버 사용
+"""
+
+import os
+import glob
+import time
+import argparse
+
+from gemini_client import STATS
+from bench_upload_prep import cell_agreement
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OCR 방식별 비교 벤치마크")
+    parser.add_argument("--folder", default="img-split-calculation")
+    parser.add_argument("--strips", default="1,4,8", help="비교할 행 띠 크기 목록 (행/요청)")
+    parser.add_argument("--skip-cells", action="store_true", help="셀 단위 방식 생략 (요청 수가 많음)")
+    args = parser.parse_args()
+
+    from main import extract_table_data_gemini
+    from table_cv_extraction import extract_table_with_cv
+    from row_strip_extraction import extract_table_rowstrips
+
+    api_key = os.getenv('GEMINI_API_KEY') or input("Gemini API 키를 입력하세요: ")
+
+    modes = [("표 전체", lambda path: extract_table_data_gemini(api_key, path))]
+    if not args.skip_cells:
+        modes.append(("셀 단위", lambda path: extract_table_with_cv(api_key, path)))
+    for rows in [int(n) for n in args.strips.split(",")]:
+        modes.append((f"행 띠 {rows}행", lambda path, rows=rows: extract_table_rowstrips(api_key, path, rows_per_strip=rows)))
+
+    image_files = []
+    for ext in ['*.jpg', '*.jpeg', '*.png']:
+        image_files.extend(glob.glob(os.path.join(args.folder, ext)))
+    image_files.sort()
+
+    for image_path in image_files:
+        print(f"\n=== {os.path.basename(image_path)} ===")
+        print(f"{'방식':<12} {'요청':>6} {'오류':>5} {'입력 토큰':>10} {'출력 토큰':>10} {'소요(s)':>8} {'행':>5} {'일치율':>7}")
+
+        reference = None
+        for name, run in modes:
+            STATS.reset()
+            start = time.time()
+            try:
+                result = run(image_path)
+            except Exception as e:
+                print(f"{name:<12} 실패: {e}")
+                continue
+            elapsed = time.time() - start
+            stats = STATS.snapshot()
+            if reference is None:
+                reference = result
+            print(f"{name:<12} {stats['requests']:>6} {stats['errors']:>5} {stats['prompt_tokens']:>10,} "
+                  f"{stats['output_tokens']:>10,} {elapsed:>8.2f} {len(result.get('rows', [])):>5} "
+                  f"{cell_agreement(reference, result):>7.1%}")
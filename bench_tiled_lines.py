@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+띠 단위 선 검출의 최대 메모리/소요 시간 비교 벤치마크
+
+전체 페이지 처리(컬러 로드 + detect_horizontal_lines + detect_vertical_lines + 셀 검출)와
+띠 단위 처리(그레이스케일 로드 + detect_lines_tiled + 셀 검출)의 tracemalloc 최대 메모리를 비교하고,
+두 방식의 수평선/수직선 마스크가 같은지도 확인합니다. (--upscale로 초대형 도면을 흉내낼 수 있음)
+
+사용 예:
+    python bench_tiled_lines.py --budgets 8,32,128
+    python bench_tiled_lines.py --folder img-drawing --upscale 2
+"""
+
+import os
+import glob
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import cv2
+
+from table_cv_extraction import detect_horizontal_lines, detect_vertical_lines, detect_table_cells
+from tiled_lines import detect_lines_tiled, load_gray
+
+def run_full(image_path):
+    img = cv2.imread(image_path)
+    horiz_lines, bin_img, _ = detect_horizontal_lines(img)
+    vert_lines = detect_vertical_lines(bin_img)
+    return horiz_lines, vert_lines, detect_table_cells(img, horiz_lines, vert_lines)
+
+def run_tiled(image_path, budget):
+    gray = load_gray(image_path)
+    horiz_lines, vert_lines = detect_lines_tiled(gray, budget)
+    return horiz_lines, vert_lines, detect_table_cells(gray, horiz_lines, vert_lines)
+
+def measure(func, *args):
+    """함수 실행 중 최대 할당 메모리(MB)와 소요 시간을 측정하는 함수"""
+    tracemalloc.start()
+    start = time.time()
+    result = func(*args)
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, peak / (1024 * 1024), elapsed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="띠 단위 선 검출 메모리 벤치마크")
+    parser.add_argument("--folder", default="img-drawing")
+    parser.add_argument("--budgets", default="8,32,128", help="비교할 작업 메모리 예산 목록 (MB)")
+    parser.add_argument("--upscale", type=float, default=1.0, help="페이지를 확대해 큰 도면을 흉내냄")
+    args = parser.parse_args()
+
+    image_files = []
+    for ext in ['*.jpg', '*.jpeg', '*.png']:
+        image_files.extend(glob.glob(os.path.join(args.folder, ext)))
+    image_files.sort()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for image_path in image_files:
+            if args.upscale != 1.0:
+                img = cv2.imread(image_path)
+                img = cv2.resize(img, None, fx=args.upscale, fy=args.upscale, interpolation=cv2.INTER_NEAREST)
+                image_path = os.path.join(tmp, os.path.basename(image_path))
+                cv2.imwrite(image_path, img)
+                del img
+
+            (full_h, full_v, full_cells), full_peak, full_time = measure(run_full, image_path)
+            height, width = full_h.shape
+            print(f"\n=== {os.path.basename(image_path)} ({width}x{height}, 그레이 {width * height / 1024 / 1024:.1f}MB) ===")
+            print(f"{'방식':<14} {'최대 MB':>9} {'시간(s)':>8} {'셀':>6} {'마스크 일치':>10}")
+            print(f"{'전체 페이지':<14} {full_peak:>9.1f} {full_time:>8.2f} {len(full_cells):>6} {'-':>10}")
+
+            for budget in [int(b) for b in args.budgets.split(",")]:
+                (tiled_h, tiled_v, tiled_cells), peak, elapsed = measure(run_tiled, image_path, budget)
+                same = (tiled_h == full_h).all() and (tiled_v == full_v).all()
+                print(f"{f'띠 {budget}MB':<14} {peak:>9.1f} {elapsed:>8.2f} {len(tiled_cells):>6} {str(same):>10}")
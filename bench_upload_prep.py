@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+업로드 준비 정책별 크기/정확도 비교 벤치마크
+
+각 이미지에 대해 목표 글자 높이와 이진화 여부를 바꿔가며 업로드 바이트 수를 측정합니다.
+--ocr 옵션을 주면 정책별로 Gemini 표 추출을 실행해 원본 대비 셀 일치율과 요청 시간도 비교합니다.
+
+사용 예:
+    python bench_upload_prep.py
+    python bench_upload_prep.py --ocr --heights 10,12,14,18
+"""
+
+import os
+import glob
+import time
+import argparse
+
+import cv2
+
+from upload_prep import prepare_upload, detect_mime_type, estimate_row_height
+
+def cell_agreement(reference, candidate):
+    """두 추출 결과의 셀 단위 일치율을 계산하는 함수 (공백 무시)"""
+    ref_rows = reference.get('rows', [])
+    cand_rows = candidate.get('rows', [])
+    total = sum(len(row) for row in ref_rows)
+    if total == 0:
+        return 0.0
+    matched = 0
+    for ref_row, cand_row in zip(ref_rows, cand_rows):
+        for ref_cell, cand_cell in zip(ref_row, cand_row):
+            if str(ref_cell).replace(" ", "") == str(cand_cell).replace(" ", ""):
+                matched += 1
+    return matched / total
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="업로드 준비 정책 벤치마크")
+    parser.add_argument("--folder", default="img-split-calculation")
+    parser.add_argument("--heights", default="8,10,12,14,18", help="비교할 목표 글자 높이 목록 (px)")
+    parser.add_argument("--ocr", action="store_true", help="Gemini로 정확도까지 비교 (API 호출 발생)")
+    args = parser.parse_args()
+
+    image_files = []
+    for ext in ['*.jpg', '*.jpeg', '*.png']:
+        image_files.extend(glob.glob(os.path.join(args.folder, ext)))
+    image_files.sort()
+
+    policies = [("원본", None)]
+    for height in [int(h) for h in args.heights.split(",")]:
+        policies.append((f"text{height}px gray", {"row_height": "auto", "target_text_height": height, "allow_bilevel": False}))
+        policies.append((f"text{height}px bilevel", {"row_height": "auto", "target_text_height": height, "allow_bilevel": True}))
+
+    api_key = None
+    if args.ocr:
+        from main import extract_table_data_gemini
+        api_key = os.getenv('GEMINI_API_KEY') or input("Gemini API 키를 입력하세요: ")
+
+    for image_path in image_files:
+        with open(image_path, "rb") as f:
+            original = f.read()
+        row_height = estimate_row_height(cv2.imread(image_path))
+        print(f"\n=== {os.path.basename(image_path)} ({detect_mime_type(original)}, {len(original):,} bytes, 행 높이 {row_height:.1f}px) ===")
+        print(f"{'정책':<22} {'bytes':>10} {'비율':>7} {'scale':>6} {'mode':>8} {'일치율':>7} {'시간(s)':>8}")
+
+        reference = None
+        for name, options in policies:
+            if options is None:
+                size, ratio, scale, mode = len(original), 1.0, 1.0, "-"
+            else:
+                data, _, info = prepare_upload(image_path, **options)
+                size, ratio, scale, mode = len(data), len(data) / len(original), info["scale"], info["mode"]
+
+            agreement, elapsed = "", ""
+            if args.ocr:
+                start = time.time()
+                # 원본 정책은 축소/변환 없이 업로드
+                upload_options = options or {"convert": False}
+                result = extract_table_data_gemini(api_key, image_path, upload_options=upload_options)
+                elapsed = f"{time.time() - start:.2f}"
+                if reference is None:
+                    reference = result
+                agreement = f"{cell_agreement(reference, result):.1%}"
+
+            print(f"{name:<22} {size:>10,} {ratio:>7.1%} {scale:>6.2f} {mode:>8} {agreement:>7} {elapsed:>8}")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+가짜 Gemini 서버(replay 모드)를 이용한 오프라인 동시성 벤치마크 스크립트
+
+녹화된 응답을 지연/지터/오류 주입과 함께 재생하면서
+max_workers 설정별 처리 시간(makespan)과 처리량을 비교합니다.
+
+사용 예:
+    python bench_workers.py --scale 10 --workers 1,4,8,16 --latency-ms 1500 --jitter-ms 800
+    python bench_workers.py --workers 8 --slow-rate 0.05 --slow-ms 10000 --hedge   # 헤징 전후 비교
+"""
+
+import os
+import glob
+import time
+import argparse
+import statistics
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from fake_gemini_server import start_server
+from gemini_client import BASE_URL_ENV, STATS, HedgePolicy
+
+def run_batch(extract_fn, image_files, max_workers, hedge=None):
+    """주어진 스레드 수로 이미지들을 처리하고 (총 시간, 요청별 지연, 오류 수)를 반환하는 함수 (hedge: HedgePolicy)"""
+    latencies = []
+    errors = 0
+
+    def timed_call(image_path):
+        start = time.time()
+        try:
+            extract_fn("fake-api-key", image_path, hedge=hedge)
+            return time.time() - start, None
+        except Exception as e:
+            return time.time() - start, e
+
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(timed_call, path) for path in image_files]
+        for future in as_completed(futures):
+            elapsed, error = future.result()
+            latencies.append(elapsed)
+            if error is not None:
+                errors += 1
+    return time.time() - start, latencies, errors
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="오프라인 max_workers 벤치마크")
+    parser.add_argument("--folder", default="img-split-calculation", help="입력 이미지 폴더")
+    parser.add_argument("--store", default="recordings", help="녹화 파일 폴더")
+    parser.add_argument("--scale", type=int, default=10, help="입력 이미지 반복 배수 (부하 배수)")
+    parser.add_argument("--workers", default="1,2,4,8,16", help="비교할 max_workers 목록")
+    parser.add_argument("--latency-ms", type=float, default=1500)
+    parser.add_argument("--jitter-ms", type=float, default=500)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="꼬리 지연 요청 비율")
+    parser.add_argument("--slow-ms", type=float, default=0, help="꼬리 지연 요청의 추가 지연 (ms)")
+    parser.add_argument("--hedge", action="store_true", help="헤징 없이/있이 두 번 실행해 비교")
+    parser.add_argument("--hedge-ratio", type=float, default=0.1, help="헤징 추가 요청 예산 (원 요청 대비)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server, base_url = start_server(
+        mode="replay", store_dir=args.store,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, slow_rate=args.slow_rate, slow_ms=args.slow_ms, seed=args.seed,
+    )
+    os.environ[BASE_URL_ENV] = base_url
+
+    # 환경변수 설정 이후에 import 해야 클라이언트가 가짜 서버를 바라봅니다
+    from main import extract_table_data_gemini
+
+    image_files = []
+    for ext in ['*.jpg', '*.jpeg', '*.png']:
+        image_files.extend(glob.glob(os.path.join(args.folder, ext)))
+    image_files.sort()
+    if not image_files:
+        print(f"{args.folder} 폴더에 이미지 파일이 없습니다.")
+        raise SystemExit(1)
+
+    workload = image_files * args.scale
+    print(f"총 {len(workload)}개 요청 (이미지 {len(image_files)}개 x {args.scale}배)")
+    print(f"{'workers':>8} {'hedge':>6} {'makespan(s)':>12} {'req/s':>8} {'p50(s)':>8} {'p95(s)':>8} {'max(s)':>8} {'errors':>7} {'추가요청':>8}")
+
+    try:
+        for max_workers in [int(w) for w in args.workers.split(",")]:
+            for hedge in ([False, True] if args.hedge else [False]):
+                # 헤징 정책은 첫 배치와 같은 지연 분포를 한 번 학습한 뒤 사용 (워밍업 배치)
+                policy = None
+                if hedge:
+                    policy = HedgePolicy(max_extra_ratio=args.hedge_ratio, max_workers=max_workers)
+                    run_batch(extract_table_data_gemini, workload, max_workers, policy)
+                    policy.primary = policy.extra = 0
+                STATS.reset()
+                # 헤징 유무와 관계없이 같은 지연/오류 순서를 재생하도록 난수 시드 초기화
+                server.rng.seed(args.seed)
+                makespan, latencies, errors = run_batch(extract_table_data_gemini, workload, max_workers, policy)
+                latencies.sort()
+                p50 = statistics.median(latencies)
+                p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+                print(f"{max_workers:>8} {'on' if hedge else 'off':>6} {makespan:>12.2f} {len(workload) / makespan:>8.2f} "
+                      f"{p50:>8.2f} {p95:>8.2f} {latencies[-1]:>8.2f} {errors:>7} {STATS.snapshot()['hedges']:>8}")
+    finally:
+        server.shutdown()
@@ -0,0 +1,196 @@
+"""
+셀 이미지 중복 제거 인덱스 (페이지 간 공유)
+
+구조 일람표에는 D10@150, 300, D13@150, 층 이름 같은 같은 문자열이 계속 반복됩니다.
+셀을 그레이스케일/이진화한 뒤 글자 영역(ink bbox)만 잘라 지각 해시(perceptual hash)를 만들고,
+해시가 가까운 셀은 글자 폭 단위 창(window)으로 픽셀 차이를 한 번 더 확인해 같은 셀이면 OCR 결과를 재사용합니다.
+(D10@150 / D10@250처럼 한 글자만 다른 셀은 해시가 가까워도 확인 단계에서 걸러짐)
+"""
+
+import threading
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+# 셀 테두리 선을 피하기 위해 안쪽으로 들이는 폭 (px)
+BORDER_INSET = 3
+# 이진화 임계값 (도면/계산서는 흑백이므로 고정값 사용)
+INK_THRESHOLD = 128
+# 이 개수보다 글자 픽셀이 적으면 빈 셀
+MIN_INK_PIXELS = 8
+# 해시 크기 (가로 x 세로 = 128비트)
+HASH_SIZE = (32, 4)
+# 후보로 볼 최대 해밍 거리
+MAX_HASH_DISTANCE = 12
+# 글자 영역 크기 허용 오차 (비율)
+SIZE_TOLERANCE = 0.1
+# 글자 폭 창 안에서 허용하는 최대 픽셀 불일치 비율
+MAX_WINDOW_MISMATCH = 0.2
+
+# ink: 글자 영역만 잘라낸 이진 이미지 (bool), size: (높이, 너비)
+CellSignature = namedtuple("CellSignature", ["hash", "size", "ink"])
+
+def cell_signature(img, cell_box, inset=BORDER_INSET):
+    """셀 박스의 글자 영역을 정규화해 서명을 만드는 함수 (빈 셀이면 hash=None)"""
+    x, y, w, h = cell_box
+    crop = img[y+inset:y+h-inset, x+inset:x+w-inset]
+    if crop.size == 0:
+        return CellSignature(None, (0, 0), None)
+    if len(crop.shape) == 3:
+        crop = cv2.cvtColor(crop, cv2.COLOR_BGR2GRAY)
+
+    ink = crop < INK_THRESHOLD
+    ys, xs = np.nonzero(ink)
+    if len(ys) < MIN_INK_PIXELS:
+        return CellSignature(None, (0, 0), None)
+    ink = ink[ys.min():ys.max()+1, xs.min():xs.max()+1]
+
+    small = cv2.resize(ink.astype(np.uint8) * 255, HASH_SIZE, interpolation=cv2.INTER_AREA)
+    bits = (small > 64).flatten()
+    value = int("".join("1" if bit else "0" for bit in bits), 2)
+    return CellSignature(value, ink.shape, ink)
+
+def same_cell(a, b):
+    """두 서명이 같은 글자인지 확인하는 함수 (해시 → 크기 → 글자 폭 창 단위 픽셀 비교)"""
+    if a.hash is None or b.hash is None:
+        return a.hash is None and b.hash is None
+    if bin(a.hash ^ b.hash).count("1") > MAX_HASH_DISTANCE:
+        return False
+    (ah, aw), (bh, bw) = a.size, b.size
+    if abs(ah - bh) > SIZE_TOLERANCE * max(ah, bh) + 1 or abs(aw - bw) > SIZE_TOLERANCE * max(aw, bw) + 1:
+        return False
+
+    # b를 a 크기로 맞춘 뒤 글자 하나 폭(≈ 글자 높이 절반)의 창마다 불일치 비율 확인
+    other = cv2.resize(b.ink.astype(np.uint8), (aw, ah), interpolation=cv2.INTER_NEAREST).astype(bool)
+    diff = (a.ink ^ other).sum(axis=0)
+    union = (a.ink | other).sum(axis=0)
+    window = max(2, ah // 2)
+    for start in range(0, aw, max(1, window // 2)):
+        ink_count = union[start:start+window].sum()
+        if ink_count and diff[start:start+window].sum() / ink_count > MAX_WINDOW_MISMATCH:
+            return False
+    return True
+
+class _Entry:
+    def __init__(self, signature):
+        self.signature = signature
+        self.text = None
+        self.failed = False
+        self.ready = threading.Event()
+
+class CellDedupIndex:
+    """셀 서명 → OCR 결과 인덱스 (스레드 안전, 같은 셀을 동시에 OCR하지 않음)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.buckets = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _bucket_keys(self, signature):
+        # 글자 높이 기준으로 나눠 비교 대상을 줄임 (경계 근처는 이웃 버킷도 확인)
+        height = signature.size[0]
+        return [height // 4 + offset for offset in (-1, 0, 1)]
+
+    def _find(self, signature):
+        for key in self._bucket_keys(signature):
+            for entry in self.buckets.get(key, ()):
+                if not entry.failed and same_cell(entry.signature, signature):
+                    return entry
+        return None
+
+    def lookup(self, signature):
+        """이미 OCR된 같은 셀의 텍스트 (없거나 처리 중이면 None)"""
+        with self.lock:
+            entry = self._find(signature)
+        if entry is not None and entry.ready.is_set() and not entry.failed:
+            return entry.text
+        return None
+
+    def add(self, signature, text):
+        """OCR 결과를 등록하는 함수"""
+        entry = _Entry(signature)
+        entry.text = text
+        entry.ready.set()
+        with self.lock:
+            if self._find(signature) is None:
+                self.buckets.setdefault(self._bucket_keys(signature)[1], []).append(entry)
+
+    def count(self, hits=0, misses=0):
+        """인덱스 밖에서 묶어 처리한 셀(프로세스 풀)의 재사용/OCR 수를 통계에 더하는 함수"""
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_or_compute(self, signature, compute):
+        """같은 셀의 결과가 있으면 재사용하고, 없으면 compute()로 OCR하여 등록하는 함수
+
+        다른 스레드가 같은 셀을 OCR하는 중이면 그 결과를 기다립니다. compute가 예외를 던지면 등록하지 않습니다.
+        """
+        with self.lock:
+            entry = self._find(signature)
+            owner = entry is None
+            if owner:
+                entry = _Entry(signature)
+                self.buckets.setdefault(self._bucket_keys(signature)[1], []).append(entry)
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        if not owner:
+            entry.ready.wait()
+            if entry.failed:
+                return self.get_or_compute(signature, compute)
+            return entry.text
+
+        try:
+            entry.text = compute()
+        except Exception:
+            entry.failed = True
+            with self.lock:
+                self.buckets[self._bucket_keys(signature)[1]].remove(entry)
+            raise
+        finally:
+            entry.ready.set()
+        return entry.text
+
+    def group(self, signatures):
+        """서명 목록을 같은 셀끼리 묶어 (대표 인덱스 목록, 각 서명의 대표 번호)를 반환하는 함수 (인덱스에 등록하지 않음)"""
+        representatives, assignment = [], []
+        for signature in signatures:
+            for number, index in enumerate(representatives):
+                if same_cell(signatures[index], signature):
+                    assignment.append(number)
+                    break
+            else:
+                assignment.append(len(representatives))
+                representatives.append(len(assignment) - 1)
+        return representatives, assignment
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses,
+                    "hit_rate": round(self.hits / total, 3) if total else 0.0}
+
+if __name__ == "__main__":
+    import os
+    import sys
+
+    from table_cv_extraction import detect_horizontal_lines, detect_vertical_lines, detect_table_cells
+
+    # API 호출 없이 폴더 전체의 셀 수와 중복 제거 후 OCR 필요 수를 비교
+    folder = sys.argv[1] if len(sys.argv) > 1 else "img-split-calculation"
+    signatures = []
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith((".png", ".jpg", ".jpeg")):
+            continue
+        img = cv2.imread(os.path.join(folder, filename))
+        horiz_lines, bin_img, _ = detect_horizontal_lines(img)
+        cell_boxes = detect_table_cells(img, horiz_lines, detect_vertical_lines(bin_img))
+        page_signatures = [cell_signature(img, box) for box in cell_boxes]
+        signatures.extend(page_signatures)
+        print(f"{filename}: 셀 {len(cell_boxes)}개, 페이지 내 고유 {len(CellDedupIndex().group(page_signatures)[0])}개")
+    representatives, _ = CellDedupIndex().group(signatures)
+    print(f"전체: 셀 {len(signatures)}개 → OCR {len(representatives)}회 ({len(signatures) / max(1, len(representatives)):.1f}배 감소)")
@@ -0,0 +1,213 @@
+"""
+백그라운드 디버그 산출물 기록 (표본 추출, 축소 오버레이 + JSON Lines 보고서)
+
+save_debug_images는 원본/수평선/수직선/셀 박스 PNG 4장을 원본 해상도로 고정 폴더(debug_output)에 쓰므로
+페이지마다 앞 페이지 파일을 덮어쓰고, 큰 도면의 PNG 인코딩이 처리 시간을 잡아먹습니다.
+여기서는 선 검출 결과를 큐에 넣기만 하고 백그라운드 스레드가
+
+- 실행마다 새 폴더(debug_output/20250801_101500/)에 제출 순번 + 폴더/페이지 이름으로
+- 원본 위에 수평선(빨강)/수직선(파랑)/셀 박스(초록)를 겹친 축소 JPEG 한 장과
+- 셀 좌표, 행 높이, 선 검출 파라미터를 담은 보고서 한 줄(report.jsonl)
+
+을 기록합니다. N 페이지 중 1 페이지만 기록할 수 있고, 큐가 차면 처리 경로를 막지 않고 해당 페이지를 건너뜁니다.
+
+켜는 방법: 환경변수 TABLE_DEBUG=N (N 페이지당 1장, 1이면 모든 페이지), TABLE_DEBUG_DIR=출력 폴더
+또는 코드에서 set_debug_writer(DebugWriter(sample_every=10))
+"""
+
+import os
+import re
+import json
+import time
+import queue
+import atexit
+import threading
+from datetime import datetime
+
+DEBUG_ENV = "TABLE_DEBUG"
+DEBUG_DIR_ENV = "TABLE_DEBUG_DIR"
+DEFAULT_OUTPUT_DIR = "debug_output"
+# 오버레이 이미지의 긴 변 길이 (px)
+OVERLAY_MAX_SIDE = 1600
+OVERLAY_JPEG_QUALITY = 80
+# 기록을 기다리는 페이지 수 상한 (넘으면 건너뜀, 대기 중인 페이지 이미지가 메모리를 차지하므로)
+MAX_PENDING = 4
+
+_writer = None
+_writer_lock = threading.Lock()
+_writer_checked = False
+
+def page_slug(name):
+    """파일 이름으로 쓸 수 있는 페이지 이름 (img-calculation/calculation_0.png@10,20,300,400 → img-calculation-calculation_0.png_10-20-300-400)"""
+    return re.sub(r"[^\w.\-]+", "-", str(name).replace("@", "_")).strip("-") or "page"
+
+class DebugWriter:
+    """선 검출 결과를 백그라운드 스레드에서 축소 오버레이/보고서로 기록하는 객체
+
+    output_dir: 이 실행의 산출물 폴더 (None이면 debug_output/실행시각)
+    sample_every: N 페이지당 1 페이지만 기록
+    """
+
+    def __init__(self, output_dir=None, sample_every=1, max_side=OVERLAY_MAX_SIDE, max_pending=MAX_PENDING):
+        self.output_dir = output_dir or os.path.join(DEFAULT_OUTPUT_DIR, datetime.now().strftime('%Y%m%d_%H%M%S'))
+        self.sample_every = max(1, int(sample_every))
+        self.max_side = max_side
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.seen = 0
+        self.written = 0
+        self.dropped = 0
+        self.write_time = 0.0
+        self.closed = False
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.thread = threading.Thread(target=self._run, daemon=True, name="debug-writer")
+        self.thread.start()
+
+    def submit(self, page, img, horiz_lines=None, vert_lines=None, cell_boxes=(), **details):
+        """페이지 하나를 기록 대기열에 넣는 함수 (표본에서 빠졌거나 큐가 차 있으면 False, 호출 쪽은 기다리지 않음)
+
+        details: 보고서에 함께 남길 값 (row_height, params 등, JSON으로 바꿀 수 있어야 함)
+        """
+        with self.lock:
+            if self.closed:
+                return False
+            self.seen += 1
+            number = self.seen
+            if (number - 1) % self.sample_every:
+                return False
+        try:
+            self.jobs.put_nowait((number, page, img, horiz_lines, vert_lines, list(cell_boxes), details))
+            return True
+        except queue.Full:
+            with self.lock:
+                self.dropped += 1
+            return False
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            start = time.time()
+            try:
+                self._write(*job)
+                with self.lock:
+                    self.written += 1
+            except Exception as e:
+                print(f"디버그 산출물 기록 오류 ({job[1]}): {e}")
+            finally:
+                with self.lock:
+                    self.write_time += time.time() - start
+
+    def _write(self, number, page, img, horiz_lines, vert_lines, cell_boxes, details):
+        import cv2
+
+        # 같은 이름의 페이지(다른 폴더, 다른 PDF의 name_pN.png)가 서로 덮어쓰지 않도록 제출 순번을 붙임
+        slug = f"{number:05d}_{page_slug(page)}"
+        height, width = img.shape[:2]
+        scale = min(1.0, self.max_side / max(height, width))
+        overlay = img if len(img.shape) == 3 else cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
+        if scale < 1.0:
+            overlay = cv2.resize(overlay, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        else:
+            overlay = overlay.copy()
+        size = (overlay.shape[1], overlay.shape[0])
+        # 선 마스크는 축소하면 1px 선이 사라지므로 INTER_AREA 후 0보다 큰 곳을 모두 선으로 표시
+        for mask, color in ((horiz_lines, (0, 0, 255)), (vert_lines, (255, 0, 0))):
+            if mask is not None:
+                small = cv2.resize(mask, size, interpolation=cv2.INTER_AREA) if scale < 1.0 else mask
+                overlay[small > 0] = color
+        for x, y, w, h in cell_boxes:
+            cv2.rectangle(overlay, (int(x * scale), int(y * scale)), (int((x + w) * scale), int((y + h) * scale)), (0, 160, 0), 1)
+
+        image_name = f"{slug}.jpg"
+        cv2.imwrite(os.path.join(self.output_dir, image_name), overlay, [cv2.IMWRITE_JPEG_QUALITY, OVERLAY_JPEG_QUALITY])
+        record = {"seq": number, "page": str(page), "image": image_name, "width": width, "height": height, "scale": round(scale, 4),
+                  "cells": len(cell_boxes), "cell_boxes": [[int(v) for v in box] for box in cell_boxes]}
+        record.update({key: _jsonable(value) for key, value in details.items()})
+        # 보고서는 페이지당 한 줄씩 추가 (중간에 멈춰도 기록한 페이지까지는 남음)
+        with open(os.path.join(self.output_dir, "report.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def stats(self):
+        with self.lock:
+            return {"seen": self.seen, "written": self.written, "dropped": self.dropped,
+                    "pending": self.jobs.qsize(), "write_time": round(self.write_time, 3)}
+
+    def close(self):
+        """남은 페이지를 모두 기록하고 스레드를 끝내는 함수"""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+        self.jobs.put(None)
+        self.thread.join()
+        stats = self.stats()
+        if stats["written"] or stats["dropped"]:
+            print(f"디버그 산출물: {self.output_dir} (기록 {stats['written']}페이지, 건너뜀 {stats['dropped']}페이지)")
+
+def _jsonable(value):
+    """namedtuple/numpy 값을 JSON으로 바꿀 수 있는 값으로 변환"""
+    if hasattr(value, "_asdict"):
+        return {key: _jsonable(item) for key, item in value._asdict().items()}
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _jsonable(item) for key, item in value.items()}
+    if hasattr(value, "item"):
+        return value.item()
+    return value
+
+def set_debug_writer(writer):
+    """프로세스 전체에서 쓸 디버그 기록기를 바꾸고 이전 기록기를 반환하는 함수 (None이면 끔)"""
+    global _writer, _writer_checked
+    with _writer_lock:
+        previous, _writer = _writer, writer
+        _writer_checked = True
+    return previous
+
+def debug_writer():
+    """현재 디버그 기록기 (꺼져 있으면 None). 처음 호출할 때 TABLE_DEBUG 환경변수를 확인"""
+    global _writer, _writer_checked
+    if _writer_checked:
+        return _writer
+    with _writer_lock:
+        if not _writer_checked:
+            sample_every = os.getenv(DEBUG_ENV)
+            if sample_every and sample_every != "0":
+                _writer = DebugWriter(os.getenv(DEBUG_DIR_ENV), sample_every=int(sample_every))
+                atexit.register(_writer.close)
+            _writer_checked = True
+    return _writer
+
+if __name__ == "__main__":
+    import sys
+    import glob
+    import cv2
+
+    # 기존 동기 PNG 저장과 백그라운드 기록의 페이지당 추가 시간 비교 (API 호출 없음)
+    from table_cv_extraction import detect_horizontal_lines, detect_vertical_lines, detect_table_cells, save_debug_images
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else "img-calculation"
+    pages = []
+    for image_path in sorted(glob.glob(os.path.join(folder, "*.png"))):
+        img = cv2.imread(image_path)
+        horiz_lines, bin_img, _ = detect_horizontal_lines(img)
+        vert_lines = detect_vertical_lines(bin_img)
+        pages.append((os.path.basename(image_path), img, horiz_lines, vert_lines, detect_table_cells(img, horiz_lines, vert_lines)))
+
+    start = time.time()
+    for _, img, horiz_lines, vert_lines, cell_boxes in pages:
+        save_debug_images(img, horiz_lines, vert_lines, cell_boxes, output_dir=os.path.join(DEFAULT_OUTPUT_DIR, "sync"))
+    sync_time = (time.time() - start) / len(pages)
+
+    writer = DebugWriter(sample_every=1)
+    start = time.time()
+    for name, img, horiz_lines, vert_lines, cell_boxes in pages:
+        writer.submit(name, img, horiz_lines, vert_lines, cell_boxes)
+        time.sleep(0.5)  # 페이지당 선 검출/OCR 시간 대신
+    submit_time = (time.time() - start) / len(pages) - 0.5
+    writer.close()
+    stats = writer.stats()
+    print(f"동기 PNG 4장: 페이지당 {sync_time * 1000:.0f}ms")
+    print(f"백그라운드 기록: 처리 경로 추가 {max(0.0, submit_time) * 1000:.1f}ms, 기록 스레드 페이지당 {stats['write_time'] / max(1, stats['written']) * 1000:.0f}ms")
@@ -0,0 +1,132 @@
+"""
+스캔 페이지 기울기 보정 (선 검출 전 단계)
+
+detect_horizontal_lines(40x1)와 detect_vertical_lines(1x20)는 축에 정렬된 커널로 열림 연산을 하므로,
+스캔이 조금만 기울어도 표 선이 조각나 calculate_row_height가 기본값(50px)으로 떨어지고 셀이 합쳐집니다.
+여기서는 축소한 이진 이미지를 후보 각도로 회전시켜 가로 투영(행별 글자/선 픽셀 수)의 분산이 가장 큰 각도를 찾고
+(표 선과 글자 줄이 수평일 때 투영이 가장 뾰족함), 선 검출 전에 한 번의 어파인 회전으로 보정합니다.
+
+추정한 각도는 페이지(파일 경로, 수정 시각, 영역)별로 캐시되어 같은 페이지를 다시 처리할 때 재계산하지 않습니다.
+"""
+
+import os
+import threading
+
+import cv2
+import numpy as np
+
+# 탐색할 최대 기울기 (도). 이보다 크게 기울어진 페이지는 회전된 페이지로 보고 보정하지 않음
+MAX_SKEW_ANGLE = 5.0
+# 1차(거친) 탐색 간격과 2차(세밀) 탐색 간격 (도)
+COARSE_STEP = 0.5
+FINE_STEP = 0.05
+# 추정용 축소 이미지의 긴 변 길이 (px)
+ESTIMATE_MAX_SIDE = 800
+# 이보다 작은 기울기는 보정하지 않음 (도). 기울지 않은 스캔에서도 추정값이 ±0.15도까지 흔들리므로 그 위로 여유를 둠
+MIN_CORRECTION_ANGLE = 0.3
+
+_angles = {}
+_angles_lock = threading.Lock()
+
+def _rotate(img, angle, border_value=0):
+    """이미지 중심 기준으로 angle도(반시계 방향) 회전하는 함수 (크기 유지)"""
+    height, width = img.shape[:2]
+    matrix = cv2.getRotationMatrix2D((width / 2, height / 2), angle, 1.0)
+    return cv2.warpAffine(img, matrix, (width, height), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_CONSTANT, borderValue=border_value)
+
+def _shift_rows(img, offsets, fill):
+    """행 y를 offsets[y]px만큼 오른쪽으로 옮기는 함수 (소수 이동은 선형 보간, 제자리 연산, 임시 버퍼는 행 하나)"""
+    width = img.shape[1]
+    positions = np.arange(width, dtype=np.float64)
+    for y, offset in enumerate(offsets):
+        if offset == 0:
+            continue
+        row = img[y].reshape(width, -1).astype(np.float64)
+        shifted = img[y].reshape(width, -1)
+        for channel in range(row.shape[1]):
+            value = fill[channel] if isinstance(fill, tuple) else fill
+            shifted[:, channel] = np.rint(np.interp(positions - offset, positions, row[:, channel], left=value, right=value))
+
+def _rotate_in_place(img, angle, fill):
+    """_rotate와 같은 회전을 세 번의 전단(가로-세로-가로)으로 제자리에서 수행하는 함수
+
+    페이지 크기 사본을 만들지 않으므로 메모리 예산 경로(memory_budget_mb)에서 사용
+    """
+    height, width = img.shape[:2]
+    theta = np.deg2rad(angle)
+    a, b = np.tan(theta / 2), -np.sin(theta)
+    row_offsets = (np.arange(height) - height / 2) * a
+    column_offsets = (np.arange(width) - width / 2) * b
+    _shift_rows(img, row_offsets, fill)
+    # 열 이동은 전치 뷰의 행 이동 (복사 없음)
+    _shift_rows(img.swapaxes(0, 1), column_offsets, fill)
+    _shift_rows(img, row_offsets, fill)
+    return img
+
+def _projection_score(bin_small, angle):
+    """회전 후 가로 투영의 분산 (클수록 선/글자 줄이 수평에 가까움)"""
+    rotated = _rotate(bin_small, angle)
+    return float(np.var(rotated.sum(axis=1, dtype=np.float64)))
+
+def estimate_skew(img, max_angle=MAX_SKEW_ANGLE):
+    """페이지 기울기를 추정하는 함수
+
+    반환값: 보정 각도 (도). _rotate(img, angle)로 돌리면 표 선이 수평이 됨
+    """
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+    scale = min(1.0, ESTIMATE_MAX_SIDE / max(gray.shape[:2]))
+    if scale < 1.0:
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    _, bin_small = cv2.threshold(gray, 0, 1, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+
+    # 거친 간격으로 전체 범위를 본 뒤 최고점 주변만 세밀하게 탐색
+    coarse = np.arange(-max_angle, max_angle + COARSE_STEP / 2, COARSE_STEP)
+    best = max(coarse, key=lambda angle: _projection_score(bin_small, angle))
+    fine = np.arange(best - COARSE_STEP, best + COARSE_STEP + FINE_STEP / 2, FINE_STEP)
+    best = max(fine, key=lambda angle: _projection_score(bin_small, angle))
+    return round(float(best), 2)
+
+def page_skew(img, image_path=None, bbox=None):
+    """페이지 기울기를 캐시와 함께 반환하는 함수 (image_path가 없으면 캐시하지 않음)"""
+    if image_path is None:
+        return estimate_skew(img)
+    key = (os.path.abspath(image_path), os.path.getmtime(image_path), tuple(bbox) if bbox is not None else None)
+    with _angles_lock:
+        if key in _angles:
+            return _angles[key]
+    angle = estimate_skew(img)
+    with _angles_lock:
+        _angles[key] = angle
+    return angle
+
+def deskew_page(img, image_path=None, bbox=None, in_place=False):
+    """기울기를 추정해 한 번의 어파인 회전으로 보정하는 함수
+
+    in_place: True면 페이지 크기 사본 없이 전단 회전으로 img를 직접 고침 (메모리 예산 경로용)
+    반환값: (보정된 이미지, 보정 각도). 기울기가 MIN_CORRECTION_ANGLE 미만이면 원본을 그대로 반환
+    """
+    angle = page_skew(img, image_path, bbox)
+    if abs(angle) < MIN_CORRECTION_ANGLE:
+        return img, 0.0
+    # 바깥 영역은 흰 배경으로 채워 가장자리에 가짜 선이 생기지 않게 함
+    border_value = (255, 255, 255) if len(img.shape) == 3 else 255
+    print(f"기울기 보정: {angle:+.2f}도")
+    if in_place:
+        return _rotate_in_place(img, angle, border_value), angle
+    return _rotate(img, angle, border_value), angle
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # 폴더의 각 페이지를 일부러 기울인 뒤 추정 각도가 되돌아오는지 확인 (API 호출 없음)
+    folder = sys.argv[1] if len(sys.argv) > 1 else "img-split-calculation"
+    for filename in sorted(os.listdir(folder)):
+        if not filename.lower().endswith((".png", ".jpg", ".jpeg")):
+            continue
+        img = cv2.imread(os.path.join(folder, filename))
+        for applied in (-2.0, -0.7, 0.0, 1.3):
+            start = time.time()
+            estimated = estimate_skew(_rotate(img, applied, (255, 255, 255)))
+            print(f"{filename}: 적용 {applied:+.2f}도 → 추정 보정 {estimated:+.2f}도 ({(time.time() - start) * 1000:.0f}ms)")
@@ -0,0 +1,157 @@
+"""
+도면 배근표(WALL LIST) 정규화
+
+도면 쪽 배근표(img-drawing, img-split-drawing)는 계산서와 같은 선 검출/OCR 경로로 읽되, 헤더 배치가 다릅니다.
+- 표 위에 제목/재료 강도 영역(■ WALL LIST ■, fck = ...)이 있어 첫 행이 헤더가 아님
+- 헤더 이름이 도면마다 다름 (층수/층/FLOOR, 수직철근/수직근/V-BAR, 두께/THK ...)
+- 두 줄 헤더 (철근 | 철근 아래에 수직 | 수평)나 계산서와 다른 열 순서
+
+여기서는 헤더 후보 행을 동의어 사전으로 찾아 열을 계산서 결과와 같은 이름(SCHEDULE_COLUMNS)에 맞추고,
+층 범위/철근 표기를 정규화해 계산서 결과와 같은 키(WALL, 층수)로 비교할 수 있는 행 목록을 만듭니다.
+추출 자체는 main.process_calculations(drawing=True)가 계산서와 같은 동시 처리 경로로 실행합니다.
+"""
+
+import re
+
+from floor_index import parse_floor_ranges, format_floor_range
+
+# 계산서 결과 CSV와 같은 열 이름/순서
+SCHEDULE_COLUMNS = ["WALL", "층수", "두께", "수직철근", "횡방향 띠철근 상세", "수평철근"]
+
+# 열 이름 → 도면에서 쓰는 헤더 표기 (공백/기호를 지우고 대문자로 비교, 긴 표기부터 확인)
+HEADER_SYNONYMS = {
+    "WALL": ["WALL", "WALLMARK", "MARK", "부재명", "부재", "벽체명", "벽체", "기호", "NAME"],
+    "층수": ["층수", "층", "FLOOR", "FLR", "LEVEL", "STORY", "위치"],
+    "두께": ["두께", "벽두께", "THICKNESS", "THK", "T"],
+    "수직철근": ["수직철근", "수직근", "VERTICALBAR", "VERTICAL", "VBAR", "VERT", "수직", "세로근"],
+    "횡방향 띠철근 상세": ["횡방향띠철근상세", "횡방향띠철근", "띠철근상세", "띠철근", "TIEBAR", "TIE", "HOOP", "횡방향"],
+    "수평철근": ["수평철근", "수평근", "HORIZONTALBAR", "HORIZONTAL", "HBAR", "HORI", "수평", "가로근"],
+}
+# 헤더 행으로 인정할 최소 일치 열 수
+MIN_HEADER_MATCHES = 3
+# 헤더 행을 찾을 범위 (표 위쪽 행 수)
+HEADER_SEARCH_ROWS = 8
+# 빈 칸으로 볼 표기
+EMPTY_VALUES = {"", "-", "—", "–", "N/A"}
+
+_SYNONYM_LOOKUP = sorted(((synonym, column) for column, synonyms in HEADER_SYNONYMS.items() for synonym in synonyms),
+                         key=lambda item: -len(item[0]))
+
+def _header_key(text):
+    return re.sub(r"[\s\-_.·:()\[\]■]", "", str(text)).upper()
+
+def match_header(text):
+    """헤더 셀 텍스트를 열 이름으로 바꾸는 함수 (해당 없으면 None)
+
+    한 글자 표기(T, 층)는 전체가 일치할 때만, 나머지는 셀 텍스트에 포함되어도 일치로 봄 (예: '수직철근(VERT.)', '철근수직')
+    """
+    key = _header_key(text)
+    if not key:
+        return None
+    for synonym, column in _SYNONYM_LOOKUP:
+        if key == synonym or (len(synonym) >= 2 and synonym in key):
+            return column
+    return None
+
+def _column_map(cells):
+    """헤더 행 셀 목록 → {열 번호: 열 이름} (같은 이름이 여러 번 나오면 처음 것만)"""
+    mapping, used = {}, set()
+    for col, text in enumerate(cells):
+        column = match_header(text)
+        if column and column not in used:
+            mapping[col] = column
+            used.add(column)
+    return mapping
+
+def find_header(rows):
+    """헤더 행을 찾는 함수
+
+    반환값: (헤더가 끝나는 행 번호 + 1, {열 번호: 열 이름}). 찾지 못하면 (0, None)
+    두 줄 헤더는 위아래 셀 텍스트를 이어 붙였을 때 일치하는 열이 더 많으면 두 줄을 모두 헤더로 봄
+    """
+    best = (0, None)
+    for index, cells in enumerate(rows[:HEADER_SEARCH_ROWS]):
+        mapping = _column_map(cells)
+        end = index + 1
+        if index + 1 < len(rows):
+            below = rows[index + 1]
+            merged = [f"{cells[col] if col < len(cells) else ''}{below[col] if col < len(below) else ''}"
+                      for col in range(max(len(cells), len(below)))]
+            # 아래 행이 헤더 이름을 보완할 때만 (예: 철근 → 철근수직/철근수평)
+            merged_mapping = _column_map(merged)
+            if len(merged_mapping) > len(mapping) and len(_column_map(below)) > 0:
+                mapping, end = merged_mapping, index + 2
+        if len(mapping) >= MIN_HEADER_MATCHES and (best[1] is None or len(mapping) > len(best[1])):
+            best = (end, mapping)
+    return best
+
+def normalize_floor(text):
+    """층 범위 표기 정규화 (11F ~ 28F → 11F~28F, B1F ~ PITF → B1F~PITF, 해석할 수 없으면 공백만 제거)"""
+    try:
+        return ",".join(format_floor_range(start, end) for start, end in parse_floor_ranges(text))
+    except ValueError:
+        return "".join(str(text).split())
+
+def normalize_bar(text):
+    """철근 표기 정규화 (D10 @400 → D10@400, 12 - D10 → 12-D10, d13@150 → D13@150)"""
+    value = "".join(str(text).split()).upper().replace("＠", "@")
+    return re.sub(r"[−–—]", "-", value)
+
+def normalize_value(column, text):
+    """열 종류에 맞게 셀 값을 정규화하는 함수"""
+    text = "" if text is None else str(text).strip()
+    if text in EMPTY_VALUES:
+        return ""
+    if column == "층수":
+        return normalize_floor(text)
+    if column == "두께":
+        digits = re.sub(r"[^\d.]", "", text)
+        return digits or text
+    if column == "WALL":
+        return "".join(text.split()).upper()
+    return normalize_bar(text)
+
+def normalize_schedule(table_data):
+    """추출한 표({'headers', 'rows'} 또는 SparseTable)를 SCHEDULE_COLUMNS 열의 정규화된 표로 바꾸는 함수
+
+    - 제목/재료 영역을 건너뛰고 헤더 행을 찾아 열을 맞춤 (헤더를 찾지 못하고 열 수가 같으면 계산서 순서로 봄)
+    - 빈 행, 반복된 헤더 행 제거
+    - 병합 셀이 비어 있는 AI 결과를 위해 빈 WALL은 위 행 값으로, 빈 두께는 같은 WALL의 위 행 값으로 채움
+    """
+    rows = [list(table_data.get('headers', []))] + [list(row) for row in table_data.get('rows', [])]
+    start, mapping = find_header(rows)
+    if mapping is None:
+        width = max((len(row) for row in rows), default=0)
+        if width != len(SCHEDULE_COLUMNS):
+            raise ValueError("배근표 헤더 행을 찾을 수 없습니다.")
+        start, mapping = 1, dict(enumerate(SCHEDULE_COLUMNS))
+
+    normalized = []
+    previous = {}
+    for cells in rows[start:]:
+        values = {column: normalize_value(column, cells[col]) if col < len(cells) else ""
+                  for col, column in mapping.items()}
+        if not any(values.values()) or len(_column_map(cells)) >= MIN_HEADER_MATCHES:
+            continue
+        if not values.get("WALL") and previous.get("WALL"):
+            values["WALL"] = previous["WALL"]
+        if "두께" in values and not values["두께"] and previous.get("WALL") == values.get("WALL"):
+            values["두께"] = previous.get("두께", "")
+        # 층 이름이 없는 행(비고, 범례 등)은 배근 행이 아님
+        if "층수" in mapping.values() and not values.get("층수"):
+            continue
+        normalized.append([values.get(column, "") for column in SCHEDULE_COLUMNS])
+        previous = values
+    return {'headers': list(SCHEDULE_COLUMNS), 'rows': normalized}
+
+if __name__ == "__main__":
+    import os
+    import sys
+    from table_cv_extraction import detect_page_cells
+
+    # API 호출 없이 도면 페이지의 셀 검출 결과만 확인 (python drawing_extraction.py img-split-drawing)
+    folder = sys.argv[1] if len(sys.argv) > 1 else "img-split-drawing"
+    for filename in sorted(os.listdir(folder)):
+        if filename.lower().endswith((".png", ".jpg", ".jpeg")):
+            _, cell_boxes, row_height = detect_page_cells(os.path.join(folder, filename))
+            print(f"{filename}: 셀 {len(cell_boxes)}개, 행 높이 {row_height:.1f}px")
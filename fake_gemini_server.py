@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+Gemini API 녹화/재생용 로컬 HTTP 서버
+
+- record 모드: 실제 API로 요청을 중계하고 응답을 recordings 폴더에 저장
+- replay 모드: 저장된 응답을 지연(latency), 지터(jitter), 오류 주입과 함께 재생
+- streamGenerateContent 요청은 SSE(data: ...) 이벤트 여러 개로 나눠 재생 (중간 잘림 주입 가능)
+
+사용 예:
+    python fake_gemini_server.py record --port 8089
+    python fake_gemini_server.py replay --port 8089 --latency-ms 800 --jitter-ms 300 --error-rate 0.02
+    python fake_gemini_server.py replay --port 8089 --stream-chunks 6 --truncate-rate 0.2
+    GEMINI_BASE_URL=http://127.0.0.1:8089 python main.py
+"""
+
+import os
+import re
+import json
+import time
+import random
+import hashlib
+import argparse
+import threading
+import urllib.request
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UPSTREAM_URL = "https://generativelanguage.googleapis.com"
+MODEL_PATTERN = re.compile(r"/models/([^/:]+):")
+SSE_CONTENT_TYPE = "text/event-stream"
+
+def request_key(path, body):
+    """요청 경로와 본문으로 녹화 파일의 키를 만드는 함수"""
+    # API 키가 쿼리스트링에 붙어오는 경우가 있으므로 경로에서 제외
+    path = path.split("?")[0]
+    return hashlib.sha256(path.encode("utf-8") + b"\n" + body).hexdigest()
+
+def model_from_path(path):
+    """요청 경로에서 모델 이름을 추출하는 함수"""
+    match = MODEL_PATTERN.search(path)
+    return match.group(1) if match else ""
+
+def is_stream_path(path):
+    """스트리밍 요청(streamGenerateContent)인지 확인하는 함수"""
+    return ":streamGenerateContent" in path.split("?")[0]
+
+def sse_responses(body):
+    """SSE 본문을 응답 JSON 목록으로 나누는 함수"""
+    return [json.loads(line[len("data:"):]) for line in body.splitlines() if line.startswith("data:")]
+
+def merge_responses(responses):
+    """스트리밍 응답 조각들을 하나의 generateContent 응답으로 합치는 함수"""
+    merged = json.loads(json.dumps(responses[-1]))
+    text = "".join(part.get("text", "")
+                   for response in responses
+                   for candidate in response.get("candidates", [])[:1]
+                   for part in candidate.get("content", {}).get("parts", []))
+    if merged.get("candidates"):
+        merged["candidates"][0].setdefault("content", {"role": "model"})["parts"] = [{"text": text}]
+    return merged
+
+def split_response(response, chunks, truncate=False):
+    """generateContent 응답을 텍스트 조각별 스트리밍 응답 목록으로 나누는 함수
+
+    truncate=True면 텍스트 중간에서 끊고 finishReason을 MAX_TOKENS로 바꿈 (이어받기 동작 확인용)
+    """
+    candidates = response.get("candidates") or [{}]
+    parts = candidates[0].get("content", {}).get("parts", [])
+    text = "".join(part.get("text", "") for part in parts)
+    if truncate:
+        text = text[:len(text) // 2]
+    size = max(1, -(-len(text) // max(1, chunks)))
+    pieces = [text[start:start + size] for start in range(0, len(text), size)] or [""]
+
+    responses = []
+    for index, piece in enumerate(pieces):
+        candidate = {"content": {"role": "model", "parts": [{"text": piece}]}, "index": 0}
+        last = index == len(pieces) - 1
+        if last:
+            candidate["finishReason"] = "MAX_TOKENS" if truncate else candidates[0].get("finishReason", "STOP")
+        chunk = {"candidates": [candidate], "modelVersion": response.get("modelVersion", "")}
+        if last and "usageMetadata" in response:
+            chunk["usageMetadata"] = response["usageMetadata"]
+        responses.append(chunk)
+    return responses
+
+class RecordingStore:
+    """녹화된 응답을 파일로 저장하고 불러오는 저장소"""
+
+    def __init__(self, store_dir="recordings"):
+        self.store_dir = store_dir
+        self.lock = threading.Lock()
+        self.by_key = {}
+        self.by_model = {}
+        self.round_robin = {}
+        os.makedirs(store_dir, exist_ok=True)
+        for filename in sorted(os.listdir(store_dir)):
+            if filename.endswith(".json"):
+                with open(os.path.join(store_dir, filename), encoding="utf-8") as f:
+                    self._index(filename[:-5], json.load(f))
+
+    def _index(self, key, record):
+        self.by_key[key] = record
+        self.by_model.setdefault(record.get("model", ""), []).append(record)
+
+    def save(self, key, record):
+        with self.lock:
+            with open(os.path.join(self.store_dir, f"{key}.json"), "w", encoding="utf-8") as f:
+                json.dump(record, f, ensure_ascii=False)
+            self._index(key, record)
+
+    def lookup(self, key, model, loose=True):
+        """정확히 일치하는 녹화가 없으면 같은 모델의 녹화를 순서대로 돌려줌 (loose 모드)"""
+        with self.lock:
+            if key in self.by_key:
+                return self.by_key[key]
+            candidates = self.by_model.get(model)
+            if not loose or not candidates:
+                return None
+            index = self.round_robin.get(model, 0)
+            self.round_robin[model] = index + 1
+            return candidates[index % len(candidates)]
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    """record/replay 모드에 따라 generateContent 요청을 처리하는 핸들러"""
+
+    server_version = "FakeGemini/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        key = request_key(self.path, body)
+        model = model_from_path(self.path)
+
+        if self.server.mode == "record":
+            self._proxy_and_record(key, model, body)
+        else:
+            self._replay(key, model, stream=is_stream_path(self.path))
+
+    def _proxy_and_record(self, key, model, body):
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() in ("content-type", "x-goog-api-key", "x-goog-api-client", "user-agent")}
+        request = urllib.request.Request(self.server.upstream + self.path, data=body, headers=headers, method="POST")
+        start = time.time()
+        try:
+            with urllib.request.urlopen(request) as response:
+                status, payload = response.status, response.read()
+                content_type = response.headers.get("Content-Type", "application/json")
+        except urllib.error.HTTPError as e:
+            status, payload = e.code, e.read()
+            content_type = e.headers.get("Content-Type", "application/json")
+        elapsed_ms = (time.time() - start) * 1000
+
+        if status == 200:
+            self.server.store.save(key, {
+                "model": model,
+                "path": self.path.split("?")[0],
+                "status": status,
+                "content_type": content_type,
+                "latency_ms": round(elapsed_ms, 1),
+                "body": payload.decode("utf-8"),
+            })
+        self._send(status, payload, content_type)
+
+    def _replay(self, key, model, stream=False):
+        config = self.server
+        record = config.store.lookup(key, model, loose=config.loose)
+
+        base_ms = config.latency_ms
+        if config.use_recorded_latency and record and "latency_ms" in record:
+            base_ms = record["latency_ms"]
+        with config.rng_lock:
+            delay_ms = base_ms + config.rng.uniform(-config.jitter_ms, config.jitter_ms)
+            inject_error = config.rng.random() < config.error_rate
+            # 일부 요청만 크게 늦어지는 꼬리 지연(straggler) 주입
+            if config.rng.random() < config.slow_rate:
+                delay_ms += config.slow_ms
+            truncate = stream and config.rng.random() < config.truncate_rate
+        if not stream:
+            time.sleep(max(0.0, delay_ms) / 1000)
+
+        if inject_error:
+            error = {"error": {"code": config.error_status, "message": "injected error", "status": "UNAVAILABLE"}}
+            self._send(config.error_status, json.dumps(error).encode("utf-8"), "application/json")
+            return
+
+        if record is None:
+            error = {"error": {"code": 404, "message": f"녹화된 응답이 없습니다: {model}", "status": "NOT_FOUND"}}
+            self._send(404, json.dumps(error, ensure_ascii=False).encode("utf-8"), "application/json")
+            return
+
+        recorded_stream = record.get("content_type", "").startswith(SSE_CONTENT_TYPE)
+        if stream:
+            if recorded_stream and not truncate:
+                responses = sse_responses(record["body"])
+            else:
+                response = merge_responses(sse_responses(record["body"])) if recorded_stream else json.loads(record["body"])
+                responses = split_response(response, config.stream_chunks, truncate)
+            self._send_stream(responses, delay_ms)
+        elif recorded_stream:
+            self._send(record["status"], json.dumps(merge_responses(sse_responses(record["body"]))).encode("utf-8"), "application/json")
+        else:
+            self._send(record["status"], record["body"].encode("utf-8"), record.get("content_type", "application/json"))
+
+    def _send_stream(self, responses, delay_ms):
+        """응답 조각을 SSE 이벤트로 나눠 보내는 함수 (지연은 첫 조각 전과 조각 사이에 나눠 적용)"""
+        # 첫 토큰까지의 지연을 절반, 나머지를 조각 사이에 고르게 배분
+        first_ms = max(0.0, delay_ms) / 2
+        gap_ms = max(0.0, delay_ms) / 2 / max(1, len(responses) - 1)
+        self.send_response(200)
+        self.send_header("Content-Type", SSE_CONTENT_TYPE)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        time.sleep(first_ms / 1000)
+        try:
+            for index, response in enumerate(responses):
+                if index:
+                    time.sleep(gap_ms / 1000)
+                self.wfile.write(b"data: " + json.dumps(response, ensure_ascii=False).encode("utf-8") + b"\r\n\r\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            # 클라이언트가 스트림을 중간에 닫음 (헤징에서 진 스트림)
+            pass
+
+    def _send(self, status, payload, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+def start_server(mode="replay", store_dir="recordings", host="127.0.0.1", port=0,
+                 latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=503,
+                 slow_rate=0.0, slow_ms=0, stream_chunks=4, truncate_rate=0.0, loose=True, use_recorded_latency=False, seed=None, verbose=False,
+                 upstream=UPSTREAM_URL):
+    """백그라운드 스레드에서 서버를 시작하고 (server, base_url)을 반환하는 함수"""
+    server = ThreadingHTTPServer((host, port), FakeGeminiHandler)
+    server.daemon_threads = True
+    server.mode = mode
+    server.store = RecordingStore(store_dir)
+    server.upstream = upstream
+    server.latency_ms = latency_ms
+    server.jitter_ms = jitter_ms
+    server.error_rate = error_rate
+    server.error_status = error_status
+    server.slow_rate = slow_rate
+    server.slow_ms = slow_ms
+    server.stream_chunks = stream_chunks
+    server.truncate_rate = truncate_rate
+    server.loose = loose
+    server.use_recorded_latency = use_recorded_latency
+    server.rng = random.Random(seed)
+    server.rng_lock = threading.Lock()
+    server.verbose = verbose
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f"http://{host}:{server.server_address[1]}"
+    print(f"가짜 Gemini 서버 시작 ({mode}): {base_url} (녹화 {len(server.store.by_key)}개)")
+    return server, base_url
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gemini API 녹화/재생 서버")
+    parser.add_argument("mode", choices=["record", "replay"])
+    parser.add_argument("--store", default="recordings", help="녹화 파일 폴더")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency-ms", type=float, default=0, help="재생 시 기본 지연 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="재생 시 지연 편차 (±ms)")
+    parser.add_argument("--recorded-latency", action="store_true", help="녹화 당시의 지연을 재현")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="오류 주입 비율 (0~1)")
+    parser.add_argument("--error-status", type=int, default=503, help="주입할 HTTP 상태 코드")
+    parser.add_argument("--slow-rate", type=float, default=0.0, help="꼬리 지연을 주입할 요청 비율 (0~1)")
+    parser.add_argument("--slow-ms", type=float, default=0, help="꼬리 지연 요청에 추가할 지연 (ms)")
+    parser.add_argument("--stream-chunks", type=int, default=4, help="스트리밍 재생 시 응답을 나눌 조각 수")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="스트리밍 응답을 중간에 자를 비율 (0~1)")
+    parser.add_argument("--strict", action="store_true", help="정확히 일치하는 녹화만 재생")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server, base_url = start_server(
+        mode=args.mode, store_dir=args.store, host=args.host, port=args.port,
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, error_status=args.error_status,
+        slow_rate=args.slow_rate, slow_ms=args.slow_ms,
+        stream_chunks=args.stream_chunks, truncate_rate=args.truncate_rate,
+        loose=not args.strict, use_recorded_latency=args.recorded_latency,
+        seed=args.seed, verbose=args.verbose,
+    )
+    print(f"GEMINI_BASE_URL={base_url} 으로 설정한 뒤 추출 스크립트를 실행하세요. (종료: Ctrl+C)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
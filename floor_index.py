@@ -0,0 +1,296 @@
+"""
+층 구간 인덱스 (벽체별 층 범위 조회와 겹침/누락 검사)
+
+계산서/도면 표는 벽체(WALL)별로 11F~28F, 1F~10F, PITF, B1F 같은 층 범위를 키로 배근을 적습니다.
+층 이름을 정수 순위로 바꾸고 (지하 < PIT < 1F … < RF < PH1 … < PHR), 벽체마다 층 구간 트리를 만들어
+"AW1의 15F 배근은 어느 행인가"를 O(log n)으로 찾고, 같은 벽체의 구간 겹침과 빠진 층을 한 번에 검사합니다.
+
+층 순위:
+    B3F = -3, B2F = -2, B1F = -1, PITF = 0, 1F = 1 … 99F = 99, RF = 1000, PH1F = 1001 …, PHRF = 2000
+"""
+
+import re
+import bisect
+from collections import namedtuple
+
+PIT_RANK = 0
+ROOF_RANK = 1000
+PENTHOUSE_BASE = 1000
+PENTHOUSE_ROOF_RANK = 2000
+
+# 층 하나 (B2F, PITF, 11F, RF, PH1F, PHRF ...). OCR에서 자주 나오는 P1T(=PIT)도 허용
+FLOOR_PATTERN = re.compile(
+    r"^(?:(?P<basement>B\d+)|(?P<pit>P[I1l]T)|(?P<penthouse_roof>PHR|PH\s*ROOF)|(?P<penthouse>PH\d+)"
+    r"|(?P<roof>R|ROOF|지붕)|(?P<floor>\d+))\s*(?P<suffix>F|층)?$",
+    re.IGNORECASE,
+)
+# 층 열 헤더 (층수, 층, FLOOR ...)
+FLOOR_HEADER_PATTERN = re.compile(r"^(?:층수?|층\s*범위|FLOORS?|FL)$", re.IGNORECASE)
+# 범위 구분자 (11F~28F, 11F ∼ 28F, 11F-28F)
+RANGE_SEPARATOR = re.compile(r"\s*[~∼～〜]\s*|\s*-\s*(?=[A-Za-z0-9])")
+# 여러 범위를 나열한 경우 (1F, 3F~5F)
+LIST_SEPARATOR = re.compile(r"\s*[,/]\s*")
+
+# row: 원본 행 (열 목록), source: 출처 (파일/표 이름)
+FloorRow = namedtuple("FloorRow", ["wall", "start", "end", "floors", "row", "source"])
+# kind: 'overlap'(구간 겹침) / 'gap'(빠진 층) / 'unparsed'(층 이름 해석 실패)
+FloorIssue = namedtuple("FloorIssue", ["kind", "wall", "floors", "rows"])
+
+def floor_rank(label, strict=False):
+    """층 이름을 정수 순위로 바꾸는 함수 (해석할 수 없으면 ValueError)
+
+    strict: True면 F/층이 붙지 않은 숫자(300 등)는 층으로 보지 않음 (두께, 철근 간격과 구분할 때)
+    """
+    match = FLOOR_PATTERN.match(label.strip().replace(" ", ""))
+    if not match or (strict and match.group("floor") and not match.group("suffix")):
+        raise ValueError(f"층 이름을 해석할 수 없습니다: {label!r}")
+    if match.group("basement"):
+        return -int(match.group("basement")[1:])
+    if match.group("pit"):
+        return PIT_RANK
+    if match.group("penthouse_roof"):
+        return PENTHOUSE_ROOF_RANK
+    if match.group("penthouse"):
+        return PENTHOUSE_BASE + int(match.group("penthouse")[2:])
+    if match.group("roof"):
+        return ROOF_RANK
+    return int(match.group("floor"))
+
+def floor_label(rank):
+    """층 순위를 표기용 이름으로 바꾸는 함수"""
+    if rank < 0:
+        return f"B{-rank}F"
+    if rank == PIT_RANK:
+        return "PITF"
+    if rank == ROOF_RANK:
+        return "RF"
+    if rank == PENTHOUSE_ROOF_RANK:
+        return "PHRF"
+    if rank > PENTHOUSE_BASE:
+        return f"PH{rank - PENTHOUSE_BASE}F"
+    return f"{rank}F"
+
+def parse_floor_ranges(text, strict=False):
+    """층 범위 문자열을 [(시작 순위, 끝 순위)] 목록으로 바꾸는 함수 (11F~28F → [(11, 28)], 1F,3F → [(1, 1), (3, 3)])
+
+    strict: floor_rank와 같음 (층 열을 찾을 때는 True, 이미 정한 층 열의 값은 1~10 같은 표기도 허용)
+    """
+    ranges = []
+    for part in LIST_SEPARATOR.split(str(text).strip()):
+        if not part:
+            continue
+        ends = [floor_rank(end, strict) for end in RANGE_SEPARATOR.split(part) if end]
+        if not 1 <= len(ends) <= 2:
+            raise ValueError(f"층 범위를 해석할 수 없습니다: {text!r}")
+        ranges.append((min(ends), max(ends)))
+    if not ranges:
+        raise ValueError(f"층 범위가 비어 있습니다: {text!r}")
+    return ranges
+
+def format_floor_range(start, end):
+    return floor_label(start) if start == end else f"{floor_label(start)}~{floor_label(end)}"
+
+def _is_floor_range(value):
+    try:
+        parse_floor_ranges(value, strict=True)
+        return True
+    except ValueError:
+        return False
+
+def detect_columns(headers, rows):
+    """(벽체 열, 층 열) 번호를 찾는 함수 (찾지 못하면 None)
+
+    층 열은 헤더가 층수/층/FLOOR인 열, 없으면 값의 절반 이상이 층 범위(F/층이 붙거나 B1/PIT/R/PH 표기)로
+    해석되는 열 중 가장 많이 해석되는 열입니다. 벽체 열은 헤더가 WALL/벽인 열, 없으면 층 열 바로 왼쪽 열입니다.
+    (표를 좌우로 잘라 처리한 오른쪽 조각처럼 벽체 열이 없는 표는 벽체 열이 None)
+    """
+    headers = [str(header) for header in headers]
+    floor_column = next((i for i, h in enumerate(headers) if FLOOR_HEADER_PATTERN.match(h.strip())), None)
+    if floor_column is None:
+        n_cols = max([len(headers)] + [len(row) for row in rows])
+        counts = [sum(1 for row in rows if col < len(row) and _is_floor_range(row[col])) for col in range(n_cols)]
+        if not counts or max(counts) * 2 < len(rows) or max(counts) == 0:
+            return None, None
+        floor_column = counts.index(max(counts))
+    wall_column = next((i for i, h in enumerate(headers) if ("WALL" in h.upper() or "벽" in h) and i != floor_column), None)
+    if wall_column is None and floor_column > 0:
+        wall_column = floor_column - 1
+    return wall_column, floor_column
+
+class _Node:
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+class IntervalTree:
+    """닫힌 구간 [start, end]의 정적 구간 트리 (점 질의 O(log n + k))"""
+
+    def __init__(self, items):
+        """items: (start, end, 값) 목록"""
+        self.root = self._build(list(items))
+
+    def _build(self, items):
+        if not items:
+            return None
+        points = sorted(point for start, end, _ in items for point in (start, end))
+        node = _Node()
+        node.center = points[len(points) // 2]
+        here = [item for item in items if item[0] <= node.center <= item[1]]
+        node.by_start = sorted(here, key=lambda item: item[0])
+        node.by_end = sorted(here, key=lambda item: -item[1])
+        node.left = self._build([item for item in items if item[1] < node.center])
+        node.right = self._build([item for item in items if item[0] > node.center])
+        return node
+
+    def query(self, point):
+        """point를 포함하는 구간의 값 목록"""
+        found = []
+        node = self.root
+        while node is not None:
+            if point < node.center:
+                # 중심을 포함하는 구간 중 시작이 point 이하인 것
+                for start, _, value in node.by_start:
+                    if start > point:
+                        break
+                    found.append(value)
+                node = node.left
+            else:
+                for _, end, value in node.by_end:
+                    if end < point:
+                        break
+                    found.append(value)
+                node = node.right if point > node.center else None
+        return found
+
+class FloorIndex:
+    """벽체별 층 구간 인덱스"""
+
+    def __init__(self):
+        self.entries = {}        # 벽체 → [FloorRow]
+        self.unparsed = []       # 층 이름을 해석하지 못한 행
+        self._trees = {}
+
+    def add_table(self, table, source=None, wall_column=None, floor_column=None):
+        """표({'headers', 'rows'})의 행을 인덱스에 추가하고 추가한 행 수를 반환하는 함수
+
+        wall_column/floor_column: 벽체/층 열 번호 (없으면 detect_columns로 추정, 벽체 열이 없는 표는 건너뜀)
+        """
+        rows = table.get('rows', [])
+        if wall_column is None or floor_column is None:
+            detected_wall, detected_floor = detect_columns(table.get('headers', []), rows)
+            wall_column = detected_wall if wall_column is None else wall_column
+            floor_column = detected_floor if floor_column is None else floor_column
+        if wall_column is None or floor_column is None:
+            return 0
+
+        added = 0
+        wall = None
+        for row in rows:
+            if max(wall_column, floor_column) >= len(row):
+                continue
+            # 벽체 칸이 비어 있으면 위 행의 벽체를 이어받음 (병합 셀을 펼치지 않은 표)
+            wall = str(row[wall_column]).strip() or wall
+            floors = str(row[floor_column]).strip()
+            if not wall or not floors:
+                continue
+            try:
+                ranges = parse_floor_ranges(floors)
+            except ValueError:
+                self.unparsed.append(FloorRow(wall, None, None, floors, row, source))
+                continue
+            for start, end in ranges:
+                self.entries.setdefault(wall, []).append(FloorRow(wall, start, end, floors, row, source))
+            self._trees.pop(wall, None)
+            added += 1
+        return added
+
+    def _tree(self, wall):
+        tree = self._trees.get(wall)
+        if tree is None:
+            tree = IntervalTree((entry.start, entry.end, entry) for entry in self.entries.get(wall, []))
+            self._trees[wall] = tree
+        return tree
+
+    def lookup(self, wall, floor):
+        """벽체의 해당 층을 덮는 행 목록 (floor: 층 이름 또는 순위). 정상이면 한 개"""
+        rank = floor_rank(floor) if isinstance(floor, str) else floor
+        return self._tree(wall).query(rank)
+
+    def governing(self, wall, floor):
+        """벽체의 해당 층 배근을 정하는 행 (없으면 None, 여러 개면 표에서 먼저 나온 행)"""
+        found = self.lookup(wall, floor)
+        return found[0] if len(found) == 1 else (min(found, key=self.entries[wall].index) if found else None)
+
+    def levels(self):
+        """건물의 층 순위 목록 (가장 낮은 지하층 ~ 가장 높은 지상층, PIT/RF/PH층은 어느 행에든 나온 경우만)"""
+        ranks = {rank for entries in self.entries.values() for entry in entries for rank in (entry.start, entry.end)}
+        if not ranks:
+            return []
+        levels = list(range(min(min(ranks), 0), 0)) if min(ranks) < 0 else []
+        if PIT_RANK in ranks:
+            levels.append(PIT_RANK)
+        top_floor = max([rank for rank in ranks if 0 < rank < ROOF_RANK], default=0)
+        levels += list(range(1, top_floor + 1))
+        if ROOF_RANK in ranks:
+            levels.append(ROOF_RANK)
+        top_penthouse = max([rank for rank in ranks if PENTHOUSE_BASE < rank < PENTHOUSE_ROOF_RANK], default=PENTHOUSE_BASE)
+        levels += list(range(PENTHOUSE_BASE + 1, top_penthouse + 1))
+        if PENTHOUSE_ROOF_RANK in ranks:
+            levels.append(PENTHOUSE_ROOF_RANK)
+        return levels
+
+    def check(self):
+        """모든 벽체의 구간 겹침과 빠진 층을 검사하는 함수 (벽체마다 정렬 후 한 번 훑음)"""
+        issues = [FloorIssue("unparsed", entry.wall, entry.floors, [entry]) for entry in self.unparsed]
+        levels = self.levels()
+        for wall, entries in self.entries.items():
+            ordered = sorted(entries, key=lambda entry: (entry.start, entry.end))
+            # 겹침: 앞 구간들 중 가장 높은 끝층보다 시작층이 낮거나 같으면 겹침
+            reach = ordered[0]
+            for entry in ordered[1:]:
+                if entry.start <= reach.end:
+                    issues.append(FloorIssue("overlap", wall, format_floor_range(entry.start, min(entry.end, reach.end)), [reach, entry]))
+                if entry.end > reach.end:
+                    reach = entry
+
+            # 누락: 벽체의 최저층~최고층 사이에서 어느 구간에도 속하지 않는 건물 층
+            covered_to = bisect.bisect_left(levels, ordered[0].start)
+            for entry in ordered:
+                start = bisect.bisect_left(levels, entry.start)
+                if start > covered_to:
+                    issues.append(FloorIssue("gap", wall, format_floor_range(levels[covered_to], levels[start - 1]), [entry]))
+                covered_to = max(covered_to, bisect.bisect_right(levels, entry.end))
+        return issues
+
+def load_csv(path):
+    """main.py가 저장한 결과 CSV(source_file, 헤더...)를 표 이름별 {'headers', 'rows'}로 읽는 함수"""
+    import csv
+
+    tables = {}
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.reader(f)
+        headers = next(reader, [])[1:]
+        for row in reader:
+            if row and row[1:2] != ['ERROR']:
+                tables.setdefault(row[0], {'headers': headers, 'rows': []})['rows'].append(row[1:])
+    return tables
+
+if __name__ == "__main__":
+    import sys
+    import time
+
+    # 결과 CSV의 벽체별 층 구간을 검사 (예: python floor_index.py table_extraction_results_*.csv)
+    for path in sys.argv[1:]:
+        index = FloorIndex()
+        for source, table in load_csv(path).items():
+            if not index.add_table(table, source):
+                print(f"  {source}: 벽체/층 열을 찾지 못해 건너뜀")
+        issues = index.check()
+        print(f"=== {path}: 벽체 {len(index.entries)}개, 문제 {len(issues)}개 ===")
+        for issue in issues:
+            sources = ", ".join(sorted({str(entry.source) for entry in issue.rows}))
+            print(f"  [{issue.kind}] {issue.wall} {issue.floors} ({sources})")
+
+        pairs = [(wall, level) for wall in index.entries for level in index.levels()]
+        start = time.time()
+        for wall, level in pairs:
+            index.governing(wall, level)
+        print(f"  벽체-층 조회 {len(pairs)}건: {(time.time() - start) * 1000:.1f}ms")
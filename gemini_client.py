@@ -0,0 +1,267 @@
+import os
+import re
+import json
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# 로컬 대체 서버(fake_gemini_server.py) 주소. 설정되어 있으면 모든 호출이 이 서버로 향합니다.
+BASE_URL_ENV = "GEMINI_BASE_URL"
+
+# (api_key, base_url) → 클라이언트. 셀마다/작업마다 새로 만들지 않고 연결을 재사용
+_clients = {}
+_clients_lock = threading.Lock()
+
+def make_client(api_key):
+    """Gemini 클라이언트를 반환하는 함수 (같은 키/주소면 재사용, GEMINI_BASE_URL이 있으면 로컬 서버로 연결)"""
+    base_url = os.getenv(BASE_URL_ENV)
+    key = (api_key, base_url)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            from google import genai
+            from google.genai import types
+
+            if base_url:
+                client = genai.Client(api_key=api_key, http_options=types.HttpOptions(base_url=base_url))
+            else:
+                client = genai.Client(api_key=api_key)
+            _clients[key] = client
+    return client
+
+def parse_json_response(text):
+    """모델 응답 텍스트에서 코드블록 백틱을 제거하고 JSON으로 파싱하는 함수"""
+    raw = text.strip()
+    # 코드블록 백틱이 있을 경우 제거
+    if raw.startswith("```"):
+        raw = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw, flags=re.DOTALL).strip()
+    return json.loads(raw)
+
+class RequestStats:
+    """Gemini 호출 횟수/지연/토큰 사용량을 모으는 스레드 안전 카운터"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.requests = 0
+        self.errors = 0
+        self.hedges = 0
+        self.latencies = []
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+
+    def record(self, elapsed, response=None, error=False):
+        usage = getattr(response, "usage_metadata", None)
+        with self.lock:
+            self.requests += 1
+            self.errors += 1 if error else 0
+            self.latencies.append(elapsed)
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_token_count or 0
+                self.output_tokens += usage.candidates_token_count or 0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "errors": self.errors,
+                "hedges": self.hedges,
+                "total_latency": round(sum(self.latencies), 3),
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+            }
+
+# 프로세스 전체 호출 통계
+STATS = RequestStats()
+
+class HedgePolicy:
+    """지연 요청 헤징(hedging) 정책
+
+    모델별 최근 지연 시간의 percentile(기본 p95)이 지나도 응답이 없으면 같은 요청을 한 번 더 보내고,
+    먼저 성공한 응답을 사용합니다. 추가 요청 수는 원 요청 수의 max_extra_ratio(+ 배치 초반용 여유분 burst) 이하로 제한합니다.
+    정책은 프로세스 전역이 아니라 호출마다 넘기므로(generate_content(..., hedge=정책)) 정책을 쓰는 작업끼리만
+    예산과 지연 기록을 공유합니다. 원 요청/추가 요청은 정책의 스레드 풀(호출하는 쪽 max_workers의 2배)에서 실행하고,
+    풀에 빈 스레드가 없으면 대기열에 쌓지 않고 호출 스레드에서 헤징 없이 바로 요청합니다.
+    """
+
+    def __init__(self, percentile=0.95, min_samples=20, max_extra_ratio=0.1, burst=2, window=200, min_delay=0.5,
+                 max_workers=8):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_extra_ratio = max_extra_ratio
+        self.burst = burst
+        self.min_delay = min_delay
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.window = window
+        self.primary = 0
+        self.extra = 0
+        # 원 요청 + 추가 요청 하나씩이면 되므로 호출하는 쪽 동시 실행 수의 2배
+        self.pool_size = 2 * max_workers
+        self.running = 0
+        self._pool = None
+
+    def observe(self, model, elapsed):
+        """성공한 요청의 지연 시간을 모델별 최근 기록에 추가"""
+        with self.lock:
+            self.latencies.setdefault(model, deque(maxlen=self.window)).append(elapsed)
+
+    def delay(self, model):
+        """헤지 요청을 보내기까지 기다릴 시간 (기록이 부족하면 None = 헤징 안 함)"""
+        with self.lock:
+            self.primary += 1
+            samples = sorted(self.latencies.get(model, ()))
+        if len(samples) < self.min_samples:
+            return None
+        return max(self.min_delay, samples[min(len(samples) - 1, int(len(samples) * self.percentile))])
+
+    def try_acquire(self):
+        """추가 요청 예산과 빈 스레드가 남아 있으면 예산을 하나 사용하고 True"""
+        with self.lock:
+            if self.extra + 1 > self.max_extra_ratio * self.primary + self.burst or self.running >= self.pool_size:
+                return False
+            self.extra += 1
+            return True
+
+    def submit(self, fn, *args):
+        """풀에 빈 스레드가 있으면 fn을 제출하고 future, 없으면 None (대기열에서 기다리며 지연되지 않도록)"""
+        with self.lock:
+            if self.running >= self.pool_size:
+                return None
+            self.running += 1
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="hedge")
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future):
+        with self.lock:
+            self.running -= 1
+
+def _call(client, policy, kwargs):
+    start = time.time()
+    try:
+        response = client.models.generate_content(**kwargs)
+    except Exception:
+        STATS.record(time.time() - start, error=True)
+        raise
+    elapsed = time.time() - start
+    STATS.record(elapsed, response)
+    if policy is not None:
+        policy.observe(kwargs.get("model"), elapsed)
+    return response
+
+def generate_content(client, hedge=None, **kwargs):
+    """client.models.generate_content를 호출하고 호출 통계를 기록하는 함수
+
+    hedge: HedgePolicy. 주어지면 지연 요청 헤징 (None이면 헤징 안 함)
+    """
+    policy = hedge
+    if policy is None:
+        return _call(client, None, kwargs)
+
+    delay = policy.delay(kwargs.get("model"))
+    primary = policy.submit(_call, client, policy, kwargs)
+    if primary is None:
+        return _call(client, policy, kwargs)
+    if delay is None or wait([primary], timeout=delay).done or not policy.try_acquire():
+        return primary.result()
+    duplicate = policy.submit(_call, client, policy, kwargs)
+    if duplicate is None:
+        return primary.result()
+
+    with STATS.lock:
+        STATS.hedges += 1
+    pending = {primary, duplicate}
+    error = None
+    # 먼저 성공한 응답을 사용 (늦게 끝난 요청은 버림)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                return future.result()
+            error = future.exception()
+    raise error
+
+def _open_stream(client, policy, kwargs):
+    """스트림을 열고 첫 조각까지 받는 함수 (반환값: (스트림, 첫 조각 또는 None, 시작 시각))"""
+    start = time.time()
+    try:
+        stream = client.models.generate_content_stream(**kwargs)
+        first = next(stream, None)
+    except Exception:
+        STATS.record(time.time() - start, error=True)
+        raise
+    if policy is not None:
+        policy.observe((kwargs.get("model"), "first_chunk"), time.time() - start)
+    return stream, first, start
+
+def _discard_stream(future):
+    """헤징에서 진 스트림을 닫는 함수 (첫 조각을 받은 뒤에 끝난 요청도 요청 수에는 포함)"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    stream, first, start = future.result()
+    close = getattr(stream, "close", None)
+    if close is not None:
+        close()
+    STATS.record(time.time() - start, first)
+
+def _open_hedged_stream(client, policy, kwargs):
+    """첫 조각이 모델별 p95(첫 조각 지연 기준)까지 오지 않으면 같은 스트림을 하나 더 열고, 먼저 첫 조각이 온 스트림을 사용"""
+    delay = policy.delay((kwargs.get("model"), "first_chunk"))
+    primary = policy.submit(_open_stream, client, policy, kwargs)
+    if primary is None:
+        return _open_stream(client, policy, kwargs)
+    if delay is None or wait([primary], timeout=delay).done or not policy.try_acquire():
+        return primary.result()
+    duplicate = policy.submit(_open_stream, client, policy, kwargs)
+    if duplicate is None:
+        return primary.result()
+
+    with STATS.lock:
+        STATS.hedges += 1
+    pending = {primary, duplicate}
+    opened, error = None, None
+    while pending and opened is None:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is not None:
+                error = future.exception()
+            elif opened is None:
+                opened = future.result()
+            else:
+                _discard_stream(future)
+    # 늦은 스트림은 첫 조각이 오는 대로 닫음
+    for future in pending:
+        future.add_done_callback(_discard_stream)
+    if opened is None:
+        raise error
+    return opened
+
+def generate_content_stream(client, hedge=None, **kwargs):
+    """client.models.generate_content_stream의 응답 조각을 그대로 내보내고, 끝나면 호출 통계를 기록하는 제너레이터
+
+    hedge: HedgePolicy. 주어지면 첫 조각이 늦은 스트림을 헤징 (먼저 첫 조각을 보낸 스트림을 끝까지 읽고 나머지는 닫음)
+    """
+    policy = hedge
+    if policy is None:
+        stream, first, start = _open_stream(client, None, kwargs)
+    else:
+        stream, first, start = _open_hedged_stream(client, policy, kwargs)
+    if first is None:
+        STATS.record(time.time() - start)
+        return
+    last = first
+    try:
+        yield first
+        for chunk in stream:
+            last = chunk
+            yield chunk
+    except Exception:
+        STATS.record(time.time() - start, error=True)
+        raise
+    STATS.record(time.time() - start, last)
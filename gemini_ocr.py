@@ -0,0 +1,392 @@
+import os
+import re
+import json # json 파싱을 위해 추가
+import csv
+import glob
+import sys
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from gemini_client import make_client, generate_content, parse_json_response
+from receipt_rules import apply_rules
+from structured_output import object_schema, json_config
+
+@lru_cache(maxsize=4096)
+def convert_date_format(date_str):
+    """YYYY-MM-DD HH:MM 형태를 `(MM/DD)` 형태로 변환 (같은 날짜 문자열은 한 번만 변환)"""
+    if not date_str or date_str.strip() == "":
+        return ""
+    
+    try:
+        # YYYY-MM-DD HH:MM 형태에서 MM/DD 추출
+        # 정규식으로 YYYY-MM-DD 패턴 찾기
+        match = re.match(r'(\d{4})-(\d{2})-(\d{2})', date_str)
+        if match:
+            year, month, day = match.groups()
+            return f"({month}/{day})"
+        else:
+            return date_str  # 변환 실패시 원본 반환
+    except Exception:
+        return date_str  # 오류시 원본 반환
+
+# 프린트된 영수증 정보 추출 프롬프트 (a, b, c, h, i)
+PRINTED_FIELDS_PROMPT = """
+                영수증에 최상단에는 hand-written 손글씨로 여러 정보가 있습니다.당신은 손글씨를 무시하고, 출력된 영수증에서만 여러 정보를 추출해야합니다.
+                a) 날짜 및 시간 (YYYY-MM-DD HH:MM)
+                b) 업체명
+                c) 금액 (integer)
+                h) 결제카드 정보
+
+                ## a) 날짜 및 시간
+                - 출력 형식은 반드시 YYYY-MM-DD HH:MM 이어야 합니다.  
+                - 초 단위(SS)는 무시하고, 분까지만 표시하세요.  
+                - 시간이 누락되었다면 **추출하지 않고 빈 문자열**("")로 남겨주세요.
+
+                아래 예시를 참고하세요
+
+                ### 예시 맵핑
+                "승인일시 2025-07-22 18:34:23"          → "2025-07-22 18:34"  
+                "거래일시:25-07-22(화) 15:06:04"        → "2025-07-22 15:06"  
+                "2025/07/17 15:26:23"                → "2025-07-17 15:26"  
+                "[일시] 2025/07/14 11:43"             → "2025-07-14 11:43"  
+                "발행일시: 2025-07-16 12:45:47"       → "2025-07-16 12:45"  
+                "[등록] 2025-07-24 13:56"            → "2025-07-24 13:56"  
+                "2025-07-23 22:21:51"                → "2025-07-23 22:21"
+
+                ## b) 업체명
+                - 영수증에 프린트되어있는 업체명(가맹점 등)을 추출해주세요. 최상단 손글씨를 보지 마세요.
+                - 업체명은 [날짜 및 시간] 근처에 있습니다. 예를 들어 2025-07-22 15:06 근처에 있습니다.
+                - '엔에이치엔케이씨피 주식회사', '양상관' 은 업체명이 아닙니다.
+                - 실제 사용처인 식당 등 가게이름으로 추출하세요.
+                ex) 청원, 남원전통추어탕, 탐앤탐스, 오토김밥, GS25 등
+
+                ## c) 금액 (integer)
+                - 금액을 integer로 숫자만 추출해주세요
+                
+                ## h) 결제카드 정보
+                - 영수증의 카드정보를 불러오세요. 카드회사명과 카드소유주 이름, 카드번호를 추출하세요.
+                - ex)신한카드법인 451844*** 등입니다.
+
+                ## i) 결제주소 정보
+                - 영수증의 결제된 장소의 주소 정보를 불러오세요.
+                - ex)서울시 영등포구 버드나루로19길 6 등입니다.
+                
+                다음 JSON 형식으로 정확히 반환해주세요:
+                {"a": "...", "b": "...", "c": "...(integer)", "h": "...", "i": "..."}
+                """
+
+# 프롬프트별 응답 필드 (응답 스키마에 사용)
+PRINTED_KEYS = ("a", "b", "c", "h", "i")
+HINT_KEYS = ("purpose_hint", "worker_hint", "card_hint")
+HANDWRITTEN_KEYS = ("d", "e", "f")
+RECEIPT_MODEL = "gemini-2.5-flash"
+
+# 손글씨 힌트만 읽어오는 프롬프트 (규칙 판단은 로컬에서 수행)
+HANDWRITING_HINT_PROMPT = """
+                영수증 최상단에는 hand-written 손글씨로 여러 정보가 있습니다. 프린트된 내용은 무시하고, 손글씨만 있는 그대로 읽어주세요.
+                분류하거나 추론하지 말고, 씌여진 글자를 그대로 옮겨주세요. 없는 항목은 빈 문자열("")로 반환하세요.
+
+                - purpose_hint: 용도 관련 손글씨 (예: 야근식대, 주간식대, 외근, 출장, 유류대 등)
+                - worker_hint: 사람이름 혹은 영어 이니셜 2글자 (예: 손근영, KY)
+                - card_hint: 카드 관련 손글씨 (예: 법인카드, 법카, 개인카드, 개인카드 KY)
+
+                다음 JSON 형식으로 정확히 반환해주세요:
+                {"purpose_hint": "...", "worker_hint": "...", "card_hint": "..."}
+                """
+
+# 프린트 정보와 손글씨 힌트를 한 번의 요청으로 추출하는 프롬프트
+COMBINED_PROMPT = PRINTED_FIELDS_PROMPT.replace(
+    '{"a": "...", "b": "...", "c": "...(integer)", "h": "...", "i": "..."}',
+    """위 정보와 함께, 최상단 손글씨는 분류하거나 추론하지 말고 씌여진 그대로 아래 항목에 옮겨주세요. 없는 항목은 빈 문자열("")입니다.
+                - purpose_hint: 용도 관련 손글씨 (예: 야근식대, 주간식대, 외근, 출장, 유류대 등)
+                - worker_hint: 사람이름 혹은 영어 이니셜 2글자 (예: 손근영, KY)
+                - card_hint: 카드 관련 손글씨 (예: 법인카드, 법카, 개인카드, 개인카드 KY)
+
+                {"a": "...", "b": "...", "c": "...(integer)", "h": "...", "i": "...", "purpose_hint": "...", "worker_hint": "...", "card_hint": "..."}""",
+)
+
+def build_handwritten_prompt(front_info):
+    """프린트된 정보를 참고해서 d, e, f를 작성하도록 하는 손글씨 프롬프트를 만드는 함수"""
+    return f"""영수증에 최상단에는 hand-written 손글씨로 여러 정보가 있습니다. 당신은 손글씨에서 정보를 추출해야합니다. 
+                프린터로 출력되어있는 영수증의 내용을 참고하여 d), f)를 작성하세요. 영수증의 내용은 {front_info} 입니다.
+                
+                ## 추출해야할 3가지 정보
+                - d) 용도구분 (외근식대, 야근식대, 유류대, 통행료, 주간식대, 교통비, 숙박비, 회식비, 부서간식대 중 1개)
+                - e) 야근자 (사람이름) - d)가 "야근식대"인경우만 작성해주세요. 야근식대가 아니면 없습니다.
+                - f) 비고 (법인카드 혹은 개인카드)
+
+                ## d) 용도구분 
+                - 외근식대, 야근식대, 유류대, 통행료, 주간식대, 교통비, 숙박비, 회식비, 부서간식대 중 1개입니다. 만약 본인이 분류할수 없다고 판단이 된다면(그럴일은 적겠지만) 손글씨 씌여진대로 작성하세요. 
+                - 영수증 최상단에 한글 손글씨로 써있습니다.
+                - 프린트된 영수증의 내용 를 참고하세요.
+                - 외근식대 : "외근" 혹은 "출장" "접대비" 써있습니다.
+                - 주간식대 : "주간식대"라고 써있습니다.
+                - 야근식대 : "야근식대"라고 써있습니다. 결제시간이 17시30분 이후이고 주소가 서울시 영등포구이면 야근식대입니다.
+                - 유류대 : "유류대"라고 써있습니다. 혹은 상호명이 주유소 등입니다.
+                - 통행료 : 하이플러스충전, 한국도로공사 등 써있습니다
+                - 숙박료 : 무인텔, 모텔 등 써있습니다.
+                - 교통비 : 동화운수, 콜택시, 택시 등 써있습니다.
+
+                ## e) 야근자 (사람이름) - 없을 수 있습니다. 없는 경우 빈칸("")으로 반환하세요
+                - b)가 "야근식대"인경우만 작성해주세요. 야근식대가 아니면 없습니다. 없는 경우 빈칸("")으로 반환하세요
+                - 사람이름 혹은 영어 이니셜 2글자로 되어있습니다. 
+                - 사람이름은 그대로 추출해주세요
+                    ```사람이름
+                    이인호
+                    이동혁
+                    양상관
+                    조준호
+                    안형범
+                    손근영
+                    오형석
+                    석영진
+                    이관희
+                    박주연
+                    ```
+                - 영어이니셜 2글자인 경우에는 아래를 참고해서 사람이름 3글자로 출력해주세요.
+                    ```영어 이니셜과 사람이름 매칭
+                    이인호 - IH
+                    이동혁 - DH
+                    양상관 - SK
+                    조준호 - JH
+                    안형범 - HB
+                    손근영 - KY
+                    오형석 - HS
+                    석영진 - YJ
+                    이관희 - GH
+                    박주연 - JY
+                    ```
+
+                ## f) 비고
+                - 영수증 최상단에 법인카드 혹은 개인카드 써있습니다. 
+                - {front_info.get('h', '')}를 참고하세요.
+                - 추가정보로는 법인카드는 신한카드법인 법카라고 써있습니다.
+                - 신한카드법인 카드번호 451844로 시작하니 참고하세요. 
+                - 개인카드는 사람이름과 함께 아웃풋해주세요 ex) 개인카드(손근영) 
+                - 개인카드인 경우 영어 이니셜 2글자일 수 있습니다. 영어 이니셜과 사람이름 매칭을 참고해서 사람이름 3글자로 추출해주세요.
+                
+                다음 JSON 형식으로 정확히 반환해주세요:
+                {{"d": "...", "e": "...", "f": "..."}}
+                """
+
+def receipt_config(keys):
+    """영수증 응답 스키마 설정 (금액 c는 정수)"""
+    return json_config(object_schema(keys, integer_keys=("c",)))
+
+def receipt_image_part(image_path):
+    """실제 포맷을 감지하고 축소/재인코딩한 영수증 이미지 파트"""
+    from google.genai import types
+    from upload_prep import prepare_upload
+
+    image_bytes, mime_type, _ = prepare_upload(image_path, photo=True)
+    return types.Part.from_bytes(data=image_bytes, mime_type=mime_type)
+
+def split_combined(combined):
+    """single 모드 응답(프린트 정보 + 손글씨 힌트)을 (front_info, handwritten_info)로 나누는 함수"""
+    front_info = {key: combined.get(key, '') for key in PRINTED_KEYS}
+    return front_info, apply_rules(front_info, combined)[0]
+
+def extract_front_info_gemini(api_key, image_path: str, mode="sequential") -> dict:
+    """영수증 정보를 추출하는 함수
+
+    mode:
+        sequential - 프린트 정보 호출 후, 그 결과를 넣은 손글씨 호출 (기존 방식, 2회 순차 호출)
+        single     - 프린트 정보와 손글씨 힌트를 한 번의 호출로 추출하고 d, e, f는 로컬에서 결정
+        parallel   - 프린트 정보 호출과 손글씨 힌트 호출을 동시에 보내고 d, e, f는 로컬에서 결정
+        rules      - 프린트 정보 호출 후 규칙 엔진으로 d, e, f를 결정하고, 결정하지 못한 경우만 손글씨 힌트 호출
+    """
+    client = make_client(api_key)
+    # 이미지 파트를 모든 호출에서 재사용 (genai SDK와 OpenCV는 이때 처음 import)
+    image_part = receipt_image_part(image_path)
+
+    def generate(prompt, keys):
+        # 스키마로 응답 형식을 고정해 코드블록/깨진 JSON으로 요청이 버려지지 않도록 함
+        response = generate_content(
+            client,
+            model=RECEIPT_MODEL,
+            contents=[image_part, prompt],
+            config=receipt_config(keys),
+        )
+        return parse_json_response(response.text)
+
+    if mode == "single":
+        return split_combined(generate(COMBINED_PROMPT, PRINTED_KEYS + HINT_KEYS))
+
+    if mode == "parallel":
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            front_future = executor.submit(generate, PRINTED_FIELDS_PROMPT, PRINTED_KEYS)
+            hints_future = executor.submit(generate, HANDWRITING_HINT_PROMPT, HINT_KEYS)
+            front_info = front_future.result()
+            hints = hints_future.result()
+        return front_info, apply_rules(front_info, hints)[0]
+
+    if mode == "rules":
+        front_info = generate(PRINTED_FIELDS_PROMPT, PRINTED_KEYS)
+        handwritten_info, missing = apply_rules(front_info)
+        if missing:
+            hints = generate(HANDWRITING_HINT_PROMPT, HINT_KEYS)
+            handwritten_info, _ = apply_rules(front_info, hints)
+        return front_info, handwritten_info
+
+    if mode != "sequential":
+        raise ValueError(f"알 수 없는 영수증 추출 모드입니다: {mode}")
+
+    front_info = generate(PRINTED_FIELDS_PROMPT, PRINTED_KEYS)   # {'date': '2024-07-25 14:05', 'price': '7,500원'}
+    handwritten_info = generate(build_handwritten_prompt(front_info), HANDWRITTEN_KEYS)
+
+    return front_info, handwritten_info
+
+def process_single_receipt(api_key, image_path, index, mode="sequential"):
+    """단일 영수증 처리 함수 (멀티스레딩용)"""
+    print(f"{index}번째 영수증 처리 시작: {os.path.basename(image_path)}")
+    try:
+        front_info, handwritten_info = extract_front_info_gemini(api_key, image_path, mode)
+        print(f"{index}번째 영수증 완료: {os.path.basename(image_path)}")
+        print("프린트된 정보:", front_info)
+        print("손글씨 정보:", handwritten_info)
+        return receipt_record(image_path, front_info, handwritten_info)
+    except Exception as e:
+        print(f"{index}번째 영수증 오류: {e}")
+        return receipt_record(image_path, error=e)
+
+RECEIPT_CSV_HEADER = ['filename', 'date', 'purpose', 'company', 'price', 'worker', 'note']
+
+def receipt_record(image_path, front_info=None, handwritten_info=None, error=None):
+    """추출 결과를 후처리 전 레코드(파일명 + 원본 필드 a~i, d~f + 오류)로 만드는 함수"""
+    front_info, handwritten_info = front_info or {}, handwritten_info or {}
+    record = {'filename': os.path.basename(image_path), 'error': '' if error is None else str(error)}
+    record.update({key: front_info.get(key, '') for key in PRINTED_KEYS})
+    record.update({key: handwritten_info.get(key, '') for key in HANDWRITTEN_KEYS})
+    return record
+
+def receipt_row(record):
+    """레코드를 검증 없이 CSV 행으로 변환하는 함수 (pandas 후처리를 쓸 수 없을 때)"""
+    return [
+        record['filename'],
+        convert_date_format(str(record.get('a') or '')),    # 날짜시간 변환
+        record.get('d', ''),    # 용도구분
+        record.get('b', ''),    # 업체명
+        record.get('c', ''),    # 금액
+        record.get('e', ''),    # 야근자
+        record.get('f', '')     # 비고
+    ]
+
+def write_receipt_csv(csv_filename, results):
+    """영수증 CSV 행 목록을 저장하는 함수"""
+    with open(csv_filename, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
+        writer.writerow(RECEIPT_CSV_HEADER)
+        writer.writerows(results)
+
+def process_receipts(api_key, max_workers=4, mode="sequential", batch_transport=None, work_queue=None, priority=None):
+    """img 폴더의 영수증들을 동시에 처리하여 정보를 추출하고 CSV로 저장
+
+    batch_transport: batch_mode의 전송 객체. 주어지면 single 모드 프롬프트로 배치 작업을 먼저 처리하고,
+                     배치에서 실패한 영수증만 mode 방식으로 동기 처리 (야간 대량 처리용)
+    work_queue: work_queue.WorkQueue. 주어지면 자체 스레드 풀(max_workers) 대신 표 추출 등 다른 작업과 공유하는 큐에서
+                "receipt" 종류, priority 우선순위(기본 NORMAL)로 처리
+    """
+    
+    # img 폴더가 없으면 생성
+    if not os.path.exists("img"):
+        os.makedirs("img")
+        print("img 폴더를 생성했습니다. 영수증 이미지를 넣어주세요.")
+        return
+    
+    # 이미지 파일들 찾기
+    image_files = []
+    for ext in ['*.jpg', '*.jpeg', '*.png']:
+        image_files.extend(glob.glob(os.path.join("img", ext)))
+    image_files.sort()
+    
+    if not image_files:
+        print("img 폴더에 이미지 파일이 없습니다.")
+        return
+    
+    print(f"총 {len(image_files)}개 영수증을 {max_workers}개 스레드로 동시 처리합니다.")
+    
+    results = [None] * len(image_files)  # 순서 보장을 위한 리스트
+    
+    # 배치 모드: 배치 결과를 먼저 채우고 나머지만 동기 처리
+    batch_receipts = {}
+    if batch_transport is not None:
+        from batch_mode import batch_extract_receipts
+        batch_receipts = batch_extract_receipts(image_files, batch_transport)
+        for i, (front_info, handwritten_info) in batch_receipts.items():
+            results[i] = receipt_record(image_files[i], front_info, handwritten_info)
+        print(f"배치 처리 완료: {len(batch_receipts)}개, 나머지 {len(image_files) - len(batch_receipts)}개는 동기 처리합니다.")
+    
+    # ThreadPoolExecutor(또는 공용 작업 큐)를 사용한 동시 처리
+    if work_queue is not None:
+        executor = work_queue.lane("receipt", **({} if priority is None else {"priority": priority}))
+    else:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    with executor:
+        # 모든 작업 제출
+        future_to_index = {
+            executor.submit(process_single_receipt, api_key, image_path, i+1, mode): i 
+            for i, image_path in enumerate(image_files) if i not in batch_receipts
+        }
+        
+        # 완료된 작업들 수집
+        for future in as_completed(future_to_index):
+            index = future_to_index[future]
+            try:
+                result = future.result()
+                results[index] = result
+            except Exception as e:
+                print(f"작업 실패: {e}")
+                results[index] = receipt_record(image_files[index], error=e)
+    
+    # CSV 저장 - 타임스탬프로 고유한 파일명 생성
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    csv_filename = f'results_{timestamp}.csv'
+    
+    try:
+        save_receipt_results(csv_filename, results)
+        print(f"{csv_filename}에 저장완료!")
+            
+    except Exception as e:
+        print(f"❌ CSV 저장 중 오류 발생: {e}")
+        print("\n📋 결과 데이터:")
+        print(','.join(RECEIPT_CSV_HEADER))
+        for record in results:
+            print(','.join(str(item) for item in receipt_row(record)))
+    return csv_filename
+
+def save_receipt_results(csv_filename, records):
+    """영수증 레코드 전체를 한 번에 정규화/검증(receipt_postprocess)해 CSV로 저장하는 함수
+
+    pandas를 쓸 수 없으면 검증 없이 기존 행 형식으로 저장
+    """
+    try:
+        from receipt_postprocess import postprocess_receipts, check_summary, write_results_csv
+    except ImportError as e:
+        print(f"⚠️ 후처리 모듈을 불러올 수 없어 검증 없이 저장합니다: {e}")
+        write_receipt_csv(csv_filename, [receipt_row(record) for record in records])
+        return
+    results = postprocess_receipts(records)
+    write_results_csv(csv_filename, results)
+    summary = check_summary(results)
+    if summary:
+        print("⚠️ 확인이 필요한 영수증: " + ", ".join(f"{label} {count}건" for label, count in summary.items()))
+
+if __name__ == "__main__":
+    # API 키 설정 (환경변수에서 가져오거나 직접 입력)
+    api_key = os.getenv('GEMINI_API_KEY')
+    
+    if not api_key:
+        api_key = input("Gemini API 키를 입력하세요: ")
+    
+    if api_key:
+        # 추출 모드: sequential(기존), single(1회 호출), parallel(2회 동시 호출), rules(규칙 엔진 우선),
+        #           batch(single 프롬프트를 배치 작업으로 처리, 전송은 GEMINI_BATCH_TRANSPORT=gemini/local)
+        mode = sys.argv[1] if len(sys.argv) > 1 else "sequential"
+        # max_workers 파라미터로 동시 처리할 스레드 수 조절 (기본값: 4)
+        if mode == "batch":
+            from batch_mode import make_transport
+            process_receipts(api_key, max_workers=4, mode="single", batch_transport=make_transport(api_key))
+        else:
+            process_receipts(api_key, max_workers=4, mode=mode)
+    else:
+        print("API 키가 필요합니다.")
\ No newline at end of file
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+정답 표(골든 세트) 기준 추출 결과 채점
+
+table_extraction_results_*.csv 실행 결과를 이미지별 정답 CSV와 비교해 행/셀/병합 셀 단위 정확도를 계산하고,
+실행 때 함께 저장된 호출 통계(*.stats.json: 요청 수, 토큰, 지연)와 나란히 보여줍니다.
+축소 업로드, 배치, 로컬 OCR 같은 성능 변경을 정확도 숫자로 받아들이거나 되돌릴 수 있게 하기 위한 도구입니다.
+
+정답 폴더(golden/)에는 이미지(작업 이름)마다 CSV를 하나씩 둡니다. 첫 행은 헤더, 병합 셀은 행마다 같은 값을 반복합니다.
+    golden/test1.png.csv   (또는 golden/test1.csv, 자동 분할 작업은 golden/calculation_0.png@x,y,w,h.csv)
+실행 결과를 복사해 틀린 칸만 고쳐 만드는 것이 가장 빠릅니다.
+
+비교 방식:
+- 셀 텍스트는 공백을 지우고 대문자로 맞춘 뒤 비교 (--strict면 그대로 비교)
+- 행은 difflib으로 정렬해 빠진 행/추가된 행이 뒤의 모든 행을 틀리게 만들지 않도록 함
+- 양쪽 모두 같은 열의 연속된 같은 값을 병합 셀 하나로 보고(SparseTable.from_dense),
+  정답의 병합 셀(2행 이상)이 결과에서도 같은 행 구간을 덮는 셀 하나로 나왔는지 따로 셈 (병합 분할/과병합 검출)
+
+사용 예:
+    python golden_eval.py                                  # golden/ 기준으로 현재 폴더의 모든 결과 채점
+    python golden_eval.py table_extraction_results_ai_*.csv table_extraction_results_cv_*.csv --diff 20
+    python golden_eval.py run.csv --price-in 1.25 --price-out 10 --json report.json
+"""
+
+import os
+import csv
+import glob
+import json
+import difflib
+import argparse
+from collections import OrderedDict
+
+from sparse_table import SparseTable, read_span_jsonl
+
+GOLDEN_DIR = "golden"
+
+def normalize_cell(text, strict=False):
+    """비교용 셀 텍스트 (기본: 공백 제거 + 대문자, 예: '11F ~ 28F' → '11F~28F', 'd10 @400' → 'D10@400')"""
+    text = '' if text is None else str(text)
+    if strict:
+        return text.strip()
+    return ''.join(text.split()).upper()
+
+def stats_path(run_path):
+    """실행 결과 파일 옆에 저장되는 호출 통계 파일 경로"""
+    return os.path.splitext(run_path)[0] + ".stats.json"
+
+def write_run_stats(run_path, stats):
+    """실행 결과의 호출 통계를 저장하는 함수 (main.process_calculations에서 사용)"""
+    with open(stats_path(run_path), 'w', encoding='utf-8') as f:
+        json.dump(stats, f, ensure_ascii=False, indent=2)
+
+def load_run_stats(run_path):
+    """실행 결과의 호출 통계 (없으면 None)"""
+    path = stats_path(run_path)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def _read_csv(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        return [row for row in csv.reader(f) if any(cell.strip() for cell in row)]
+
+def load_golden(golden_dir=GOLDEN_DIR):
+    """정답 폴더의 CSV를 {작업 이름: (헤더, 행 목록)}으로 읽는 함수 (파일명에서 .csv를 뺀 것이 작업 이름)"""
+    golden = OrderedDict()
+    for path in sorted(glob.glob(os.path.join(golden_dir, "*.csv"))):
+        rows = _read_csv(path)
+        if rows:
+            golden[os.path.basename(path)[:-len(".csv")]] = (rows[0], rows[1:])
+    return golden
+
+def load_run(path):
+    """실행 결과를 {작업 이름: (헤더, 행 목록)}으로 읽는 함수
+
+    .csv: main.write_table_csv 형식 (source_file 열로 작업을 나눔, 헤더는 첫 표의 것을 모든 표가 공유)
+    .jsonl: sparse_table.write_span_jsonl 형식 (표마다 자기 헤더를 가짐)
+    """
+    tables = OrderedDict()
+    if path.endswith(".jsonl"):
+        for source, table in read_span_jsonl(path):
+            tables[source] = (table.headers, table.expand())
+        return tables
+    rows = _read_csv(path)
+    if not rows:
+        return tables
+    headers = rows[0][1:]
+    for row in rows[1:]:
+        tables.setdefault(row[0], (headers, []))[1].append(row[1:])
+    return tables
+
+def match_label(golden_name, run_tables):
+    """정답 파일 이름에 해당하는 결과 작업 이름 (test1 ↔ test1.png 허용, 없으면 None)"""
+    if golden_name in run_tables:
+        return golden_name
+    for label in run_tables:
+        if os.path.splitext(label)[0] == golden_name or label.split("@")[0] == golden_name:
+            return label
+    return None
+
+def _column_map(golden_headers, run_headers, strict=False):
+    """정답 열 → 결과 열 번호. 헤더 이름이 모두 있으면 이름으로, 아니면 위치로 맞춤"""
+    run_index = {normalize_cell(h, strict): i for i, h in enumerate(run_headers)}
+    by_name = [run_index.get(normalize_cell(h, strict)) for h in golden_headers]
+    if all(i is not None for i in by_name):
+        return by_name
+    return list(range(len(golden_headers)))
+
+def _canonical(headers, rows, n_cols, columns=None, strict=False):
+    """비교용 표: 열을 맞추고 텍스트를 정규화한 뒤 연속된 같은 값을 병합 셀로 묶음"""
+    columns = columns if columns is not None else list(range(n_cols))
+    dense = [[normalize_cell(row[c], strict) if c is not None and c < len(row) else '' for c in columns] for row in rows]
+    return SparseTable.from_dense(headers, dense)
+
+def align_rows(golden_rows, run_rows):
+    """정답 행과 결과 행을 정렬하는 함수
+
+    반환값: [(정답 행 번호 또는 None, 결과 행 번호 또는 None)] (None은 빠진 행/추가된 행)
+    """
+    matcher = difflib.SequenceMatcher(None, [tuple(r) for r in golden_rows], [tuple(r) for r in run_rows], autojunk=False)
+    pairs = []
+    for tag, g0, g1, r0, r1 in matcher.get_opcodes():
+        if tag == 'equal':
+            pairs.extend(zip(range(g0, g1), range(r0, r1)))
+            continue
+        # 바뀐 구간은 앞에서부터 짝짓고 남는 행은 빠진 행/추가된 행으로 처리
+        common = min(g1 - g0, r1 - r0) if tag == 'replace' else 0
+        pairs.extend(zip(range(g0, g0 + common), range(r0, r0 + common)))
+        pairs.extend((g, None) for g in range(g0 + common, g1))
+        pairs.extend((None, r) for r in range(r0 + common, r1))
+    return pairs
+
+def diff_table(golden_headers, golden_rows, run_headers=None, run_rows=None, strict=False):
+    """표 하나를 채점하는 함수
+
+    반환값: 행/셀/병합 셀 개수와 차이 목록 (run_rows가 None이면 결과에 표가 없는 것으로 채점)
+    """
+    n_cols = len(golden_headers)
+    golden = _canonical(golden_headers, golden_rows, n_cols, strict=strict)
+    if run_rows is None:
+        run = SparseTable(golden_headers, 0, n_cols)
+    else:
+        run = _canonical(golden_headers, run_rows, n_cols, _column_map(golden_headers, run_headers, strict), strict)
+    golden_dense, run_dense = golden.expand(), run.expand()
+    pairs = align_rows(golden_dense, run_dense)
+
+    score = {"rows": len(golden_dense), "run_rows": len(run_dense), "rows_exact": 0, "rows_missing": 0, "rows_extra": 0,
+             "cells": 0, "cells_correct": 0, "merged": 0, "merged_correct": 0, "diffs": []}
+    for g, r in pairs:
+        expected = golden_dense[g] if g is not None else [''] * n_cols
+        actual = run_dense[r] if r is not None else [''] * n_cols
+        score["rows_exact"] += g is not None and r is not None and expected == actual
+        score["rows_missing"] += r is None
+        score["rows_extra"] += g is None
+        for col in range(n_cols):
+            if not expected[col] and not actual[col]:
+                continue
+            score["cells"] += 1
+            if expected[col] == actual[col]:
+                score["cells_correct"] += 1
+            else:
+                score["diffs"].append({"golden_row": g, "run_row": r, "column": golden_headers[col],
+                                       "expected": expected[col], "actual": actual[col]})
+
+    # 병합 셀: 정답 셀이 덮는 행이 모두 결과 행과 짝지어졌고, 결과에서도 정확히 그 구간을 덮는 같은 텍스트의 셀 하나인지
+    run_row_of = {g: r for g, r in pairs if g is not None}
+    for cell in golden.cells():
+        if cell.rowspan < 2:
+            continue
+        score["merged"] += 1
+        mapped = [run_row_of.get(row) for row in range(cell.row, cell.row + cell.rowspan)]
+        if None in mapped or mapped != list(range(mapped[0], mapped[0] + cell.rowspan)):
+            continue
+        found = run.cells_in_rows(mapped[0], mapped[0] + 1)
+        if any(c.col == cell.col and c.row == mapped[0] and c.rowspan == cell.rowspan and c.text == cell.text for c in found):
+            score["merged_correct"] += 1
+    return score
+
+def _ratio(correct, total):
+    return correct / total if total else 1.0
+
+def score_run(golden, run_path, strict=False):
+    """실행 결과 파일 하나를 정답 세트 전체로 채점하는 함수 (정답에 없는 결과 표는 무시)"""
+    run_tables = load_run(run_path)
+    tables = OrderedDict()
+    for name, (headers, rows) in golden.items():
+        label = match_label(name, run_tables)
+        if label is None:
+            tables[name] = diff_table(headers, rows, strict=strict)
+            # 표 전체가 빠진 경우 셀 차이 목록은 의미가 없으므로 생략
+            tables[name].update(missing_table=True, diffs=[])
+        else:
+            run_headers, run_rows = run_tables[label]
+            tables[name] = diff_table(headers, rows, run_headers, run_rows, strict)
+
+    keys = ("rows", "run_rows", "rows_exact", "rows_missing", "rows_extra", "cells", "cells_correct", "merged", "merged_correct")
+    total = {key: sum(score[key] for score in tables.values()) for key in keys}
+    for score in list(tables.values()) + [total]:
+        score["row_accuracy"] = _ratio(score["rows_exact"], max(score["rows"], score["run_rows"]))
+        score["cell_accuracy"] = _ratio(score["cells_correct"], score["cells"])
+        score["merged_accuracy"] = _ratio(score["merged_correct"], score["merged"])
+    return {"run": run_path, "tables": tables, "total": total, "stats": load_run_stats(run_path)}
+
+def estimate_cost(stats, price_in=None, price_out=None):
+    """토큰 사용량으로 비용 추정 (price_in/price_out: 100만 토큰당 가격, 없으면 None)"""
+    if stats is None or price_in is None or price_out is None:
+        return None
+    return (stats.get("prompt_tokens", 0) * price_in + stats.get("output_tokens", 0) * price_out) / 1_000_000
+
+def print_report(reports, price_in=None, price_out=None, max_diffs=0):
+    """채점 결과를 표로 출력하는 함수 (실행 결과마다 이미지별 행 + 합계 행)"""
+    for report in reports:
+        print(f"\n=== {os.path.basename(report['run'])} ===")
+        print(f"{'작업':<28} {'행':>9} {'행 정확도':>9} {'셀 정확도':>9} {'병합 셀':>9} {'빠진 행':>7} {'추가 행':>7}")
+        for name, score in list(report["tables"].items()) + [("합계", report["total"])]:
+            note = " (결과 없음)" if score.get("missing_table") else ""
+            print(f"{name[:28]:<28} {score['run_rows']:>4}/{score['rows']:<4} {score['row_accuracy']:>9.1%} "
+                  f"{score['cell_accuracy']:>9.1%} {score['merged_accuracy']:>9.1%} {score['rows_missing']:>7} {score['rows_extra']:>7}{note}")
+        if max_diffs:
+            shown = 0
+            for name, score in report["tables"].items():
+                for diff in score["diffs"][:max_diffs - shown]:
+                    # 행 번호는 헤더 다음 데이터 행부터 1로 표시
+                    where = f"정답 {diff['golden_row'] + 1}행" if diff['golden_row'] is not None else f"결과 {diff['run_row'] + 1}행(추가)"
+                    print(f"  {name} {where} [{diff['column']}]: '{diff['expected']}' → '{diff['actual']}'")
+                    shown += 1
+                if shown >= max_diffs:
+                    break
+
+    # 실행 결과 간 비교 (정확도 vs 호출 비용/지연)
+    print(f"\n{'실행 결과':<48} {'셀 정확도':>9} {'병합 셀':>8} {'요청':>6} {'입력 토큰':>10} {'출력 토큰':>10} {'API 지연(s)':>11} {'소요(s)':>8} {'비용':>8}")
+    for report in reports:
+        stats = report["stats"] or {}
+        cost = estimate_cost(report["stats"], price_in, price_out)
+        def column(key, fmt):
+            return format(stats[key], fmt) if key in stats else "-"
+        print(f"{os.path.basename(report['run'])[:48]:<48} {report['total']['cell_accuracy']:>9.1%} {report['total']['merged_accuracy']:>8.1%} "
+              f"{column('requests', '>6'):>6} {column('prompt_tokens', ','):>10} {column('output_tokens', ','):>10} "
+              f"{column('total_latency', '.1f'):>11} {column('wall_time', '.1f'):>8} {'-' if cost is None else f'{cost:.4f}':>8}")
+
+def default_runs():
+    """현재 폴더의 모든 실행 결과 (CSV, 오래된 순)"""
+    return sorted(glob.glob("table_extraction_results*.csv"), key=os.path.getmtime)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="정답 표 기준 추출 결과 채점")
+    parser.add_argument("runs", nargs="*", help="채점할 결과 파일 (.csv 또는 스팬 .jsonl, 기본: 현재 폴더의 모든 결과 CSV)")
+    parser.add_argument("--golden", default=GOLDEN_DIR, help="정답 CSV 폴더")
+    parser.add_argument("--strict", action="store_true", help="공백/대소문자 차이도 틀린 것으로 처리")
+    parser.add_argument("--diff", type=int, default=0, metavar="N", help="실행 결과마다 틀린 셀 N개까지 출력")
+    parser.add_argument("--price-in", type=float, help="입력 토큰 100만 개당 가격 (비용 추정용)")
+    parser.add_argument("--price-out", type=float, help="출력 토큰 100만 개당 가격 (비용 추정용)")
+    parser.add_argument("--json", help="채점 결과를 JSON으로 저장할 경로")
+    args = parser.parse_args()
+
+    golden = load_golden(args.golden)
+    if not golden:
+        parser.error(f"{args.golden} 폴더에 정답 CSV가 없습니다.")
+    runs = args.runs or default_runs()
+    if not runs:
+        parser.error("채점할 결과 파일이 없습니다.")
+
+    reports = [score_run(golden, path, args.strict) for path in runs]
+    print_report(reports, args.price_in, args.price_out, args.diff)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+        print(f"{args.json}에 저장완료!")
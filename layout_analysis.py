@@ -0,0 +1,121 @@
+"""
+페이지 레이아웃 분석: 전체 페이지에서 표 영역을 자동으로 찾아 작업 단위로 분리
+
+수작업으로 잘라둔 left/center/right 이미지 대신, 페이지를 한 번 축소한 뒤
+수평선/수직선 마스크의 연결 요소로 표 영역을 찾아 페이지 좌표로 돌려줍니다.
+"""
+
+import os
+
+import cv2
+import numpy as np
+
+from table_cv_extraction import detect_horizontal_lines, detect_vertical_lines
+
+# 분석용 축소 이미지의 가로 길이 (px)
+ANALYSIS_WIDTH = 1200
+# 표로 인정하기 위한 최소 선 개수
+MIN_HORIZONTAL_LINES = 3
+MIN_VERTICAL_LINES = 2
+# 페이지 대비 최소 면적 비율
+MIN_AREA_RATIO = 0.005
+
+def count_lines(mask, axis):
+    """마스크 영역 안의 선 개수를 투영(projection)으로 세는 함수 (axis=1: 수평선, 0: 수직선)"""
+    if mask.size == 0:
+        return 0
+    profile = (mask > 0).sum(axis=axis)
+    length = mask.shape[axis]
+    # 영역 길이의 절반 이상 이어진 줄만 선으로 취급
+    on = profile >= 0.5 * length
+    # 연속된 줄은 하나의 선으로 계산
+    return int(np.count_nonzero(on[1:] & ~on[:-1]) + (1 if on.size and on[0] else 0))
+
+def find_table_regions(img, analysis_width=ANALYSIS_WIDTH, padding=4):
+    """페이지 이미지에서 표 영역들의 (x, y, w, h) 목록을 페이지 좌표로 반환하는 함수"""
+    height, width = img.shape[:2]
+    scale = min(1.0, analysis_width / width)
+    small = cv2.resize(img, (int(width * scale), int(height * scale)), interpolation=cv2.INTER_AREA) if scale < 1.0 else img
+
+    # 축소 이미지에서 한 번만 선 검출
+    horiz_lines, bin_img, _ = detect_horizontal_lines(small)
+    vert_lines = detect_vertical_lines(bin_img)
+    # 팽창(dilate)은 표와 도면 테두리 사이의 좁은 틈을 메워버리므로 사용하지 않음
+    table_mask = cv2.bitwise_or(horiz_lines, vert_lines)
+
+    num_labels, _, stats, _ = cv2.connectedComponentsWithStats(table_mask, connectivity=8)
+    small_area = table_mask.shape[0] * table_mask.shape[1]
+
+    candidates = []
+    for label in range(1, num_labels):
+        x, y, w, h, _ = stats[label]
+        if w * h < MIN_AREA_RATIO * small_area:
+            continue
+        if count_lines(horiz_lines[y:y+h, x:x+w], axis=1) < MIN_HORIZONTAL_LINES:
+            continue
+        if count_lines(vert_lines[y:y+h, x:x+w], axis=0) < MIN_VERTICAL_LINES:
+            continue
+        candidates.append((x, y, w, h))
+
+    def contains(outer, inner):
+        ox, oy, ow, oh = outer
+        ix, iy, iw, ih = inner
+        return outer != inner and ox <= ix and oy <= iy and ix + iw <= ox + ow and iy + ih <= oy + oh
+
+    def area(box):
+        return box[2] * box[3]
+
+    # 큰 표를 감싸는 영역은 테두리로 보고 제외, 남은 표 안쪽에 걸린 작은 조각도 제외
+    tables = [box for box in candidates
+              if not any(contains(box, other) and area(other) >= 0.1 * area(box) for other in candidates)]
+    tables = [box for box in tables if not any(contains(other, box) for other in tables)]
+
+    regions = []
+    for box in tables:
+        x, y, w, h = box
+        x0 = max(0, int(x / scale) - padding)
+        y0 = max(0, int(y / scale) - padding)
+        x1 = min(width, int((x + w) / scale) + padding)
+        y1 = min(height, int((y + h) / scale) + padding)
+        regions.append((x0, y0, x1 - x0, y1 - y0))
+
+    # 읽는 순서: 왼쪽 열부터, 같은 열에서는 위에서 아래로
+    column_width = max(1, width // 20)
+    regions.sort(key=lambda r: (r[0] // column_width, r[1]))
+    return regions
+
+def crop_region(img, bbox):
+    """페이지 이미지에서 영역을 잘라낸 뷰를 반환하는 함수"""
+    x, y, w, h = bbox
+    return img[y:y+h, x:x+w]
+
+def region_label(image_path, bbox):
+    """결과 CSV에 기록할 작업 이름 (파일명@x,y,w,h)"""
+    name = os.path.basename(image_path)
+    if bbox is None:
+        return name
+    x, y, w, h = bbox
+    return f"{name}@{x},{y},{w},{h}"
+
+def split_pages(image_paths, analysis_width=ANALYSIS_WIDTH):
+    """페이지 이미지들을 표 영역 단위 작업 목록 [(image_path, bbox)]으로 나누는 함수"""
+    jobs = []
+    for image_path in image_paths:
+        img = cv2.imread(image_path)
+        if img is None:
+            print(f"이미지를 로드할 수 없습니다: {image_path}")
+            continue
+        regions = find_table_regions(img, analysis_width)
+        print(f"{os.path.basename(image_path)}: 표 영역 {len(regions)}개 검출")
+        for bbox in regions:
+            jobs.append((image_path, bbox))
+    return jobs
+
+if __name__ == "__main__":
+    import sys
+
+    folder = sys.argv[1] if len(sys.argv) > 1 else "img-drawing"
+    for filename in sorted(os.listdir(folder)):
+        if filename.lower().endswith((".png", ".jpg", ".jpeg")):
+            for image_path, bbox in split_pages([os.path.join(folder, filename)]):
+                print(f"  {region_label(image_path, bbox)}")
@@ -0,0 +1,129 @@
+"""
+헤더 행 레이아웃 템플릿 저장소
+
+같은 프로젝트의 계산서는 열 구성(WALL, 층수, 두께, 수직철근, 횡방향 띠철근 상세, 수평철근)이 같으므로,
+헤더 띠(band)의 열 구분선 위치와 지각 해시(perceptual hash)로 지문을 만들어 저장해두고
+두 페이지 이상에서 같은 헤더 텍스트로 확인된 뒤 일치하는 페이지에서는 헤더 텍스트를 재사용합니다. (헤더 셀 OCR 생략)
+열은 템플릿과 관계없이 항상 같은 방식(table_cv_extraction.table_columns)으로 정하므로 일치 여부가 결과를 바꾸지 않습니다.
+"""
+
+import os
+import json
+import threading
+
+import cv2
+import numpy as np
+
+# 저장할 때 쓰는 파일 이름 (출력 폴더 등 프로젝트별 폴더 안에 둠)
+TEMPLATE_FILENAME = "layout_templates.json"
+# 템플릿을 재사용하기 전에 같은 헤더 텍스트가 나와야 하는 페이지 수
+MIN_CONFIRMATIONS = 2
+# 열 구분선 위치 허용 오차 (표 너비 대비 비율)
+SEPARATOR_TOLERANCE = 0.01
+# 해시 해밍 거리 허용값 (64비트 중)
+MAX_HASH_DISTANCE = 10
+
+def find_header_cells(cell_boxes, row_height, min_columns=3):
+    """표의 헤더 행(위에서부터 처음으로 min_columns개 이상의 셀이 나란히 있는 행)의 셀들을 x 순서로 반환하는 함수"""
+    single_row = sorted((box for box in cell_boxes if box[3] <= 1.5 * row_height), key=lambda box: box[1])
+    index = 0
+    while index < len(single_row):
+        top = single_row[index][1]
+        row = [box for box in single_row[index:] if box[1] <= top + 0.5 * row_height]
+        if len(row) >= min_columns:
+            return sorted(row, key=lambda box: box[0])
+        index += len(row)
+    return []
+
+def header_hash(img, header_boxes):
+    """헤더 띠 영역의 dHash(64비트)를 계산하는 함수"""
+    x0 = min(box[0] for box in header_boxes)
+    y0 = min(box[1] for box in header_boxes)
+    x1 = max(box[0] + box[2] for box in header_boxes)
+    y1 = max(box[1] + box[3] for box in header_boxes)
+    band = img[y0:y1, x0:x1]
+    if len(band.shape) == 3:
+        band = cv2.cvtColor(band, cv2.COLOR_BGR2GRAY)
+    # 헤더 띠는 가로로 길기 때문에 17x4로 줄여서 가로 방향 차분 64비트 생성
+    small = cv2.resize(band, (17, 4), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+def header_fingerprint(img, header_boxes):
+    """헤더 셀들로부터 (정규화된 열 구분선 위치, 해시) 지문을 만드는 함수"""
+    if not header_boxes:
+        return None
+    left = min(box[0] for box in header_boxes)
+    right = max(box[0] + box[2] for box in header_boxes)
+    width = max(1, right - left)
+    separators = [round((box[0] - left) / width, 3) for box in header_boxes]
+    return {"separators": separators, "hash": header_hash(img, header_boxes)}
+
+class LayoutTemplateStore:
+    """헤더 지문 → 헤더 텍스트 저장소 (스레드 안전)
+
+    헤더 OCR이 한 번 잘못 읽히면 이후 모든 페이지가 틀린 헤더를 쓰게 되므로, 같은 지문에서 같은 헤더 텍스트가
+    min_confirmations 페이지 이상 나온 템플릿만 재사용합니다. 파일 저장은 path를 지정했을 때만 (프로젝트/출력 폴더별 경로)
+    """
+
+    def __init__(self, path=None, min_confirmations=MIN_CONFIRMATIONS):
+        self.path = path
+        self.min_confirmations = min_confirmations
+        self.lock = threading.Lock()
+        self.templates = []
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.templates = json.load(f)
+
+    def _find(self, fingerprint):
+        """지문과 일치하는 템플릿 (확인 전 후보 포함, self.lock을 잡은 상태에서 호출)"""
+        separators = fingerprint["separators"]
+        for template in self.templates:
+            if len(template["separators"]) != len(separators):
+                continue
+            if any(abs(a - b) > SEPARATOR_TOLERANCE for a, b in zip(template["separators"], separators)):
+                continue
+            if bin(template["hash"] ^ fingerprint["hash"]).count("1") > MAX_HASH_DISTANCE:
+                continue
+            return template
+        return None
+
+    def match(self, fingerprint):
+        """지문과 일치하는 확인된 템플릿을 찾는 함수 (없거나 아직 확인되지 않았으면 None)"""
+        if fingerprint is None:
+            return None
+        with self.lock:
+            template = self._find(fingerprint)
+            if template is None or template.get("confirmations", 0) < self.min_confirmations:
+                return None
+            template["hits"] = template.get("hits", 0) + 1
+            return template
+
+    def add(self, fingerprint, headers):
+        """헤더 OCR 결과를 등록하는 함수 (같은 지문의 템플릿이 있으면 확인 횟수를 올리고 그 템플릿을 반환)
+
+        같은 지문인데 헤더 텍스트가 다르면 OCR 결과를 믿을 수 없으므로 새 텍스트로 확인을 처음부터 다시 셉니다.
+        """
+        if fingerprint is None or len(headers) != len(fingerprint["separators"]) or not all(headers):
+            return None
+        headers = list(headers)
+        with self.lock:
+            # 동시에 처리한 페이지들이 모두 미스였어도 템플릿은 하나만 생기도록 잠금 안에서 다시 조회
+            template = self._find(fingerprint)
+            if template is None:
+                template = dict(fingerprint, headers=headers, hits=0, confirmations=1)
+                self.templates.append(template)
+                print(f"새 헤더 템플릿 후보: {headers}")
+            elif template["headers"] == headers:
+                template["confirmations"] = template.get("confirmations", 0) + 1
+            else:
+                print(f"헤더 템플릿 OCR 불일치: {template['headers']} ≠ {headers}")
+                template.update(headers=headers, confirmations=1)
+            self._save()
+        return template
+
+    def _save(self):
+        if not self.path:
+            return
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(self.templates, f, ensure_ascii=False, indent=2)
@@ -1,35 +1,64 @@
 import os
 import glob
 import csv
-import importlib.util
+import shutil
+import time
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
-from table_cv_extraction import extract_table_with_cv
 
-# gemini-ocr.py에서 필요한 함수들 import (하이픈 때문에 동적 import 사용)
-spec = importlib.util.spec_from_file_location("gemini_ocr", "gemini-ocr.py")
-gemini_ocr = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(gemini_ocr)
+# OpenCV/pandas/genai SDK는 해당 처리 경로에서만 import (CLI 시작과 워커 프로세스 기동 시간 단축)
+# 예전처럼 main에서 바로 가져다 쓰던 함수들은 처음 접근할 때 해당 모듈에서 가져옴
+_LAZY_ATTRIBUTES = {
+    "extract_front_info_gemini": "gemini_ocr",
+    "convert_date_format": "gemini_ocr",
+    "extract_table_with_cv": "table_cv_extraction",
+    "extract_table_rowstrips": "row_strip_extraction",
+}
 
-# 필요한 함수들을 변수에 할당
-extract_front_info_gemini = gemini_ocr.extract_front_info_gemini
-convert_date_format = gemini_ocr.convert_date_format
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        import importlib
+        return getattr(importlib.import_module(_LAZY_ATTRIBUTES[name]), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-def extract_table_data_gemini(api_key, image_path: str):
-    """표 형식 이미지에서 데이터를 추출하는 함수"""
-    from google import genai
+TABLE_MODEL = "gemini-2.5-pro"
+
+def extract_table_data_gemini(api_key, image_path: str, upload_options=None, bbox=None, on_row=None, hedge=None):
+    """표 형식 이미지에서 데이터를 추출하는 함수
+
+    응답은 스키마로 형식을 고정하고 스트리밍으로 받으며, 잘리면 나머지 행만 이어서 요청합니다.
+    upload_options: upload_prep.prepare_upload에 넘길 옵션 (기본: 변환 없이 원본 업로드.
+                    {"row_height": "auto"}를 주면 행 높이를 추정해 축소하지만, bench_upload_prep --ocr로
+                    정확도 손실이 없음을 확인하기 전까지는 기본으로 쓰지 않음)
+    bbox: 페이지 안의 표 영역 (x, y, w, h). 주어지면 해당 영역만 잘라서 업로드
+    on_row: 행이 완성될 때마다 호출되는 콜백 (응답이 끝나기 전에 행 단위로 처리할 때 사용)
+    hedge: gemini_client.HedgePolicy. 주어지면 첫 조각이 늦은 요청을 헤징
+    """
+    from gemini_client import make_client
+    from structured_output import extract_table_streaming
+    
+    return extract_table_streaming(
+        make_client(api_key),
+        model=TABLE_MODEL,
+        on_row=on_row,
+        hedge=hedge,
+        contents=table_request_contents(image_path, upload_options, bbox),
+    )
+
+def table_request_contents(image_path, upload_options=None, bbox=None):
+    """표 전체 추출 요청 내용 (이미지 파트와 프롬프트)"""
     from google.genai import types
-    import json
-    import re
+    from upload_prep import prepare_upload
     
-    client = genai.Client(api_key=api_key)
-    with open(image_path, "rb") as f:
-        image_bytes = f.read()
+    image = image_path
+    if bbox is not None:
+        import cv2
+        from layout_analysis import crop_region
+        image = crop_region(cv2.imread(image_path), bbox)
+    image_bytes, mime_type, _ = prepare_upload(image, **(upload_options or {"convert": False}))
 
-    response = client.models.generate_content(
-        model="gemini-2.5-pro",
-        contents=[
-            types.Part.from_bytes(data=image_bytes, mime_type="image/png"),
+    return [
+            types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
             (
                 """
                 이 이미지에는 표 형식의 데이터가 포함되어 있습니다. 당신의 임무는 이 표를 정확하게 인식하고 구조화된 데이터로 변환하는 것입니다.
@@ -63,128 +92,278 @@ def extract_table_data_gemini(api_key, image_path: str):
                 }
                 """
             ),
-        ],
-    )
-    
-    raw = response.text.strip()
-    # 코드블록 백틱이 있을 경우 제거
-    if raw.startswith("```"):
-        raw = re.sub(r"^```(?:json)?\s*|\s*```$", "", raw, flags=re.DOTALL).strip()
-    
-    return json.loads(raw)
+        ]
+
+def process_single_calculation(api_key, image_path, index, use_cv_method=False, bbox=None, template_store=None,
+                               rows_per_strip=None, memory_budget_mb=None, dedup_index=None, span_tables=None, drawing=False,
+                               hedge=None):
+    """단일 계산서 처리 함수 (멀티스레딩용)
+
+    bbox: 페이지 안의 표 영역 (x, y, w, h). None이면 이미지 전체를 하나의 표로 처리
+    template_store: 컴퓨터 비전 방식에서 헤더 레이아웃 템플릿을 재사용할 저장소
+    rows_per_strip: 지정하면 N개 행씩 띠로 잘라 OCR하는 행 띠 방식 사용
+    memory_budget_mb: 컴퓨터 비전 방식에서 띠 단위 선 검출에 쓸 메모리 예산 (대형 도면용)
+    dedup_index: 컴퓨터 비전 방식에서 페이지 간에 공유하는 셀 중복 제거 인덱스
+    span_tables: 주어지면 병합 스팬을 유지한 표(SparseTable)를 {작업 이름: 표}로 기록 (스팬 내보내기용)
+    drawing: 도면 배근표로 처리 (헤더 행을 찾아 계산서와 같은 열 이름/표기로 정규화)
+    hedge: gemini_client.HedgePolicy. 이 작업의 Gemini 요청만 헤징 (같은 프로세스의 다른 작업에는 영향 없음)
+    """
+    from layout_analysis import region_label
+    from sparse_table import SparseTable
 
-def process_single_calculation(api_key, image_path, index, use_cv_method=False):
-    """단일 계산서 처리 함수 (멀티스레딩용)"""
-    method_name = "컴퓨터 비전" if use_cv_method else "Gemini AI"
-    print(f"{index}번째 계산서 처리 시작 ({method_name}): {os.path.basename(image_path)}")
+    method_name = method_label(use_cv_method, rows_per_strip)
+    label = region_label(image_path, bbox)
+    document_name = "도면" if drawing else "계산서"
+    print(f"{index}번째 {document_name} 처리 시작 ({method_name}): {label}")
     try:
-        if use_cv_method:
-            table_data = extract_table_with_cv(api_key, image_path)
+        if rows_per_strip:
+            from row_strip_extraction import extract_table_rowstrips
+            table_data = extract_table_rowstrips(api_key, image_path, rows_per_strip=rows_per_strip, bbox=bbox, hedge=hedge)
+        elif use_cv_method:
+            from table_cv_extraction import extract_table_with_cv
+            table_data = extract_table_with_cv(api_key, image_path, bbox=bbox, template_store=template_store,
+                                               memory_budget_mb=memory_budget_mb, dedup_index=dedup_index, hedge=hedge)
         else:
-            table_data = extract_table_data_gemini(api_key, image_path)
+            table_data = extract_table_data_gemini(api_key, image_path, bbox=bbox, hedge=hedge)
         
-        print(f"{index}번째 계산서 완료 ({method_name}): {os.path.basename(image_path)}")
+        print(f"{index}번째 {document_name} 완료 ({method_name}): {label}")
         print("추출된 표 데이터:", table_data)
+        if span_tables is not None and isinstance(table_data, SparseTable):
+            span_tables[label] = table_data
         
-        # 표 데이터를 CSV 형태로 변환
-        result = []
-        headers = table_data.get('headers', [])
-        rows = table_data.get('rows', [])
+        return result_rows(label, table_data, drawing)
         
-        # 헤더를 첫 번째 행으로 추가 (파일명 포함)
-        if headers:
-            result.append([os.path.basename(image_path)] + headers)
+    except Exception as e:
+        print(f"{index}번째 {document_name} 오류: {e}")
+        return [[label, 'ERROR', str(e)]]
+
+def table_to_rows(label, table_data):
+    """표 데이터({'headers', 'rows'})를 CSV 행 목록으로 변환하는 함수"""
+    result = []
+    headers = table_data.get('headers', [])
+    rows = table_data.get('rows', [])
+    
+    # 헤더를 첫 번째 행으로 추가 (파일명 포함)
+    if headers:
+        result.append([label] + headers)
+    
+    # 각 데이터 행을 추가 (파일명은 첫 번째 행에만)
+    for row in rows:
+        result.append([''] + row)
+    
+    return result
+
+def result_rows(label, table_data, drawing=False):
+    """표 데이터를 CSV 행 목록으로 변환하는 함수 (도면 배근표는 정규화 후 변환, 헤더를 찾지 못한 표는 오류 행)"""
+    if not drawing:
+        return table_to_rows(label, table_data)
+    from drawing_extraction import normalize_schedule
+    try:
+        return table_to_rows(label, normalize_schedule(table_data))
+    except ValueError as e:
+        print(f"{label} 배근표 정규화 오류: {e}")
+        return [[label, 'ERROR', str(e)]]
+
+def write_table_csv(csv_filename, results, labels):
+    """표별 CSV 행 목록(table_to_rows 결과)을 하나의 CSV로 저장하는 함수
+
+    첫 번째 표의 헤더 행을 CSV 헤더로 사용하고, 각 데이터 행 앞에 작업 이름(labels)을 붙입니다.
+    """
+    with open(csv_filename, 'w', newline='', encoding='utf-8-sig') as f:
+        writer = csv.writer(f)
         
-        # 각 데이터 행을 추가 (파일명은 첫 번째 행에만)
-        for i, row in enumerate(rows):
-            if i == 0:
-                result.append([''] + row)  # 첫 번째 데이터 행
-            else:
-                result.append([''] + row)  # 나머지 행들
+        # 모든 표 데이터를 하나의 CSV로 통합
+        first_file = True
+        for result_idx, table_result in enumerate(results):
+            if table_result:
+                for row_idx, row in enumerate(table_result):
+                    if first_file and row_idx == 0:
+                        # 첫 번째 파일의 헤더 행을 CSV 헤더로 사용
+                        writer.writerow(['source_file'] + row[1:])  # 파일명 열 + 원본 헤더
+                        first_file = False
+                    elif row_idx == 0:
+                        # 다른 파일들의 헤더는 건너뜀 (중복 방지)
+                        continue
+                    else:
+                        # 데이터 행들을 저장
+                        source_file = labels[result_idx]
+                        writer.writerow([source_file] + row[1:])
+
+def method_label(use_cv_method=False, rows_per_strip=None):
+    """로그에 표시할 추출 방식 이름"""
+    if rows_per_strip:
+        return f"행 띠({rows_per_strip}행)"
+    return "컴퓨터 비전" if use_cv_method else "Gemini AI"
+
+def process_calculations(api_key, max_workers=4, use_cv_method=False, auto_split=False, rows_per_strip=None,
+                         pdf_path=None, page_numbers=None, memory_budget_mb=None, hedge=False, batch_transport=None,
+                         work_queue=None, priority=None, drawing=False, template_path=None):
+    """img-calculation 폴더의 표 형식 이미지들을 동시에 처리하여 정보를 추출하고 CSV로 저장
+
+    auto_split: True면 img-calculation의 전체 페이지에서 표 영역을 자동으로 찾아 영역별로 처리
+                (False면 수작업으로 잘라둔 img-split-calculation 이미지를 처리)
+    rows_per_strip: 지정하면 행 띠 방식으로 처리 (use_cv_method보다 우선)
+    pdf_path: 지정하면 PDF를 직접 읽어 텍스트 레이어가 있는 페이지는 OCR 없이 처리하고,
+              스캔 페이지만 래스터화해 자동 분할 후 OCR (page_numbers: 0부터 시작하는 페이지 목록)
+    memory_budget_mb: 컴퓨터 비전 방식의 띠 단위 선 검출 메모리 예산 (워커당, 대형 도면용)
+    hedge: True(또는 gemini_client.HedgePolicy)면 느린 Gemini 요청을 헤징하여 가장 느린 요청이 전체 처리 시간을 끌지 않도록 함
+           (정책 객체를 넘기면 이전 배치에서 모은 지연 기록을 이어서 사용)
+    batch_transport: batch_mode의 전송 객체. 주어지면 표 전체 추출(AI 방식) 또는 셀 OCR(컴퓨터 비전 방식)을
+                     배치 작업으로 먼저 처리하고, 배치에서 실패한 작업만 동기 방식으로 처리 (야간 대량 처리용)
+    work_queue: work_queue.WorkQueue. 주어지면 자체 스레드 풀(max_workers) 대신 영수증 등 다른 작업과 공유하는 큐에서
+                "calculation" 종류, priority 우선순위(기본 NORMAL)로 처리
+    drawing: True면 도면 배근표(img-drawing/img-split-drawing)를 같은 방식으로 처리하고,
+             헤더 행을 찾아 계산서 결과와 같은 열 이름/표기로 정규화해 drawing_schedule_results_*.csv로 저장
+    template_path: 컴퓨터 비전 방식의 헤더 템플릿을 실행 간에 저장/재사용할 JSON 경로 (프로젝트/출력 폴더별로 지정,
+                   예: os.path.join(출력 폴더, layout_templates.TEMPLATE_FILENAME). 기본은 이번 실행 안에서만 재사용)
+    
+    반환값: 저장한 CSV 파일 이름 (호출 통계는 같은 이름의 .stats.json으로 함께 저장, golden_eval.py에서 사용)
+    """
+    
+    from layout_analysis import region_label
+    from layout_templates import LayoutTemplateStore
+    from gemini_client import STATS, HedgePolicy
+    
+    # 이번 실행의 호출 통계 (프로세스 전체 누적값에서 시작 시점 값을 뺌)
+    start_time = time.time()
+    start_stats = STATS.snapshot()
+    
+    # 텍스트 레이어에서 바로 추출한 표 [(작업 이름, 표 데이터)]
+    prepared = []
+    if pdf_path:
+        from pdf_text_layer import split_pdf, raster_folder
+        # 스캔 페이지는 입력 폴더가 아닌 img-cache/<PDF 이름>에 래스터화하고 처리가 끝나면 삭제
+        prepared, image_files = split_pdf(pdf_path, page_numbers)
+        # 래스터화된 스캔 페이지는 전체 페이지이므로 표 영역 자동 분할
+        auto_split = True
+    else:
+        # img-calculation 폴더 확인 (도면은 img-drawing)
+        if drawing:
+            calculation_folder = "img-drawing" if auto_split else "img-split-drawing"
+        else:
+            calculation_folder = "img-calculation" if auto_split else "img-split-calculation"
+        if not os.path.exists(calculation_folder):
+            print(f"{calculation_folder} 폴더가 없습니다.")
+            return
         
-        return result
+        # 이미지 파일들 찾기
+        image_files = []
+        for ext in ['*.jpg', '*.jpeg', '*.png']:
+            image_files.extend(glob.glob(os.path.join(calculation_folder, ext)))
+        image_files.sort()
         
-    except Exception as e:
-        print(f"{index}번째 계산서 오류: {e}")
-        return [[os.path.basename(image_path), 'ERROR', str(e)]]
-
-def process_calculations(api_key, max_workers=4, use_cv_method=False):
-    """img-calculation 폴더의 표 형식 이미지들을 동시에 처리하여 정보를 추출하고 CSV로 저장"""
-    
-    # img-calculation 폴더 확인
-    calculation_folder = "img-split-calculation"
-    if not os.path.exists(calculation_folder):
-        print(f"{calculation_folder} 폴더가 없습니다.")
-        return
-    
-    # 이미지 파일들 찾기
-    image_files = []
-    for ext in ['*.jpg', '*.jpeg', '*.png']:
-        image_files.extend(glob.glob(os.path.join(calculation_folder, ext)))
-    image_files.sort()
-    
-    if not image_files:
-        print(f"{calculation_folder} 폴더에 이미지 파일이 없습니다.")
-        return
-    
-    method_name = "컴퓨터 비전" if use_cv_method else "Gemini AI"
-    print(f"총 {len(image_files)}개 표 이미지를 {method_name} 방식으로 {max_workers}개 스레드로 동시 처리합니다.")
-    
-    results = [None] * len(image_files)  # 순서 보장을 위한 리스트
-    
-    # ThreadPoolExecutor를 사용한 동시 처리
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # 모든 작업 제출
-        future_to_index = {
-            executor.submit(process_single_calculation, api_key, image_path, i+1, use_cv_method): i 
-            for i, image_path in enumerate(image_files)
-        }
+        if not image_files:
+            print(f"{calculation_folder} 폴더에 이미지 파일이 없습니다.")
+            return
+    
+    # 처리 작업 목록 (이미지 경로, 표 영역)
+    if auto_split:
+        from layout_analysis import split_pages
+        jobs = split_pages(image_files)
+    else:
+        jobs = [(image_path, None) for image_path in image_files]
+    labels = [label for label, _ in prepared] + [region_label(image_path, bbox) for image_path, bbox in jobs]
+    
+    method_name = method_label(use_cv_method, rows_per_strip)
+    print(f"총 {len(jobs)}개 {'도면 배근표' if drawing else '표'} 이미지를 {method_name} 방식으로 {max_workers}개 스레드로 동시 처리합니다.")
+    
+    # 컴퓨터 비전 방식은 같은 헤더 레이아웃을 페이지 간에 재사용
+    template_store = LayoutTemplateStore(template_path) if use_cv_method else None
+    # 반복되는 셀(D10@150, 층 이름 등)은 페이지와 관계없이 한 번만 OCR
+    dedup_index = None
+    if use_cv_method:
+        from cell_dedup import CellDedupIndex
+        dedup_index = CellDedupIndex()
+    
+    # 병합 스팬을 유지한 표 (컴퓨터 비전 방식, CSV와 별도로 스팬 형식으로 저장)
+    span_tables = {}
+    
+    # 도면 배근표는 표마다 헤더 행을 찾아 계산서와 같은 열로 정규화 (찾지 못한 표만 오류 행)
+    results = [result_rows(label, table_data, drawing) for label, table_data in prepared]
+    results += [None] * len(jobs)  # 순서 보장을 위한 리스트
+    offset = len(prepared)
+    
+    # 배치 모드: 요청을 배치 작업으로 먼저 처리하고 결과를 일반 처리 결과에 합침
+    batch_tables = {}
+    if batch_transport is not None:
+        from batch_mode import batch_extract_tables, batch_prefetch_cells
+        if rows_per_strip:
+            raise ValueError("행 띠 방식은 배치 모드를 지원하지 않습니다.")
+        if use_cv_method:
+            batch_prefetch_cells(jobs, batch_transport, dedup_index, memory_budget_mb)
+        else:
+            batch_tables = batch_extract_tables(jobs, batch_transport)
+        for i, table_data in batch_tables.items():
+            results[offset + i] = result_rows(labels[offset + i], table_data, drawing)
+        print(f"배치 처리 완료: 표 {len(batch_tables)}개, 나머지 {len(jobs) - len(batch_tables)}개는 {method_name} 방식으로 처리합니다.")
+    
+    # 지연 요청 헤징: p95 지연을 넘긴 요청은 한 번 더 보내고 먼저 온 응답 사용 (추가 요청은 예산 내)
+    # 정책은 이 실행의 작업에만 넘기므로 같은 프로세스의 영수증/워커 작업은 헤징되지 않고 예산도 공유하지 않음
+    hedge_policy = None
+    if isinstance(hedge, HedgePolicy):
+        hedge_policy = hedge
+    elif hedge:
+        # 행 띠 방식은 표마다 띠 4개를 동시에 요청 (extract_table_rowstrips 기본 max_workers)
+        hedge_policy = HedgePolicy(max_workers=max_workers * (4 if rows_per_strip else 1))
+    try:
+        # ThreadPoolExecutor(또는 공용 작업 큐)를 사용한 동시 처리
+        if work_queue is not None:
+            executor = work_queue.lane("drawing" if drawing else "calculation", **({} if priority is None else {"priority": priority}))
+        else:
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+        with executor:
+            # 모든 작업 제출
+            future_to_index = {
+                executor.submit(process_single_calculation, api_key, image_path, i+1, use_cv_method, bbox, template_store, rows_per_strip, memory_budget_mb, dedup_index, span_tables, drawing, hedge_policy): offset + i 
+                for i, (image_path, bbox) in enumerate(jobs) if i not in batch_tables
+            }
         
-        # 완료된 작업들 수집
-        for future in as_completed(future_to_index):
-            index = future_to_index[future]
-            try:
-                result = future.result()
-                results[index] = result
-            except Exception as e:
-                print(f"작업 실패: {e}")
-                results[index] = [[os.path.basename(image_files[index]), 'ERROR', str(e)]]
+            # 완료된 작업들 수집
+            for future in as_completed(future_to_index):
+                index = future_to_index[future]
+                try:
+                    result = future.result()
+                    results[index] = result
+                except Exception as e:
+                    print(f"작업 실패: {e}")
+                    results[index] = [[labels[index], 'ERROR', str(e)]]
+    finally:
+        if pdf_path:
+            shutil.rmtree(raster_folder(pdf_path), ignore_errors=True)
+    if dedup_index is not None:
+        dedup_stats = dedup_index.stats()
+        print(f"셀 중복 제거: OCR {dedup_stats['misses']}회, 재사용 {dedup_stats['hits']}회 ({dedup_stats['hit_rate']:.0%})")
     
             # CSV 저장 - 타임스탬프로 고유한 파일명 생성
     timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-    method_suffix = "_cv" if use_cv_method else "_ai"
-    csv_filename = f'table_extraction_results{method_suffix}_{timestamp}.csv'
+    method_suffix = f"_strip{rows_per_strip}" if rows_per_strip else ("_cv" if use_cv_method else "_ai")
+    result_prefix = "drawing_schedule_results" if drawing else "table_extraction_results"
+    csv_filename = f'{result_prefix}{method_suffix}_{timestamp}.csv'
     
     try:
-        with open(csv_filename, 'w', newline='', encoding='utf-8-sig') as f:
-            writer = csv.writer(f)
-            
-            # 모든 표 데이터를 하나의 CSV로 통합
-            first_file = True
-            for table_result in results:
-                if table_result:
-                    for row_idx, row in enumerate(table_result):
-                        if first_file and row_idx == 0:
-                            # 첫 번째 파일의 헤더 행을 CSV 헤더로 사용
-                            writer.writerow(['source_file'] + row[1:])  # 파일명 열 + 원본 헤더
-                            first_file = False
-                        elif row_idx == 0:
-                            # 다른 파일들의 헤더는 건너뜀 (중복 방지)
-                            continue
-                        else:
-                            # 데이터 행들을 저장
-                            source_file = os.path.basename(image_files[results.index(table_result)])
-                            writer.writerow([source_file] + row[1:])
-        
+        write_table_csv(csv_filename, results, labels)
         print(f"{csv_filename}에 저장완료!")
         print(f"총 {len([r for r in results if r])}개 표가 처리되었습니다.")
+        
+        if span_tables:
+            # 병합 셀을 복제하지 않고 (행, 열, 행 스팬, 텍스트)로 저장
+            from sparse_table import write_span_jsonl
+            spans_filename = f'{result_prefix.replace("_results", "_spans")}{method_suffix}_{timestamp}.jsonl'
+            write_span_jsonl(spans_filename, [(label, span_tables[label]) for label in labels if label in span_tables])
+            print(f"{spans_filename}에 병합 스팬 형식으로 저장완료!")
+        
+        from golden_eval import write_run_stats
+        run_stats = {key: round(value - start_stats[key], 3) for key, value in STATS.snapshot().items()}
+        run_stats.update(method=method_name, tables=len(labels), wall_time=round(time.time() - start_time, 3))
+        write_run_stats(csv_filename, run_stats)
+        return csv_filename
             
     except Exception as e:
         print(f"❌ CSV 저장 중 오류 발생: {e}")
         print("\n📋 추출된 표 데이터:")
         for i, table_result in enumerate(results):
             if table_result:
-                print(f"\n=== {os.path.basename(image_files[i])} ===")
+                print(f"\n=== {labels[i]} ===")
                 for row in table_result:
                     print(','.join(str(item) for item in row))
 
@@ -201,25 +380,64 @@ if __name__ == "__main__":
         print("1. Gemini AI 방식 (기존)")
         print("2. 컴퓨터 비전 방식 (새로운 병합셀 처리)")
         print("3. 두 방식 모두 실행하여 비교")
+        print("4. 행 띠 방식 (N개 행씩 요청)")
+        print("5. 배치 모드 (야간 대량 처리, 결과가 늦게 나오는 대신 비용 절감)")
+        print("6. 도면 배근표 추출 (img-split-drawing, 계산서와 같은 열로 정규화)")
         
         while True:
-            choice = input("선택하세요 (1/2/3): ").strip()
-            if choice in ['1', '2', '3']:
+            choice = input("선택하세요 (1/2/3/4/5/6): ").strip()
+            if choice in ['1', '2', '3', '4', '5', '6']:
                 break
             print("올바른 선택지를 입력하세요.")
         
+        # 전체 페이지(img-calculation)에서 표 영역 자동 분할 여부
+        auto_split = input("전체 페이지에서 표 영역을 자동으로 분할할까요? (y/N): ").strip().lower() == 'y'
+        # 계산서 PDF를 직접 처리 (텍스트 레이어가 있는 페이지는 OCR 생략)
+        pdf_path = input("계산서 PDF 경로 (없으면 Enter): ").strip() or None
+        page_numbers = None
+        if pdf_path:
+            pages = input("처리할 페이지 번호 (예: 73,74,75 / 전체는 Enter): ").strip()
+            page_numbers = [int(n) - 1 for n in pages.split(",")] if pages else None
+        
         if choice == '1':
             print("Gemini AI 방식으로 처리합니다...")
-            process_calculations(api_key, max_workers=4, use_cv_method=False)
+            process_calculations(api_key, max_workers=4, use_cv_method=False, auto_split=auto_split,
+                                 pdf_path=pdf_path, page_numbers=page_numbers)
         elif choice == '2':
             print("컴퓨터 비전 방식으로 처리합니다...")
-            process_calculations(api_key, max_workers=4, use_cv_method=True)
+            process_calculations(api_key, max_workers=4, use_cv_method=True, auto_split=auto_split,
+                                 pdf_path=pdf_path, page_numbers=page_numbers)
         elif choice == '3':
             print("두 방식 모두 실행하여 결과를 비교합니다...")
             print("\n1단계: Gemini AI 방식")
-            process_calculations(api_key, max_workers=4, use_cv_method=False)
+            ai_csv = process_calculations(api_key, max_workers=4, use_cv_method=False, auto_split=auto_split,
+                                          pdf_path=pdf_path, page_numbers=page_numbers)
             print("\n2단계: 컴퓨터 비전 방식")
-            process_calculations(api_key, max_workers=4, use_cv_method=True)
-            print("\n두 결과 파일을 비교해보세요!")
+            cv_csv = process_calculations(api_key, max_workers=4, use_cv_method=True, auto_split=auto_split,
+                                          pdf_path=pdf_path, page_numbers=page_numbers)
+            from golden_eval import GOLDEN_DIR, load_golden, score_run, print_report
+            golden = load_golden()
+            runs = [path for path in (ai_csv, cv_csv) if path]
+            if golden and runs:
+                print("\n3단계: 정답 표 기준 채점")
+                print_report([score_run(golden, path) for path in runs])
+            else:
+                print(f"\n두 결과 파일을 비교해보세요! ({GOLDEN_DIR}/ 폴더에 정답 CSV를 두면 자동으로 채점합니다)")
+        elif choice == '4':
+            rows_per_strip = int(input("요청당 행 개수 (기본 4): ").strip() or 4)
+            print(f"행 띠 방식({rows_per_strip}행/요청)으로 처리합니다...")
+            process_calculations(api_key, max_workers=4, auto_split=auto_split, rows_per_strip=rows_per_strip,
+                                 pdf_path=pdf_path, page_numbers=page_numbers)
+        elif choice == '5':
+            from batch_mode import make_transport
+            use_cv_method = input("컴퓨터 비전 방식 셀 OCR을 배치로 처리할까요? (y: 컴퓨터 비전 / N: Gemini AI): ").strip().lower() == 'y'
+            print("배치 모드로 처리합니다... (작업이 끝날 때까지 기다립니다)")
+            process_calculations(api_key, max_workers=4, use_cv_method=use_cv_method, auto_split=auto_split,
+                                 pdf_path=pdf_path, page_numbers=page_numbers, batch_transport=make_transport(api_key))
+        elif choice == '6':
+            use_cv_method = input("컴퓨터 비전 방식으로 처리할까요? (y: 컴퓨터 비전 / N: Gemini AI): ").strip().lower() == 'y'
+            print("도면 배근표를 처리합니다...")
+            process_calculations(api_key, max_workers=4, use_cv_method=use_cv_method, auto_split=auto_split,
+                                 pdf_path=pdf_path, page_numbers=page_numbers, drawing=True)
     else:
         print("API 키가 필요합니다.")
@@ -1,18 +1,10 @@
 import os
 import glob
 import csv
-import importlib.util
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# gemini-ocr.py에서 필요한 함수들 import (하이픈 때문에 동적 import 사용)
-spec = importlib.util.spec_from_file_location("gemini_ocr", "gemini-ocr.py")
-gemini_ocr = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(gemini_ocr)
-
-# 필요한 함수들을 변수에 할당
-extract_front_info_gemini = gemini_ocr.extract_front_info_gemini
-convert_date_format = gemini_ocr.convert_date_format
+from gemini_ocr import extract_front_info_gemini, convert_date_format
 
 def extract_table_data_gemini(api_key, image_path: str):
     """표 형식 이미지에서 데이터를 추출하는 함수"""
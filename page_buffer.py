@@ -0,0 +1,125 @@
+"""
+워커 프로세스용 공유 페이지 버퍼
+
+페이지 이미지를 multiprocessing.shared_memory(또는 메모리 맵 파일)에 한 번만 올려두고,
+워커에는 (페이지 핸들, 셀 박스)만 전달합니다. 워커는 복사 없이 NumPy 뷰로 셀을 잘라 씁니다.
+워커 수가 늘어도 페이지를 워커마다 pickle로 복사하지 않으므로 메모리/IPC 비용이 일정합니다.
+"""
+
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# 워커에 전달되는 페이지 핸들 (pickle 크기가 수십 바이트)
+PageHandle = namedtuple("PageHandle", ["page_id", "backend", "location", "shape", "dtype"])
+
+# 워커 프로세스별로 한 번만 attach 하기 위한 캐시
+_attached = {}
+
+class SharedPageBuffer:
+    """페이지 배열을 공유 메모리(shm) 또는 메모리 맵 파일(memmap)에 보관하는 버퍼"""
+
+    def __init__(self, backend="shm", directory=None):
+        if backend not in ("shm", "memmap"):
+            raise ValueError(f"지원하지 않는 백엔드입니다: {backend}")
+        self.backend = backend
+        self.directory = directory
+        self.handles = {}
+        self._segments = []
+        self._tempdir = None
+
+    def add(self, page_id, array):
+        """페이지 배열을 버퍼에 한 번 복사하고 핸들을 반환하는 함수"""
+        if page_id in self.handles:
+            return self.handles[page_id]
+
+        array = np.ascontiguousarray(array)
+        if self.backend == "shm":
+            segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+            self._segments.append(segment)
+            location = segment.name
+        else:
+            if self.directory is None:
+                self._tempdir = tempfile.TemporaryDirectory(prefix="page_buffer_")
+                self.directory = self._tempdir.name
+            location = os.path.join(self.directory, f"page_{len(self.handles)}.npy")
+            mapped = np.lib.format.open_memmap(location, mode="w+", dtype=array.dtype, shape=array.shape)
+            mapped[...] = array
+            mapped.flush()
+            del mapped
+
+        handle = PageHandle(page_id, self.backend, location, array.shape, array.dtype.str)
+        self.handles[page_id] = handle
+        return handle
+
+    def close(self):
+        """공유 메모리와 임시 파일을 정리하는 함수"""
+        for segment in self._segments:
+            segment.close()
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+        self._segments = []
+        if self._tempdir is not None:
+            self._tempdir.cleanup()
+            self._tempdir = None
+        self.handles = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def attach_page(handle):
+    """핸들로부터 페이지 배열 뷰를 얻는 함수 (복사 없음, 프로세스당 한 번만 attach)"""
+    key = (handle.backend, handle.location)
+    if key in _attached:
+        return _attached[key][0]
+
+    if handle.backend == "shm":
+        # 자식 프로세스는 부모의 resource tracker를 공유하므로 세그먼트 정리는 소유자(close)가 담당
+        segment = shared_memory.SharedMemory(name=handle.location)
+        view = np.ndarray(handle.shape, dtype=np.dtype(handle.dtype), buffer=segment.buf)
+        _attached[key] = (view, segment)
+    else:
+        view = np.load(handle.location, mmap_mode="r")
+        _attached[key] = (view, None)
+    return view
+
+def crop_view(handle, box, padding=0):
+    """페이지 핸들과 (x, y, w, h) 박스로 셀 영역의 NumPy 뷰를 반환하는 함수"""
+    page = attach_page(handle)
+    x, y, w, h = box
+    return page[max(0, y-padding):min(page.shape[0], y+h+padding),
+                max(0, x-padding):min(page.shape[1], x+w+padding)]
+
+def _ocr_cell_job(handle, cell_box, api_key, row_height):
+    """워커 프로세스에서 실행되는 셀 OCR 작업 (OCR에 실패하면 None)"""
+    from table_cv_extraction import crop_cell, ocr_cell_image
+    cell_img = crop_cell(attach_page(handle), cell_box)
+    if cell_img.size == 0:
+        return ""
+    try:
+        return ocr_cell_image(cell_img, api_key, row_height)
+    except Exception as e:
+        print(f"OCR 오류: {e}")
+        return None
+
+def ocr_cells_in_processes(img, cell_boxes, api_key, row_height=None, max_workers=4, backend="shm", keep_failures=False):
+    """페이지를 공유 버퍼에 올리고 셀 OCR을 여러 프로세스로 나눠 실행하는 함수
+
+    keep_failures: True면 OCR에 실패한 셀을 빈 문자열 대신 None으로 반환 (실패한 결과를 캐시하지 않도록)
+    """
+    with SharedPageBuffer(backend=backend) as buffer:
+        handle = buffer.add("page", img)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_ocr_cell_job, handle, box, api_key, row_height) for box in cell_boxes]
+            texts = [future.result() for future in futures]
+    return texts if keep_failures else ["" if text is None else text for text in texts]
@@ -0,0 +1,172 @@
+"""
+페이지 통계 기반 선 검출 파라미터 추정
+
+detect_horizontal_lines/detect_vertical_lines/detect_table_cells는 200dpi 스캔에 맞춘 고정값
+(OTSU 전역 이진화, 40x1/1x20 커널, w > 20 and h > 10 셀 필터, 20px 열 허용 오차)을 사용해 해상도가 달라지면
+선이 끊기거나 글자가 선으로 잡혀 셀 검출이 무너집니다. 여기서는 페이지에서 직접 잰 값으로 이 파라미터들을 정합니다.
+
+- 획 두께: 전경 픽셀의 세로 연속 길이 최빈값
+- 글자 높이: 선이 아닌 작은 연결 요소들의 높이 중앙값
+- 행 간격: 글자 중심 y 분포의 자기상관 첫 봉우리 (표 선 없이도 측정 가능)
+- 이진화: 페이지 배경 밝기가 고르면 OTSU, 조명/얼룩으로 배경 차이가 크면 적응형 이진화
+
+커널과 필터는 기준 페이지(200dpi, 글자 높이 15px)에서 기존 고정값이 나오도록 글자 높이에 비례시켰습니다.
+추정값은 문서별로 캐시합니다 (같은 PDF에서 래스터화한 페이지 문서명_pN.png는 한 문서로 봄).
+"""
+
+import os
+import re
+import threading
+from collections import namedtuple
+
+import cv2
+import numpy as np
+
+PageParams = namedtuple("PageParams", [
+    "adaptive_block",     # 적응형 이진화 블록 크기 (None이면 OTSU)
+    "stroke_width",       # 획 두께 (px)
+    "text_height",        # 글자 높이 (px)
+    "line_spacing",       # 행 간격 (px, 측정 실패 시 None)
+    "horizontal_kernel",  # 수평선 열림 커널 (w, 1)
+    "vertical_kernel",    # 수직선 열림 커널 (1, h)
+    "min_cell_width",     # 셀로 인정할 최소 너비 (초과)
+    "min_cell_height",    # 셀로 인정할 최소 높이 (초과)
+    "column_tolerance",   # 셀 왼쪽 경계와 열 시작 위치의 허용 오차
+])
+
+# 기존 고정값 (추정하지 않을 때와 같은 동작)
+DEFAULT_PARAMS = PageParams(None, 1, 15, None, (40, 1), (1, 20), 20, 10, 20)
+# 고정값을 맞춘 기준 글자 높이 (200dpi 계산서 스캔에서 측정)
+REFERENCE_TEXT_HEIGHT = 15
+# 타일별 배경 밝기 차이가 이 값을 넘으면 적응형 이진화 사용 (0~255)
+UNEVEN_BACKGROUND = 40
+# 적응형 이진화에서 주변 평균보다 이만큼 어두워야 전경으로 봄
+ADAPTIVE_OFFSET = 15
+# 행 간격 자기상관에서 최댓값 대비 이 비율 이상인 첫 봉우리를 행 간격으로 봄
+PITCH_PEAK_RATIO = 0.7
+# 글자 높이를 추정하는 데 필요한 최소 연결 요소 수
+MIN_TEXT_COMPONENTS = 20
+
+_params = {}
+_params_lock = threading.Lock()
+
+def _odd(value):
+    value = int(value)
+    return value if value % 2 else value + 1
+
+def background_spread(gray, tiles=8):
+    """페이지를 tiles x tiles로 나눈 타일별 배경 밝기(90 백분위)의 최대-최소 차이"""
+    height, width = gray.shape[:2]
+    levels = [np.percentile(gray[y:y + height // tiles, x:x + width // tiles], 90)
+              for y in range(0, height - height // tiles + 1, max(1, height // tiles))
+              for x in range(0, width - width // tiles + 1, max(1, width // tiles))]
+    return float(max(levels) - min(levels))
+
+def binarize(gray, params=None):
+    """파라미터에 맞게 이진화하는 함수 (전경 255, 배경 0)"""
+    if params is not None and params.adaptive_block:
+        return cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV,
+                                     params.adaptive_block, ADAPTIVE_OFFSET)
+    _, bin_img = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    return bin_img
+
+def stroke_width(bin_img):
+    """전경 픽셀의 세로 연속 길이 최빈값 (가로 획/수평선 두께)"""
+    fg = (bin_img[:, ::4] > 0).astype(np.int8)
+    edges = np.diff(np.pad(fg, ((1, 1), (0, 0))), axis=0)
+    starts, ends = np.nonzero(edges.T == 1), np.nonzero(edges.T == -1)
+    runs = ends[1] - starts[1]
+    if len(runs) == 0:
+        return DEFAULT_PARAMS.stroke_width
+    return max(1, int(np.argmax(np.bincount(runs))))
+
+def text_components(bin_img, stroke):
+    """글자로 보이는 연결 요소들의 (높이, 중심 y) 배열 (긴 선, 점 잡음 제외)"""
+    _, _, stats, centroids = cv2.connectedComponentsWithStats(bin_img, connectivity=8)
+    height, width = bin_img.shape[:2]
+    w, h = stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT]
+    keep = ((h > 2 * stroke) & (h < height / 20) & (w < width / 20)
+            & (w < 10 * h) & (stats[1:, cv2.CC_STAT_AREA] >= 3 * stroke * stroke))
+    return h[keep], centroids[1:, 1][keep]
+
+def line_pitch(centers_y, height, text_height):
+    """글자 중심 y 분포의 자기상관으로 행 간격을 구하는 함수 (찾지 못하면 None)"""
+    profile = np.bincount(centers_y.astype(int), minlength=height).astype(np.float64)
+    smooth = max(1, text_height // 3)
+    profile = np.convolve(profile, np.ones(smooth), mode="same")
+    profile -= profile.mean()
+    lags = np.arange(int(text_height * 1.2), int(text_height * 6))
+    if len(lags) == 0 or lags[-1] >= height:
+        return None
+    scores = np.array([np.dot(profile[:-lag], profile[lag:]) for lag in lags])
+    if scores.max() <= 0:
+        return None
+    # 행 간격의 배수(2행, 3행 간격)도 높게 나오므로 최댓값에 가까운 첫 번째 봉우리를 사용
+    for i in range(1, len(scores) - 1):
+        if scores[i] >= scores[i - 1] and scores[i] >= scores[i + 1] and scores[i] >= PITCH_PEAK_RATIO * scores.max():
+            return int(lags[i])
+    return int(lags[int(np.argmax(scores))])
+
+def estimate_params(img):
+    """페이지 이미지에서 선 검출 파라미터를 추정하는 함수 (글자가 너무 적으면 None)"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+    adaptive_block = None
+    if background_spread(gray) > UNEVEN_BACKGROUND:
+        # 블록은 글자보다 충분히 크게 (페이지 짧은 변의 1/30, 글자 높이를 모르는 단계라 페이지 크기 기준)
+        adaptive_block = _odd(max(15, min(gray.shape[:2]) // 30))
+    bin_img = binarize(gray, PageParams(adaptive_block, *DEFAULT_PARAMS[1:]))
+
+    stroke = stroke_width(bin_img)
+    heights, centers_y = text_components(bin_img, stroke)
+    if len(heights) < MIN_TEXT_COMPONENTS:
+        return None
+    text_height = max(3 * stroke, int(round(np.median(heights))))
+    spacing = line_pitch(centers_y, gray.shape[0], text_height)
+
+    # 기준 페이지에서 기존 고정값이 나오도록 글자 높이에 비례 (획 두께보다는 항상 크게)
+    scale = text_height / REFERENCE_TEXT_HEIGHT
+    def scaled(reference, minimum):
+        return max(minimum, int(round(reference * scale)))
+    vertical = scaled(20, 3 * stroke)
+    if spacing:
+        # 한 행 높이의 수직선 조각도 남도록 행 간격보다 짧게
+        vertical = min(vertical, max(3 * stroke, int(spacing * 0.8)))
+    return PageParams(
+        adaptive_block=adaptive_block,
+        stroke_width=stroke,
+        text_height=text_height,
+        line_spacing=spacing,
+        horizontal_kernel=(scaled(40, 6 * stroke), 1),
+        vertical_kernel=(1, vertical),
+        min_cell_width=scaled(20, 2 * stroke),
+        min_cell_height=scaled(10, 2 * stroke),
+        column_tolerance=scaled(20, 2 * stroke),
+    )
+
+def document_key(image_path):
+    """캐시 키로 쓸 문서 이름 (pdf_text_layer.rasterize_page의 문서명_pN.png는 페이지 번호를 뺌)"""
+    folder, filename = os.path.split(os.path.abspath(image_path))
+    stem = os.path.splitext(filename)[0]
+    match = re.fullmatch(r"(.+)_p\d+", stem)
+    return os.path.join(folder, match.group(1) + ".pdf") if match else os.path.join(folder, filename)
+
+def document_params(img, image_path=None):
+    """문서별로 캐시한 파라미터를 반환하는 함수 (첫 페이지에서 추정, 추정에 실패하면 기존 고정값이며 캐시하지 않음)"""
+    key = document_key(image_path) if image_path is not None else None
+    if key is not None:
+        with _params_lock:
+            if key in _params:
+                return _params[key]
+    params = estimate_params(img)
+    if params is None:
+        return DEFAULT_PARAMS
+    if key is not None:
+        with _params_lock:
+            _params.setdefault(key, params)
+    print(f"선 검출 파라미터: 글자 높이 {params.text_height}px, 행 간격 {params.line_spacing}px, 획 {params.stroke_width}px"
+          f"{', 적응형 이진화' if params.adaptive_block else ''} → 커널 {params.horizontal_kernel[0]}x1/1x{params.vertical_kernel[1]}")
+    return params
+
+def clear_cache():
+    with _params_lock:
+        _params.clear()
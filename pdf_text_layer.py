@@ -0,0 +1,137 @@
+"""
+벡터 PDF 텍스트 레이어 빠른 경로
+
+프로그램으로 생성된 계산서 PDF는 실제 텍스트 레이어와 벡터 괘선을 가지고 있으므로,
+페이지마다 텍스트/괘선 존재 여부를 확인해 있으면 PDF 객체에서 바로 표 격자와 셀 텍스트를 만들고
+(래스터화와 OCR 생략), 스캔 페이지만 이미지로 변환해 기존 래스터+OCR 경로로 넘깁니다.
+
+pdfplumber(오프라인 PDF 파서)와 pdf2image(스캔 페이지 래스터화)가 필요합니다.
+"""
+
+import os
+import re
+
+from row_strip_extraction import cluster_positions, locate_cell
+
+# 텍스트 레이어로 인정하기 위한 최소 글자 수
+MIN_TEXT_CHARS = 20
+# 벡터 괘선으로 인정하기 위한 최소 수평/수직선 개수
+MIN_RULING_LINES = 3
+# 격자 좌표를 하나로 묶는 허용 오차 (pt)
+GRID_TOLERANCE = 2
+# 괘선 기반 표 검출 설정
+TABLE_SETTINGS = {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
+# 래스터화한 스캔 페이지를 두는 폴더 (입력 폴더 img-calculation/img-drawing에 쓰면 다음 실행에서 새 입력으로 다시 처리됨)
+RASTER_CACHE_FOLDER = "img-cache"
+
+def normalize_cell_text(text):
+    """셀 텍스트의 줄바꿈과 불필요한 공백을 정리하는 함수 (12 - D10 → 12-D10, D10 @250 → D10@250)"""
+    text = " ".join((text or "").split())
+    return re.sub(r"\s*([-@~])\s*", r"\1", text)
+
+def has_text_layer(page, min_chars=MIN_TEXT_CHARS, min_lines=MIN_RULING_LINES):
+    """페이지에 텍스트 레이어와 벡터 괘선이 모두 있는지 확인하는 함수"""
+    if len(page.chars) < min_chars:
+        return False
+    edges = page.edges
+    horizontal = sum(1 for edge in edges if edge["orientation"] == "h")
+    vertical = sum(1 for edge in edges if edge["orientation"] == "v")
+    return horizontal >= min_lines and vertical >= min_lines
+
+def table_from_cells(page, cells):
+    """pdfplumber 표의 셀 bbox 목록으로 {'headers', 'rows'}를 만드는 함수 (병합셀은 스팬 전체에 복제)"""
+    boxes = [(x0, top, x1 - x0, bottom - top) for x0, top, x1, bottom in cells]
+    ys = cluster_positions([box[1] for box in boxes] + [box[1] + box[3] for box in boxes], GRID_TOLERANCE)
+    xs = cluster_positions([box[0] for box in boxes] + [box[0] + box[2] for box in boxes], GRID_TOLERANCE)
+    num_rows, num_cols = len(ys) - 1, len(xs) - 1
+    if num_rows < 1 or num_cols < 1:
+        return {'headers': [], 'rows': []}
+
+    grid = [['' for _ in range(num_cols)] for _ in range(num_rows)]
+    for cell, box in zip(cells, boxes):
+        rows, col = locate_cell(box, ys, xs)
+        if not rows or col is None:
+            continue
+        text = normalize_cell_text(page.crop(cell, strict=False).extract_text())
+        for row in rows:
+            grid[row][col] = text
+
+    grid = [row for row in grid if any(row)]
+    if not grid:
+        return {'headers': [], 'rows': []}
+    return {'headers': grid[0], 'rows': grid[1:]}
+
+def extract_page_tables(page):
+    """텍스트 레이어가 있는 페이지에서 [(bbox, table_data)] 목록을 추출하는 함수 (bbox 단위: pt)"""
+    tables = []
+    for table in page.find_tables(table_settings=TABLE_SETTINGS):
+        table_data = table_from_cells(page, table.cells)
+        if table_data['headers']:
+            tables.append((table.bbox, table_data))
+    # 읽는 순서: 왼쪽 열부터, 같은 열에서는 위에서 아래로 (layout_analysis와 같은 규칙)
+    column_width = max(1, float(page.width) / 20)
+    tables.sort(key=lambda item: (int(item[0][0] // column_width), item[0][1]))
+    return tables
+
+def pdf_table_label(pdf_path, page_number, bbox):
+    """결과 CSV에 기록할 작업 이름 (파일명#페이지@x,y,w,h, 좌표 단위: pt)"""
+    x0, top, x1, bottom = (int(round(value)) for value in bbox)
+    return f"{os.path.basename(pdf_path)}#{page_number + 1}@{x0},{top},{x1 - x0},{bottom - top}"
+
+def rasterize_page(pdf_path, page_number, output_folder, dpi=200, poppler_path=None):
+    """스캔 페이지 하나를 PNG로 변환하고 경로를 반환하는 함수 (page_number는 0부터)"""
+    from pdf2image import convert_from_path
+
+    os.makedirs(output_folder, exist_ok=True)
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_number + 1, last_page=page_number + 1,
+                               poppler_path=poppler_path or os.getenv("POPPLER_PATH"))
+    stem = os.path.splitext(os.path.basename(pdf_path))[0]
+    image_path = os.path.join(output_folder, f"{stem}_p{page_number + 1}.png")
+    images[0].save(image_path, "PNG")
+    return image_path
+
+def raster_folder(pdf_path):
+    """PDF의 스캔 페이지 이미지를 저장할 폴더 (img-cache/<PDF 이름>)"""
+    return os.path.join(RASTER_CACHE_FOLDER, os.path.splitext(os.path.basename(pdf_path))[0])
+
+def split_pdf(pdf_path, page_numbers=None, output_folder=None, dpi=200, poppler_path=None):
+    """PDF 페이지들을 텍스트 레이어 결과와 래스터화할 이미지로 나누는 함수
+
+    output_folder: 스캔 페이지 이미지를 저장할 폴더 (기본: raster_folder(pdf_path), 처리가 끝나면 호출한 쪽에서 삭제)
+    반환값: ([(label, table_data)], [image_path])
+    - 텍스트 레이어 페이지: PDF 객체에서 바로 만든 표 데이터
+    - 스캔 페이지(또는 표를 찾지 못한 페이지): 기존 래스터+OCR 경로로 처리할 이미지 경로
+    """
+    import pdfplumber
+
+    output_folder = output_folder or raster_folder(pdf_path)
+    prepared, image_files = [], []
+    with pdfplumber.open(pdf_path) as pdf:
+        if page_numbers is None:
+            page_numbers = range(len(pdf.pages))
+        for page_number in page_numbers:
+            page = pdf.pages[page_number]
+            tables = extract_page_tables(page) if has_text_layer(page) else []
+            if tables:
+                print(f"{page_number + 1}페이지: 텍스트 레이어에서 표 {len(tables)}개 추출 (OCR 생략)")
+                prepared.extend((pdf_table_label(pdf_path, page_number, bbox), table_data)
+                                for bbox, table_data in tables)
+            else:
+                print(f"{page_number + 1}페이지: 텍스트 레이어 없음 - 래스터화 후 OCR")
+                image_files.append(rasterize_page(pdf_path, page_number, output_folder, dpi, poppler_path))
+            page.close()
+    return prepared, image_files
+
+if __name__ == "__main__":
+    import sys
+
+    pdf_path = sys.argv[1] if len(sys.argv) > 1 else "calculation-101.pdf"
+    pages = [int(n) - 1 for n in sys.argv[2].split(",")] if len(sys.argv) > 2 else None
+    prepared, image_files = split_pdf(pdf_path, pages)
+    for label, table_data in prepared:
+        print(f"\n=== {label} ===")
+        print(table_data['headers'])
+        for row in table_data['rows']:
+            print(row)
+    if image_files:
+        print(f"\nOCR이 필요한 페이지 이미지: {image_files}")
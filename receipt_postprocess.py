@@ -0,0 +1,162 @@
+"""
+영수증 결과 일괄 후처리 (열 단위 정규화, 검증, 중복 표시)
+
+process_single_receipt가 영수증마다 행을 만들던 방식은 금액(c)이 정수인지, 날짜/카드정보가 비었는지 확인하지 않고
+같은 영수증을 두 번 찍은 사진도 그대로 CSV에 들어갑니다. 여기서는 모든 영수증의 추출 결과(receipt_record)를
+DataFrame 하나로 모아 열 단위로
+
+- 날짜: YYYY-MM-DD HH:MM (모델이 형식을 어긴 25-07-22, 2025/07/17, 2025.7.3 포함) → 시각으로 해석 후 (MM/DD)
+- 금액: '7,500원', '7500', 7500 → 정수 (해석할 수 없거나 0 이하면 표시)
+- 카드정보: 비었으면 표시. 법인카드(또는 비고를 정하지 못한 경우)인데 카드번호(숫자 4자리 이상)가 없으면 표시
+  (개인카드는 번호가 아니라 소유주 이름으로 구분하므로 번호가 없어도 정상)
+- 중복: (결제 시각, 업체명, 금액) 해시가 같은 영수증은 처음 나온 파일명과 함께 표시
+
+을 처리하고, 확인이 필요한 항목을 check 열에 적어 최종 CSV를 저장합니다. 월말 수천 장도 1초 안에 끝납니다.
+pandas는 이 모듈을 import할 때 올라오므로 gemini_ocr은 CSV를 저장할 때만 이 모듈을 import합니다.
+"""
+
+import re
+from datetime import datetime
+
+import pandas as pd
+
+from gemini_ocr import PRINTED_KEYS, HANDWRITTEN_KEYS, RECEIPT_CSV_HEADER
+
+# 후처리 전 레코드 열 (receipt_record: 파일명, 프린트 정보, 손글씨 정보, 추출 오류)
+RECORD_COLUMNS = ['filename', *PRINTED_KEYS, *HANDWRITTEN_KEYS, 'error']
+OUTPUT_COLUMNS = RECEIPT_CSV_HEADER + ['check']
+
+# 날짜 (연도 2/4자리, 구분자 - / .) + 선택적 시각. 문자열 앞뒤의 '승인일시', '(화)' 등은 무시
+DATE_PATTERN = (r'(?P<year>\d{4}|\d{2})\s*[-/.]\s*(?P<month>\d{1,2})\s*[-/.]\s*(?P<day>\d{1,2})'
+                r'(?:\D{0,8}?(?P<hour>\d{1,2}):(?P<minute>\d{2}))?')
+# 금액에서 지울 문자 (천 단위 구분자, 통화 표기, 공백)
+AMOUNT_NOISE = r'[,\s원₩]|KRW'
+# 카드번호로 볼 숫자 (마스킹된 451844******1234도 앞 4자리 이상은 숫자)
+CARD_NUMBER_PATTERN = r'\d{4}'
+
+def receipt_frame(records):
+    """receipt_record 목록을 문자열 열만 있는 DataFrame으로 만드는 함수 (None/누락 값은 빈 문자열)"""
+    # dtype=object로 만들어야 정수 금액과 None이 섞인 열이 7500.0 같은 실수로 바뀌지 않음
+    frame = pd.DataFrame(list(records), columns=RECORD_COLUMNS, dtype=object)
+    return frame.fillna('').astype(str).apply(lambda column: column.str.strip())
+
+def parse_dates(raw):
+    """날짜 문자열 열 → 결제 시각 열 (해석할 수 없으면 NaT, 시각이 없으면 0시 0분)"""
+    parts = raw.str.extract(DATE_PATTERN).apply(pd.to_numeric)
+    year = parts['year'].where(parts['year'] >= 100, parts['year'] + 2000)
+    return pd.to_datetime(pd.DataFrame({
+        'year': year, 'month': parts['month'], 'day': parts['day'],
+        'hour': parts['hour'].fillna(0), 'minute': parts['minute'].fillna(0),
+    }), errors='coerce')
+
+def parse_amounts(raw):
+    """금액 문자열 열 → 정수 열 (Int64, 정수가 아니거나 0 이하면 NA)"""
+    numbers = pd.to_numeric(raw.str.replace(AMOUNT_NOISE, '', regex=True), errors='coerce')
+    valid = numbers.notna() & (numbers > 0) & (numbers % 1 == 0)
+    return numbers.where(valid).astype('Int64')
+
+def company_key(raw):
+    """중복 비교용 업체명 (공백 제거 + 대문자, 예: 'GS25 역삼점' → 'GS25역삼점')"""
+    return raw.str.replace(r'\s+', '', regex=True).str.upper()
+
+def duplicate_of(filenames, stamps, companies, amounts):
+    """(결제 시각, 업체명, 금액)이 앞 영수증과 같으면 그 파일명, 아니면 빈 문자열인 열
+
+    세 값이 모두 있는 행만 비교 (추출에 실패해 빈 값끼리 같은 행은 중복이 아님)
+    """
+    valid = stamps.notna() & amounts.notna() & (companies != '')
+    keys = pd.DataFrame({'stamp': stamps, 'company': companies, 'amount': amounts})[valid]
+    hashes = pd.util.hash_pandas_object(keys, index=False)
+    first = filenames[valid].groupby(hashes).transform('first')
+    return first.where(hashes.duplicated(keep='first'), '').reindex(filenames.index, fill_value='')
+
+def postprocess_receipts(records, now=None):
+    """영수증 레코드 목록을 정규화/검증해 최종 CSV 열(OUTPUT_COLUMNS)의 DataFrame으로 만드는 함수
+
+    now: 미래 날짜 판단 기준 시각 (기본: 현재 시각)
+    """
+    frame = receipt_frame(records)
+    stamps = parse_dates(frame['a'])
+    amounts = parse_amounts(frame['c'])
+    companies = company_key(frame['b'])
+    duplicates = duplicate_of(frame['filename'], stamps, companies, amounts)
+
+    failed = frame['error'] != ''
+    checks = [
+        ('추출 실패', failed),
+        ('날짜 없음', ~failed & (frame['a'] == '')),
+        ('날짜 형식 오류', ~failed & (frame['a'] != '') & stamps.isna()),
+        ('미래 날짜', stamps > pd.Timestamp(now or datetime.now())),
+        ('업체명 없음', ~failed & (frame['b'] == '')),
+        ('금액 없음', ~failed & (frame['c'] == '')),
+        ('금액 오류', ~failed & (frame['c'] != '') & amounts.isna()),
+        ('카드정보 없음', ~failed & (frame['h'] == '')),
+        # 카드번호는 법인카드 판단에만 쓰임 (receipt_rules.apply_rules), 개인카드는 비고에 소유주 이름이 들어감
+        ('카드번호 없음', (frame['h'] != '') & frame['f'].isin(['법인카드', ''])
+                         & ~frame['h'].str.contains(CARD_NUMBER_PATTERN)),
+    ]
+    check = pd.Series('', index=frame.index)
+    for label, mask in checks:
+        check = check.mask(mask.fillna(False).astype(bool), check + label + ', ')
+    check = check.mask(duplicates != '', check + '중복(' + duplicates + '), ')
+
+    # 해석하지 못한 날짜/금액은 원본을 그대로 남김 (convert_date_format과 같은 동작)
+    return pd.DataFrame({
+        'filename': frame['filename'],
+        'date': ('(' + stamps.dt.strftime('%m/%d') + ')').where(stamps.notna(), frame['a']),
+        'purpose': frame['d'],
+        'company': frame['b'],
+        'price': amounts.astype(str).where(amounts.notna(), frame['c']),
+        'worker': frame['e'],
+        'note': frame['f'],
+        'check': check.str.rstrip(', '),
+    }, columns=OUTPUT_COLUMNS)
+
+def check_summary(results):
+    """check 열의 항목별 건수 ({'중복': 3, '금액 오류': 1, ...})"""
+    labels = results['check'][results['check'] != ''].str.split(', ').explode()
+    return labels.str.replace(r'\(.*\)$', '', regex=True).value_counts().to_dict()
+
+def write_results_csv(csv_filename, results):
+    """후처리 결과를 CSV로 저장하는 함수 (엑셀에서 한글이 깨지지 않도록 utf-8-sig)"""
+    results.to_csv(csv_filename, index=False, encoding='utf-8-sig')
+
+if __name__ == "__main__":
+    import sys
+    import time
+    import random
+    from gemini_ocr import receipt_row
+
+    # 합성 월말 배치로 영수증별 행 조립과 일괄 후처리 시간 비교 (API 호출 없음)
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    random.seed(0)
+    companies = ["GS25 역삼점", "탐앤탐스", "남원전통추어탕", "SK에너지 알뜰주유소", "청원", "오토김밥"]
+    date_formats = ["{y}-{m:02d}-{d:02d} {H:02d}:{M:02d}", "{y2}-{m:02d}-{d:02d}(화) {H:02d}:{M:02d}",
+                    "{y}/{m:02d}/{d:02d} {H:02d}:{M:02d}", ""]
+    amounts = [7500, "7,500원", "12000", "", "삼천원", 4500.5]
+    records = []
+    for i in range(count):
+        m, d, H, M = 7, random.randint(1, 31), random.randint(8, 22), random.randint(0, 59)
+        fmt = random.choices(date_formats, weights=[90, 4, 4, 2])[0]
+        card = random.choices(["신한카드법인 451844***", "국민카드 개인", "신한카드법인", ""], weights=[79, 18, 1, 2])[0]
+        records.append({
+            'filename': f"receipt_{i}.jpg",
+            'a': fmt.format(y=2025, y2=25, m=m, d=d, H=H, M=M),
+            'b': random.choice(companies),
+            'c': random.choices(amounts, weights=[40, 40, 16, 2, 1, 1])[0],
+            'h': card,
+            'd': "외근식대", 'e': "", 'f': "개인카드(손근영)" if card == "국민카드 개인" else "법인카드",
+        })
+    records += [dict(record, filename=f"copy_{record['filename']}") for record in records[:count // 100]]
+
+    start = time.time()
+    rows = [receipt_row(record) for record in records]
+    row_time = time.time() - start
+
+    start = time.time()
+    results = postprocess_receipts(records, now=datetime(2025, 8, 1))
+    batch_time = time.time() - start
+    print(f"영수증 {len(records)}장")
+    print(f"영수증별 행 조립(검증 없음): {row_time * 1000:.0f}ms")
+    print(f"일괄 후처리(정규화 + 검증 + 중복): {batch_time * 1000:.0f}ms")
+    print(f"확인 필요: {check_summary(results)}")
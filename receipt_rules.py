@@ -0,0 +1,147 @@
+"""
+영수증 분류 규칙 엔진
+
+모델이 판단할 필요가 없는 고정 규칙(야근식대 시간/주소 규칙, 법인카드 번호, 이니셜 → 이름,
+업체명 키워드 → 용도구분)을 조회 테이블과 정규식으로 컴파일해두고 로컬에서 적용합니다.
+규칙으로 결정할 수 없는 항목만 손글씨 힌트 호출이 필요합니다.
+"""
+
+import re
+
+# 용도구분 목록
+PURPOSES = ["외근식대", "야근식대", "유류대", "통행료", "주간식대", "교통비", "숙박비", "회식비", "부서간식대"]
+
+# 손글씨 힌트 키워드 → 용도구분 (위에서부터 먼저 일치하는 항목 적용)
+HINT_KEYWORDS = {
+    "야근식대": ["야근"],
+    "주간식대": ["주간"],
+    "외근식대": ["외근", "출장", "접대"],
+    "유류대": ["유류", "주유"],
+    "통행료": ["통행", "하이패스", "하이플러스", "도로공사"],
+    "숙박비": ["숙박", "무인텔", "모텔", "호텔"],
+    "교통비": ["교통", "택시", "운수"],
+    "회식비": ["회식"],
+    "부서간식대": ["간식"],
+}
+
+# 프린트된 업체명 키워드 → 용도구분 (손글씨 없이도 결정 가능한 경우)
+COMPANY_KEYWORDS = {
+    "유류대": ["주유소", "오일뱅크", "칼텍스", "S-OIL", "에쓰오일", "SK에너지", "알뜰주유"],
+    "통행료": ["하이플러스", "한국도로공사", "통행료", "하이패스"],
+    "숙박비": ["무인텔", "모텔", "호텔", "게스트하우스"],
+    "교통비": ["운수", "택시", "콜택시", "코레일", "SRT"],
+}
+
+# 야근식대 규칙: 결제시간이 17시30분 이후이고 주소가 영등포구
+NIGHT_MEAL_AFTER = (17, 30)
+NIGHT_MEAL_ADDRESS = ["영등포구"]
+
+# 법인카드 판단: 신한카드법인 카드번호 451844로 시작
+CORPORATE_CARD_PREFIXES = ["451844"]
+CORPORATE_CARD_KEYWORDS = ["법인", "법카"]
+
+# 영어 이니셜과 사람이름 매칭
+INITIALS_TO_NAME = {
+    "IH": "이인호", "DH": "이동혁", "SK": "양상관", "JH": "조준호", "HB": "안형범",
+    "KY": "손근영", "HS": "오형석", "YJ": "석영진", "GH": "이관희", "JY": "박주연",
+}
+
+def _keyword_regex(table):
+    """{용도: [키워드]} 테이블을 이름있는 그룹 하나의 정규식으로 컴파일하는 함수"""
+    groups = []
+    for index, keywords in enumerate(table.values()):
+        alternatives = "|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True))
+        groups.append(f"(?P<g{index}>{alternatives})")
+    return re.compile("|".join(groups), re.IGNORECASE), list(table.keys())
+
+# 모듈 로드 시 한 번만 컴파일
+_HINT_RE, _HINT_PURPOSES = _keyword_regex(HINT_KEYWORDS)
+_COMPANY_RE, _COMPANY_PURPOSES = _keyword_regex(COMPANY_KEYWORDS)
+_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})")
+_ADDRESS_RE = re.compile("|".join(re.escape(a) for a in NIGHT_MEAL_ADDRESS))
+# 법인카드 번호 앞자리: 숫자 덩어리의 맨 앞에서만 (승인번호 등 다른 숫자 중간의 451844는 제외)
+_CARD_NUMBER_RE = re.compile(r"(?<![\d*])(?:" + "|".join(re.escape(p) for p in CORPORATE_CARD_PREFIXES) + ")")
+# 구분자로 나뉜 카드번호 (4518-44**-****-1234, 4518 44** **** 1234). 앞 덩어리가 정확히 4자리인 경우만
+_CARD_GROUPS_RE = re.compile(r"(?<![\d*])[\d*]{4}(?:[\s-][\d*]{2,4}){1,3}(?![\d*])")
+_CORPORATE_RE = re.compile("|".join(re.escape(k) for k in CORPORATE_CARD_KEYWORDS))
+_NAME_RE = re.compile("|".join(INITIALS_TO_NAME.values()))
+_INITIALS_RE = re.compile(r"(?<![A-Za-z])(" + "|".join(INITIALS_TO_NAME) + r")(?![A-Za-z])", re.IGNORECASE)
+
+def normalize_card_number(text):
+    """카드번호 덩어리 사이의 구분자를 지우는 함수 (4518-44**-****-1234 → 451844******1234)"""
+    return _CARD_GROUPS_RE.sub(lambda match: re.sub(r"[\s-]", "", match.group()), text)
+
+def _match_purpose(regex, purposes, text):
+    """컴파일된 키워드 정규식으로 용도구분을 찾는 함수 (가장 앞선 규칙 우선)"""
+    if not text:
+        return None
+    found = [int(m.lastgroup[1:]) for m in regex.finditer(text)]
+    return purposes[min(found)] if found else None
+
+def resolve_person_name(text):
+    """사람이름 혹은 영어 이니셜 2글자를 사람이름 3글자로 변환하는 함수 (없으면 None)"""
+    if not text:
+        return None
+    match = _NAME_RE.search(text)
+    if match:
+        return match.group(0)
+    match = _INITIALS_RE.search(text)
+    if match:
+        return INITIALS_TO_NAME[match.group(1).upper()]
+    return None
+
+def is_night_meal(front_info):
+    """결제시간이 17시30분 이후이고 주소가 영등포구이면 True를 반환하는 함수"""
+    match = _TIME_RE.search(str(front_info.get('a', '')))
+    if not match:
+        return False
+    if (int(match.group(1)), int(match.group(2))) < NIGHT_MEAL_AFTER:
+        return False
+    return bool(_ADDRESS_RE.search(str(front_info.get('i', ''))))
+
+def apply_rules(front_info, hints=None):
+    """프린트된 정보(와 손글씨 힌트)로 d, e, f를 결정하는 함수
+
+    반환값: ({"d": ..., "e": ..., "f": ...}, 결정하지 못한 항목 리스트)
+    hints가 None이면 프린트 정보만으로 판단하고, 결정하지 못한 항목은 빈 문자열로 남깁니다.
+    """
+    hints = hints or {}
+    purpose_hint = str(hints.get('purpose_hint', '') or '')
+    worker_hint = str(hints.get('worker_hint', '') or '')
+    card_hint = str(hints.get('card_hint', '') or '')
+    card_info = str(front_info.get('h', '') or '')
+    missing = []
+
+    # d) 용도구분: 손글씨 → 야근 규칙 → 업체명 키워드 → 손글씨 원문
+    purpose = _match_purpose(_HINT_RE, _HINT_PURPOSES, purpose_hint)
+    if purpose is None and is_night_meal(front_info):
+        purpose = "야근식대"
+    if purpose is None:
+        purpose = _match_purpose(_COMPANY_RE, _COMPANY_PURPOSES, str(front_info.get('b', '')))
+    if purpose is None and purpose_hint.strip():
+        purpose = purpose_hint.strip()  # 분류할 수 없으면 손글씨 그대로
+    if purpose is None:
+        purpose = ""
+        missing.append('d')
+
+    # e) 야근자: 야근식대인 경우만 (손글씨로만 알 수 있음)
+    worker = ""
+    if purpose == "야근식대":
+        worker = resolve_person_name(worker_hint) or worker_hint.strip()
+        if not worker:
+            missing.append('e')
+
+    # f) 비고: 카드번호/카드사 정보로 법인카드 판단, 개인카드는 소유주 이름 포함
+    if _CARD_NUMBER_RE.search(normalize_card_number(card_info)) or _CORPORATE_RE.search(card_info) or _CORPORATE_RE.search(card_hint):
+        note = "법인카드"
+    else:
+        owner = resolve_person_name(card_hint) or resolve_person_name(card_info)
+        if owner:
+            note = f"개인카드({owner})"
+        elif "개인" in card_hint:
+            note = "개인카드"
+        else:
+            note = ""
+            missing.append('f')
+
+    return {"d": purpose, "e": worker, "f": note}, missing
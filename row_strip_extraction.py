@@ -0,0 +1,165 @@
+"""
+행 띠(row strip) 단위 OCR 방식
+
+표 전체를 한 번에 보내는 방식(느리고 병합셀에 약함)과 셀마다 보내는 방식(호출 수가 많음)의 중간으로,
+검출된 행/열 격자를 이용해 N개 행씩 가로 띠로 잘라 보내고 응답을 바로 셀에 매핑합니다.
+여러 띠에 걸친 병합셀은 띠 이미지에서 지우고 따로 한 번만 OCR하며, 스팬 복제는 로컬에서 처리합니다.
+"""
+
+import cv2
+from concurrent.futures import ThreadPoolExecutor
+
+from gemini_client import make_client, generate_content, parse_json_response
+from upload_prep import prepare_upload
+from table_cv_extraction import (
+    detect_horizontal_lines, calculate_row_height, detect_vertical_lines,
+    detect_table_cells, extract_text_from_cell,
+)
+
+# 격자 좌표를 하나로 묶는 허용 오차 (px)
+LATTICE_TOLERANCE = 5
+
+def cluster_positions(values, tolerance=LATTICE_TOLERANCE):
+    """가까운 좌표들을 하나로 묶어 정렬된 대표 좌표 목록을 반환하는 함수"""
+    groups = []
+    for value in sorted(values):
+        if groups and value - groups[-1][-1] <= tolerance:
+            groups[-1].append(value)
+        else:
+            groups.append([value])
+    return [int(round(sum(group) / len(group))) for group in groups]
+
+def build_lattice(cell_boxes, img_shape):
+    """셀 박스들의 경계로 행 경계(ys)와 열 경계(xs)를 만드는 함수"""
+    height, width = img_shape[:2]
+    # 표 전체를 감싸는 외곽 박스는 격자에서 제외
+    boxes = [box for box in cell_boxes if not (box[2] >= 0.9 * width and box[3] >= 0.5 * height)]
+    ys = cluster_positions([box[1] for box in boxes] + [box[1] + box[3] for box in boxes])
+    xs = cluster_positions([box[0] for box in boxes] + [box[0] + box[2] for box in boxes])
+    return boxes, ys, xs
+
+def locate_cell(box, ys, xs):
+    """셀 박스가 차지하는 격자 행 목록과 열 인덱스를 반환하는 함수"""
+    x, y, w, h = box
+    rows = [i for i in range(len(ys) - 1) if y <= (ys[i] + ys[i + 1]) / 2 <= y + h]
+    cols = [j for j in range(len(xs) - 1) if x <= (xs[j] + xs[j + 1]) / 2 <= x + w]
+    return rows, (cols[0] if cols else None)
+
+def strip_prompt(num_rows, num_cols):
+    """행 띠 OCR 프롬프트"""
+    return f"""
+                이 이미지는 표의 일부로, 위에서부터 {num_rows}개 행과 왼쪽부터 {num_cols}개 열로 되어 있습니다. 열 구분은 세로선입니다.
+                각 행의 각 열 셀 텍스트를 정확하게 읽어주세요. 빈 셀은 빈 문자열("")입니다.
+                여러 행에 걸쳐 병합된 셀은 글자가 보이는 행에만 쓰고 나머지 행은 빈 문자열로 두세요.
+                텍스트에서 불필요한 공백은 제거하세요. ex) 12 - D10 → 12-D10, D10 @250 → D10@250, 6F ~ 7F → 6F~7F
+
+                행 {num_rows}개, 각 행마다 값 {num_cols}개인 JSON으로 정확히 반환해주세요:
+                {{"rows": [["행1열1값", "행1열2값", ...], ...]}}
+                """
+
+def ocr_strip(client, img, ys, xs, first_row, last_row, masked_boxes, row_height, hedge=None):
+    """격자 행 first_row~last_row(포함)를 띠로 잘라 OCR하고 행별 값 목록을 반환하는 함수 (실패 시 None)"""
+    top, bottom = ys[first_row], ys[last_row + 1]
+    left, right = xs[0], xs[-1]
+    strip = img[top:bottom, left:right].copy()
+    # 띠 밖으로 이어지는 병합셀은 따로 OCR하므로 띠에서는 지움
+    for x, y, w, h in masked_boxes:
+        y0, y1 = max(top, y + 2) - top, min(bottom, y + h - 2) - top
+        x0, x1 = x + 2 - left, x + w - 2 - left
+        if y1 > y0 and x1 > x0:
+            strip[y0:y1, x0:x1] = 255
+
+    num_rows, num_cols = last_row - first_row + 1, len(xs) - 1
+    try:
+        from google.genai import types
+
+        image_bytes, mime_type, _ = prepare_upload(strip, row_height=row_height)
+        response = generate_content(
+            client,
+            hedge,
+            model="gemini-2.5-pro",
+            contents=[
+                types.Part.from_bytes(data=image_bytes, mime_type=mime_type),
+                strip_prompt(num_rows, num_cols),
+            ],
+        )
+        rows = parse_json_response(response.text).get("rows", [])
+    except Exception as e:
+        print(f"행 띠 {first_row}~{last_row} OCR 오류: {e}")
+        return None
+    if len(rows) != num_rows or any(len(row) != num_cols for row in rows):
+        print(f"행 띠 {first_row}~{last_row}: 응답 크기 불일치 ({len(rows)}행) - 셀 단위로 재시도합니다.")
+        return None
+    return [[str(value).strip() for value in row] for row in rows]
+
+def extract_table_rowstrips(api_key, image_path, rows_per_strip=1, max_workers=4, bbox=None, hedge=None):
+    """행 띠 단위로 OCR하여 테이블을 추출하는 함수 (반환 형식은 extract_table_with_cv와 같음, hedge: gemini_client.HedgePolicy)"""
+    print(f"행 띠 방식({rows_per_strip}행/요청)으로 테이블 추출 시작: {image_path}")
+    img = cv2.imread(image_path)
+    if img is None:
+        raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
+    if bbox is not None:
+        x, y, w, h = bbox
+        img = img[y:y+h, x:x+w]
+
+    # 1단계: 격자 검출
+    horiz_lines, bin_img, _ = detect_horizontal_lines(img)
+    row_height = calculate_row_height(horiz_lines)
+    vert_lines = detect_vertical_lines(bin_img)
+    boxes, ys, xs = build_lattice(detect_table_cells(img, horiz_lines, vert_lines), img.shape)
+    num_rows, num_cols = len(ys) - 1, len(xs) - 1
+    if num_rows < 1 or num_cols < 1:
+        return {'headers': [], 'rows': []}
+    print(f"격자: {num_rows}행 x {num_cols}열")
+
+    located = []
+    for box in boxes:
+        rows, col = locate_cell(box, ys, xs)
+        if rows and col is not None:
+            located.append((box, rows, col))
+
+    # 2단계: 띠 구성 및 띠 경계를 넘는 병합셀 분리
+    strips = [(start, min(num_rows, start + rows_per_strip) - 1) for start in range(0, num_rows, rows_per_strip)]
+    crossing = [(box, rows, col) for box, rows, col in located
+                if any(rows[0] < first <= rows[-1] for first, _ in strips[1:])]
+
+    grid = [['' for _ in range(num_cols)] for _ in range(num_rows)]
+    client = make_client(api_key)
+
+    # 3단계: 띠 OCR과 병합셀 OCR을 동시에 실행
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        strip_futures = {}
+        for first, last in strips:
+            masked = [box for box, rows, _ in crossing if rows[0] <= last and rows[-1] >= first]
+            strip_futures[(first, last)] = executor.submit(ocr_strip, client, img, ys, xs, first, last, masked, row_height, hedge)
+        merged_futures = [(rows, col, executor.submit(extract_text_from_cell, img, box, api_key, row_height, None, hedge))
+                          for box, rows, col in crossing]
+
+        for (first, last), future in strip_futures.items():
+            values = future.result()
+            if values is None:
+                # 응답이 격자와 맞지 않으면 이 띠의 셀만 셀 단위로 OCR
+                crossing_boxes = {box for box, _, _ in crossing}
+                for box, rows, col in located:
+                    if box not in crossing_boxes and first <= rows[0] and rows[-1] <= last:
+                        grid[rows[0]][col] = extract_text_from_cell(img, box, api_key, row_height, hedge=hedge)
+                continue
+            for offset, row in enumerate(values):
+                grid[first + offset] = row
+
+        for rows, col, future in merged_futures:
+            for row in rows:
+                grid[row][col] = future.result()
+
+    # 4단계: 띠 안의 병합셀은 보이는 값을 스팬 전체에 복제
+    for box, rows, col in located:
+        if len(rows) > 1:
+            value = next((grid[row][col] for row in rows if grid[row][col]), '')
+            for row in rows:
+                grid[row][col] = value
+
+    # 5단계: 빈 행 제거 후 헤더와 데이터 분리
+    grid = [row for row in grid if any(row)]
+    if not grid:
+        return {'headers': [], 'rows': []}
+    return {'headers': grid[0], 'rows': grid[1:]}
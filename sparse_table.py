@@ -0,0 +1,174 @@
+"""
+병합 셀을 한 번만 저장하는 희소 표 모델
+
+컴퓨터 비전 방식은 세로로 병합된 셀(수직철근, 수평철근 등)을 행 수만큼 복제해 밀집(dense) 표로 만들었습니다.
+긴 병합이 많은 표는 저장/비교 비용이 행 수만큼 늘어나므로, 여기서는 셀을 (행, 열, 행 스팬, 텍스트)로 한 번만 저장하고
+열별로 시작 행을 정렬해 두어 행 구간 조회를 이분 탐색으로 처리합니다. 복제된 행 목록은 필요할 때만 만듭니다.
+
+SparseTable은 {'headers', 'rows', 'spans'} 키를 가진 읽기 전용 매핑이므로 기존 코드(result['rows'] 등)는 그대로 동작하고,
+'rows'에 처음 접근할 때만 병합 셀을 펼칩니다. 'spans'는 펼치지 않은 셀 목록입니다.
+
+내보내기 형식 (JSON Lines, 표 하나당 한 줄):
+    {"source": "...", "headers": [...], "n_rows": 12, "n_cols": 6, "cells": [[행, 열, 행스팬, "텍스트"], ...]}
+행 번호는 헤더 다음 데이터 행부터 0으로 시작합니다.
+"""
+
+import json
+import bisect
+from collections import namedtuple
+from collections.abc import Mapping
+
+Cell = namedtuple("Cell", ["row", "col", "rowspan", "text"])
+
+class SparseTable(Mapping):
+    """병합 셀을 (row, col, rowspan, text)로 한 번만 저장하는 표"""
+
+    def __init__(self, headers, n_rows, n_cols=None, cells=()):
+        self.headers = list(headers)
+        self.n_rows = n_rows
+        self.n_cols = len(self.headers) if n_cols is None else n_cols
+        self._columns = {}       # 열 → 시작 행 순으로 정렬된 셀 목록
+        self._starts = {}        # 열 → 시작 행 목록 (이분 탐색용)
+        self._rows = None        # 펼친 행 캐시
+        for cell in cells:
+            self.add(*cell)
+
+    def add(self, row, col, text, rowspan=1):
+        """셀을 추가하는 함수 (같은 열에서 구간이 겹치면 나중 셀이 앞 셀의 겹친 부분을 덮음)"""
+        if rowspan < 1 or not 0 <= col < self.n_cols or not 0 <= row < self.n_rows:
+            raise ValueError(f"표 범위를 벗어난 셀입니다: 행 {row}, 열 {col}, 스팬 {rowspan}")
+        rowspan = min(rowspan, self.n_rows - row)
+        cells = self._columns.setdefault(col, [])
+
+        # 겹치는 기존 셀은 겹치지 않는 앞/뒤 조각만 남김 (밀집 표에 나중 셀을 덮어쓰던 동작과 동일)
+        end = row + rowspan
+        kept = []
+        for old in self._overlapping(col, row, end):
+            cells.remove(old)
+            if old.row < row:
+                kept.append(old._replace(rowspan=row - old.row))
+            if old.row + old.rowspan > end:
+                kept.append(Cell(end, col, old.row + old.rowspan - end, old.text))
+        cells.extend(kept + [Cell(row, col, rowspan, text)])
+        cells.sort(key=lambda cell: cell.row)
+        self._starts[col] = [cell.row for cell in cells]
+        self._rows = None
+
+    def _overlapping(self, col, start, stop):
+        """col 열에서 [start, stop) 행 구간과 겹치는 셀 목록 (같은 열의 셀은 서로 겹치지 않음)"""
+        cells = self._columns.get(col, [])
+        index = bisect.bisect_left(self._starts.get(col, []), stop) - 1
+        found = []
+        while index >= 0 and cells[index].row + cells[index].rowspan > start:
+            found.append(cells[index])
+            index -= 1
+        return found[::-1]
+
+    def cell_text(self, row, col, default=None):
+        """(row, col) 위치를 덮는 셀의 텍스트"""
+        found = self._overlapping(col, row, row + 1)
+        return found[0].text if found else default
+
+    def cells_in_rows(self, start, stop):
+        """[start, stop) 행 구간과 겹치는 셀 목록 (열 순서, 같은 열 안에서는 행 순서)"""
+        return [cell for col in sorted(self._columns) for cell in self._overlapping(col, start, stop)]
+
+    def cells(self):
+        """모든 셀 목록 (행, 열 순서)"""
+        return sorted((cell for cells in self._columns.values() for cell in cells), key=lambda cell: (cell.row, cell.col))
+
+    def expand(self):
+        """병합 셀을 복제해 밀집 행 목록으로 펼치는 함수 (빈 칸은 '')"""
+        if self._rows is None:
+            rows = [[''] * self.n_cols for _ in range(self.n_rows)]
+            for cells in self._columns.values():
+                for cell in cells:
+                    for row in range(cell.row, cell.row + cell.rowspan):
+                        rows[row][cell.col] = cell.text
+            self._rows = rows
+        return self._rows
+
+    def __getitem__(self, key):
+        if key == 'headers':
+            return self.headers
+        if key == 'rows':
+            return self.expand()
+        if key == 'spans':
+            return [list(cell) for cell in self.cells()]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(('headers', 'rows', 'spans'))
+
+    def __len__(self):
+        return 3
+
+    def to_record(self, source=None):
+        """스팬을 유지한 내보내기 레코드"""
+        record = {"headers": self.headers, "n_rows": self.n_rows, "n_cols": self.n_cols, "cells": self['spans']}
+        if source is not None:
+            record = {"source": source, **record}
+        return record
+
+    @classmethod
+    def from_record(cls, record):
+        """to_record로 내보낸 레코드에서 표를 복원하는 함수"""
+        return cls(record["headers"], record["n_rows"], record.get("n_cols"),
+                   ((row, col, text, rowspan) for row, col, rowspan, text in record["cells"]))
+
+    @classmethod
+    def from_dense(cls, headers, rows):
+        """밀집 행 목록에서 같은 열의 연속된 같은 값을 하나의 병합 셀로 묶어 만드는 함수
+
+        원래 병합 셀이었는지 값이 우연히 반복된 것인지는 구분하지 않습니다. (AI 방식 결과 비교용)
+        """
+        n_cols = max([len(headers)] + [len(row) for row in rows])
+        table = cls(headers, len(rows), n_cols)
+        for col in range(n_cols):
+            start = 0
+            for row in range(1, len(rows) + 1):
+                value = rows[start][col] if col < len(rows[start]) else ''
+                current = rows[row][col] if row < len(rows) and col < len(rows[row]) else None
+                if current != value:
+                    if value not in ('', None):
+                        table.add(start, col, value, row - start)
+                    start = row
+        return table
+
+def split_header(page_table):
+    """페이지 행 기준 표에서 빈 행을 지우고 첫 행을 헤더로 분리한 표를 만드는 함수
+
+    헤더 행에서 시작해 아래로 이어지는 병합 셀은 데이터 행 부분만 스팬으로 남깁니다.
+    """
+    occupied = sorted({row for cell in page_table.cells() for row in range(cell.row, cell.row + cell.rowspan)})
+    if not occupied:
+        return SparseTable([], 0, 0)
+    # 빈 행을 건너뛴 새 행 번호 (헤더 행은 -1)
+    new_index = {row: index - 1 for index, row in enumerate(occupied)}
+    header_row = occupied[0]
+    headers = [page_table.cell_text(header_row, col, '') for col in range(page_table.n_cols)]
+
+    table = SparseTable(headers, len(occupied) - 1, page_table.n_cols)
+    for cell in page_table.cells():
+        # 병합 셀이 덮는 행은 모두 비어 있지 않으므로 새 번호에서도 연속됨
+        start, stop = new_index[cell.row], new_index[cell.row + cell.rowspan - 1] + 1
+        start = max(start, 0)
+        if stop > start:
+            table.add(start, cell.col, cell.text, stop - start)
+    return table
+
+def write_span_jsonl(path, tables):
+    """[(이름, 표)] 목록을 스팬 유지 형식(JSON Lines)으로 저장하는 함수"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for source, table in tables:
+            f.write(json.dumps(table.to_record(source), ensure_ascii=False) + "\n")
+
+def read_span_jsonl(path):
+    """write_span_jsonl로 저장한 파일을 [(이름, SparseTable)] 목록으로 읽는 함수"""
+    tables = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                tables.append((record.get("source"), SparseTable.from_record(record)))
+    return tables
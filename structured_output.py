@@ -0,0 +1,185 @@
+"""
+JSON 스키마 제약 출력과 스트리밍 응답 파싱
+
+- 응답 스키마(response_schema)와 application/json 응답 형식을 지정해 코드블록/잘못된 JSON을 방지
+- 표 응답은 스트리밍으로 받으면서 행 배열이 닫힐 때마다 바로 파싱해 내보냄 (응답이 끝나기 전에 하류로 전달)
+- 응답이 중간에 잘리면(MAX_TOKENS, 연결 끊김, 깨진 JSON) 이미 받은 행은 유지하고 나머지 행만 다시 요청
+"""
+
+import json
+
+from gemini_client import generate_content_stream
+
+# 잘린 응답에 대해 나머지 행을 다시 요청하는 최대 횟수
+MAX_CONTINUATIONS = 3
+# 이어받기 프롬프트에 넣을 마지막 행 개수 (위치 기준점)
+ANCHOR_ROWS = 2
+
+def table_schema():
+    """표 응답 스키마 ({"headers": [...], "rows": [[...], ...]}, headers가 먼저 오도록 순서 고정)"""
+    from google.genai import types
+
+    strings = types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING))
+    return types.Schema(
+        type=types.Type.OBJECT,
+        properties={"headers": strings, "rows": types.Schema(type=types.Type.ARRAY, items=strings)},
+        required=["headers", "rows"],
+        property_ordering=["headers", "rows"],
+    )
+
+def rows_schema():
+    """이어받기 응답 스키마 ({"rows": [[...], ...]})"""
+    from google.genai import types
+
+    strings = types.Schema(type=types.Type.ARRAY, items=types.Schema(type=types.Type.STRING))
+    return types.Schema(
+        type=types.Type.OBJECT,
+        properties={"rows": types.Schema(type=types.Type.ARRAY, items=strings)},
+        required=["rows"],
+    )
+
+def object_schema(keys, integer_keys=()):
+    """평평한 문자열 필드 객체 스키마 (영수증 응답용, integer_keys는 정수 또는 null)"""
+    from google.genai import types
+
+    properties = {
+        key: types.Schema(type=types.Type.INTEGER, nullable=True) if key in integer_keys else types.Schema(type=types.Type.STRING)
+        for key in keys
+    }
+    return types.Schema(type=types.Type.OBJECT, properties=properties, required=list(keys), property_ordering=list(keys))
+
+def json_config(schema, **kwargs):
+    """스키마 제약 JSON 출력 설정"""
+    from google.genai import types
+
+    return types.GenerateContentConfig(response_mime_type="application/json", response_schema=schema, **kwargs)
+
+class TableRowStream:
+    """{"headers": [...], "rows": [[...], ...]} 형태의 JSON 텍스트를 조각 단위로 받아 완성된 행을 돌려주는 파서
+
+    문자열/이스케이프와 괄호 깊이만 추적하므로 앞뒤에 코드블록 표시가 섞여 있어도 동작합니다.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.stack = []          # 열린 괄호와 그 값의 키 [(문자, 키)]
+        self.in_string = False
+        self.escape = False
+        self.string_start = None
+        self.last_string = None
+        self.key = None          # 최상위 객체에서 마지막으로 읽은 키
+        self.item_start = None
+        self.headers = None
+        self.rows = []
+        self.complete = False
+
+    def feed(self, text):
+        """텍스트 조각을 추가하고 새로 완성된 행 목록을 반환하는 함수 (깨진 행이면 ValueError)"""
+        self.buffer += text
+        new_rows = []
+        buffer = self.buffer
+        for pos in range(self.pos, len(buffer)):
+            char = buffer[pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                    self.last_string = buffer[self.string_start:pos + 1]
+                continue
+            if char == '"':
+                self.in_string = True
+                self.string_start = pos
+            elif char == ":" and len(self.stack) == 1:
+                self.key = json.loads(self.last_string)
+            elif char in "[{":
+                self.stack.append((char, self.key if len(self.stack) == 1 else None))
+                if char == "[" and self._in_array("headers", depth=2):
+                    self.item_start = pos
+                elif char == "[" and len(self.stack) == 3 and self.stack[1] == ("[", "rows"):
+                    self.item_start = pos
+            elif char in "]}":
+                if not self.stack:
+                    continue
+                if len(self.stack) == 3 and self.stack[1] == ("[", "rows"):
+                    row = json.loads(buffer[self.item_start:pos + 1])
+                    self.rows.append(row)
+                    new_rows.append(row)
+                elif self._in_array("headers", depth=2):
+                    self.headers = json.loads(buffer[self.item_start:pos + 1])
+                self.stack.pop()
+                if not self.stack:
+                    self.complete = True
+        self.pos = len(buffer)
+        return new_rows
+
+    def _in_array(self, key, depth):
+        return len(self.stack) == depth and self.stack[-1] == ("[", key)
+
+def continuation_prompt(headers, rows):
+    """잘린 응답 이후의 행만 다시 요청하는 프롬프트"""
+    anchor = json.dumps(rows[-ANCHOR_ROWS:], ensure_ascii=False)
+    return f"""
+                앞선 응답이 중간에 끊겼습니다. 같은 표에서 이미 {len(rows)}개의 데이터 행을 받았습니다.
+                열 제목은 {json.dumps(headers, ensure_ascii=False)} 입니다.
+                이미 받은 마지막 행은 다음과 같습니다: {anchor}
+                이 행들 바로 다음 행부터 표의 끝까지, 같은 규칙으로 나머지 행만 추출해주세요. 이미 받은 행은 반복하지 마세요.
+
+                다음 JSON 형식으로 정확히 반환해주세요:
+                {{"rows": [["행값", ...], ...]}}
+                """
+
+def stream_rows(client, model, contents, parser, on_row=None, config=None, hedge=None):
+    """스트리밍 응답을 parser에 넣으면서 완성된 행마다 on_row를 호출하는 함수
+
+    hedge: gemini_client.HedgePolicy (첫 조각이 늦은 스트림 헤징)
+
+    반환값: 응답이 끝까지 온전하게 왔으면 True, 잘렸거나 JSON이 깨졌으면 False
+    """
+    finish_reason = None
+    try:
+        for chunk in generate_content_stream(client, hedge, model=model, contents=contents, config=config):
+            if chunk.candidates and chunk.candidates[0].finish_reason:
+                finish_reason = chunk.candidates[0].finish_reason
+            for row in parser.feed(chunk.text or ""):
+                if on_row is not None:
+                    on_row(row)
+    except ValueError as e:
+        print(f"스트리밍 응답 파싱 오류 (받은 행까지 유지): {e}")
+        return False
+    except Exception as e:
+        if not parser.rows:
+            raise
+        print(f"스트리밍 응답 중단 (받은 행 {len(parser.rows)}개 유지): {e}")
+        return False
+    return parser.complete and str(finish_reason or "STOP").endswith("STOP")
+
+def extract_table_streaming(client, model, contents, on_row=None, max_continuations=MAX_CONTINUATIONS, hedge=None):
+    """표를 스트리밍으로 추출하고, 잘린 경우 나머지 행만 이어서 요청하는 함수
+
+    contents: 이미지 파트와 프롬프트 (이어받기 요청에서는 이미지 파트만 재사용)
+    on_row: 행이 완성될 때마다 호출되는 콜백 (응답이 끝나기 전에 하류 처리 시작 가능)
+    hedge: gemini_client.HedgePolicy (이어받기 요청 포함)
+    """
+    parser = TableRowStream()
+    complete = stream_rows(client, model, contents, parser, on_row, json_config(table_schema()), hedge)
+    if parser.headers is None:
+        raise ValueError("응답에서 표 헤더를 읽지 못했습니다.")
+
+    headers, rows = parser.headers, list(parser.rows)
+    image_parts = [part for part in contents if not isinstance(part, str)]
+    for attempt in range(max_continuations):
+        if complete:
+            break
+        print(f"응답이 잘렸습니다. {len(rows)}행 이후만 다시 요청합니다. ({attempt + 1}/{max_continuations})")
+        # 이어받기 응답도 같은 파서를 쓰되 헤더 없이 {"rows": ...}만 받음
+        continuation = TableRowStream()
+        complete = stream_rows(client, model, image_parts + [continuation_prompt(headers, rows)],
+                               continuation, on_row, json_config(rows_schema()), hedge)
+        if not continuation.rows:
+            break
+        rows.extend(continuation.rows)
+    return {'headers': headers, 'rows': rows}
@@ -1,32 +1,38 @@
 import cv2
 import numpy as np
-import pandas as pd
-from PIL import Image
 import os
-from google import genai
-from google.genai import types
-import json
-import re
+from gemini_client import make_client, generate_content
+from upload_prep import prepare_upload
+from layout_templates import find_header_cells, header_fingerprint
+from tiled_lines import detect_lines_tiled, load_gray
+from deskew import deskew_page
+from sparse_table import SparseTable, split_header
+from page_params import DEFAULT_PARAMS, binarize, document_params
+from debug_artifacts import debug_writer
 
-def detect_horizontal_lines(img):
-    """수평선을 검출하여 행 경계를 찾는 함수"""
+def detect_horizontal_lines(img, params=DEFAULT_PARAMS):
+    """수평선을 검출하여 행 경계를 찾는 함수 (params: page_params.PageParams, 기본값은 200dpi 기준 고정값)"""
     # 그레이스케일 변환
     if len(img.shape) == 3:
         gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
     else:
         gray = img.copy()
     
-    # 이진화 (OTSU 방법)
-    _, bin_img = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    # 이진화 (OTSU 방법, 배경이 고르지 않은 문서는 적응형)
+    bin_img = binarize(gray, params)
     
-    # 수평선만 추출하기 위한 커널 (길이 40, 높이 1)
-    horiz_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
+    # 수평선만 추출하기 위한 커널 (기본 길이 40, 높이 1)
+    horiz_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, params.horizontal_kernel)
     horiz_lines = cv2.morphologyEx(bin_img, cv2.MORPH_OPEN, horiz_kernel)
     
     return horiz_lines, bin_img, gray
 
-def calculate_row_height(horiz_lines):
-    """수평선으로부터 평균 행 높이를 계산하는 함수"""
+def calculate_row_height(horiz_lines, default=50, min_gap=0):
+    """수평선으로부터 평균 행 높이를 계산하는 함수
+
+    default: 수평선이 부족할 때 사용할 값
+    min_gap: 이 값 이하의 간격은 같은 선(여러 표의 같은 높이 선, 두꺼운 선의 조각)으로 보고 제외
+    """
     contours, _ = cv2.findContours(horiz_lines, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
     
     # 수평선의 y 좌표들 수집
@@ -37,11 +43,15 @@ def calculate_row_height(horiz_lines):
     
     if len(ys) < 2:
         print("Warning: 충분한 수평선을 찾을 수 없습니다. 기본값을 사용합니다.")
-        return 50  # 기본값
+        return default
     
     ys = sorted(ys)
     # 인접한 y 좌표 간의 차이 계산
     row_heights = np.diff(ys)
+    if min_gap:
+        row_heights = row_heights[row_heights > min_gap]
+        if len(row_heights) == 0:
+            return default
     
     # 이상치 제거 (너무 작거나 큰 값들)
     median_height = np.median(row_heights)
@@ -55,22 +65,19 @@ def calculate_row_height(horiz_lines):
     print(f"평균 행 높이: {avg_row_height:.1f}px")
     return avg_row_height
 
-def detect_vertical_lines(bin_img):
+def detect_vertical_lines(bin_img, params=DEFAULT_PARAMS):
     """수직선을 검출하여 열 경계를 찾는 함수"""
-    # 수직선 추출을 위한 커널 (길이 1, 높이 20)
-    vert_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 20))
+    # 수직선 추출을 위한 커널 (기본 길이 1, 높이 20)
+    vert_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, params.vertical_kernel)
     vert_lines = cv2.morphologyEx(bin_img, cv2.MORPH_OPEN, vert_kernel)
     
     return vert_lines
 
-def detect_table_cells(img, horiz_lines, vert_lines):
+def detect_table_cells(img, horiz_lines, vert_lines, params=DEFAULT_PARAMS):
     """수평선과 수직선을 결합하여 셀 영역을 검출하는 함수"""
     # 수평선과 수직선 결합
     table_mask = cv2.add(horiz_lines, vert_lines)
     
-    # 셀 영역 검출을 위해 테이블 마스크를 이용하여 그리드 생성
-    joints = cv2.bitwise_and(horiz_lines, vert_lines)
-    
     # 컨투어 검출로 셀 영역들 찾기
     contours, _ = cv2.findContours(table_mask, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
     
@@ -78,7 +85,7 @@ def detect_table_cells(img, horiz_lines, vert_lines):
     for cnt in contours:
         x, y, w, h = cv2.boundingRect(cnt)
         # 너무 작은 영역은 제외
-        if w > 20 and h > 10:
+        if w > params.min_cell_width and h > params.min_cell_height:
             cell_boxes.append((x, y, w, h))
     
     # x 좌표로 정렬하여 열 순서대로 배치
@@ -86,6 +93,17 @@ def detect_table_cells(img, horiz_lines, vert_lines):
     
     return cell_boxes
 
+def table_columns(cell_boxes):
+    """열 시작 위치 목록 (셀 왼쪽 경계 x 좌표를 모두 모아 정렬)"""
+    return sorted(set(box[0] for box in cell_boxes))
+
+def column_index(x_coords, x, tolerance):
+    """셀 왼쪽 경계 x가 허용 오차 안에 들어오는 첫 번째 열 번호 (없으면 0)"""
+    for j, x_coord in enumerate(x_coords):
+        if abs(x - x_coord) < tolerance:
+            return j
+    return 0
+
 def calculate_cell_span(cell_box, row_height):
     """셀의 높이로부터 스팬(몇 개 행을 차지하는지)을 계산하는 함수"""
     x, y, w, h = cell_box
@@ -94,79 +112,179 @@ def calculate_cell_span(cell_box, row_height):
     
     return span, start_row
 
-def extract_text_from_cell(img, cell_box, api_key):
-    """개별 셀에서 OCR로 텍스트를 추출하는 함수"""
+CELL_OCR_MODEL = "gemini-2.5-pro"
+CELL_OCR_PROMPT = "이 이미지에서 텍스트를 정확히 추출해주세요. 공백은 제거하고 의미있는 내용만 반환하세요. 빈 이미지라면 빈 문자열을 반환하세요."
+
+def crop_cell(img, cell_box, padding=2):
+    """셀 이미지를 여백을 두고 잘라내는 함수"""
     x, y, w, h = cell_box
-    
+    return img[max(0, y-padding):min(img.shape[0], y+h+padding), 
+               max(0, x-padding):min(img.shape[1], x+w+padding)]
+
+def cell_ocr_contents(cell_img, row_height=None):
+    """셀 OCR 요청 내용 (이미지 파트와 프롬프트)"""
+    from google.genai import types
+
+    # 업로드용으로 축소/이진화하여 메모리에서 인코딩 (임시 파일 사용 안 함)
+    image_bytes, mime_type, _ = prepare_upload(cell_img, row_height=row_height)
+    return [types.Part.from_bytes(data=image_bytes, mime_type=mime_type), CELL_OCR_PROMPT]
+
+def ocr_cell_image(cell_img, api_key, row_height=None, hedge=None):
+    """셀 이미지를 Gemini로 OCR하는 함수 (오류는 호출한 쪽으로 전달, hedge: gemini_client.HedgePolicy)"""
+    # Gemini API로 OCR 수행
+    client = make_client(api_key)
+
+    response = generate_content(
+        client,
+        hedge,
+        model=CELL_OCR_MODEL,
+        contents=cell_ocr_contents(cell_img, row_height),
+    )
+    
+    return response.text.strip()
+
+def extract_text_from_cell(img, cell_box, api_key, row_height=None, dedup_index=None, hedge=None):
+    """개별 셀에서 OCR로 텍스트를 추출하는 함수
+
+    dedup_index: cell_dedup.CellDedupIndex. 주어지면 같은 모양의 셀은 한 번만 OCR하고 결과를 재사용
+    """
     # 셀 이미지 추출 (여백 추가)
-    padding = 2
-    cell_img = img[max(0, y-padding):min(img.shape[0], y+h+padding), 
-                  max(0, x-padding):min(img.shape[1], x+w+padding)]
+    cell_img = crop_cell(img, cell_box)
     
     if cell_img.size == 0:
         return ""
     
     try:
-        # PIL Image로 변환
-        if len(cell_img.shape) == 3:
-            cell_pil = Image.fromarray(cv2.cvtColor(cell_img, cv2.COLOR_BGR2RGB))
-        else:
-            cell_pil = Image.fromarray(cell_img)
-        
-        # 임시 파일로 저장
-        temp_path = "temp_cell.png"
-        cell_pil.save(temp_path)
-        
-        # Gemini API로 OCR 수행
-        client = genai.Client(api_key=api_key)
-        with open(temp_path, "rb") as f:
-            image_bytes = f.read()
-
-        response = client.models.generate_content(
-            model="gemini-2.5-pro",
-            contents=[
-                types.Part.from_bytes(data=image_bytes, mime_type="image/png"),
-                "이 이미지에서 텍스트를 정확히 추출해주세요. 공백은 제거하고 의미있는 내용만 반환하세요. 빈 이미지라면 빈 문자열을 반환하세요."
-            ],
-        )
-        
-        text = response.text.strip()
-        
-        # 임시 파일 삭제
-        if os.path.exists(temp_path):
-            os.remove(temp_path)
-        
-        return text
+        if dedup_index is not None:
+            from cell_dedup import cell_signature
+            return dedup_index.get_or_compute(cell_signature(img, cell_box),
+                                              lambda: ocr_cell_image(cell_img, api_key, row_height, hedge))
+        return ocr_cell_image(cell_img, api_key, row_height, hedge)
         
     except Exception as e:
         print(f"OCR 오류: {e}")
         return ""
 
-def extract_table_with_cv(api_key, image_path):
-    """컴퓨터 비전 기반으로 테이블을 추출하는 메인 함수"""
-    print(f"컴퓨터 비전 방식으로 테이블 추출 시작: {image_path}")
-    
+def ocr_cells(img, cell_boxes, api_key, row_height=None, ocr_workers=None, dedup_index=None, hedge=None):
+    """셀들의 텍스트를 추출하는 함수 (ocr_workers가 있으면 공유 페이지 버퍼로 여러 프로세스에서 실행)
+
+    hedge: gemini_client.HedgePolicy (현재 프로세스에서 하는 OCR만 헤징, 정책은 프로세스 간에 공유할 수 없음)
+    """
+    if ocr_workers and dedup_index is not None:
+        # 인덱스는 프로세스 간에 공유할 수 없으므로 같은 셀끼리 먼저 묶고 대표 셀만 프로세스에서 OCR
+        from cell_dedup import cell_signature
+        from page_buffer import ocr_cells_in_processes
+        signatures = [cell_signature(img, cell_box) for cell_box in cell_boxes]
+        cached = [dedup_index.lookup(signature) for signature in signatures]
+        missing = [i for i, text in enumerate(cached) if text is None]
+        representatives, assignment = dedup_index.group([signatures[i] for i in missing])
+        texts = ocr_cells_in_processes(img, [cell_boxes[missing[i]] for i in representatives], api_key, row_height,
+                                       max_workers=ocr_workers, keep_failures=True)
+        failed = [number for number, text in enumerate(texts) if text is None]
+        # 인덱스에서 찾은 셀과 대표 셀 결과를 재사용하는 셀은 재사용, 대표 셀은 OCR (실패한 셀은 다시 시도할 때 셈)
+        dedup_index.count(hits=len(cell_boxes) - len(representatives), misses=len(representatives) - len(failed))
+        for number, i in enumerate(representatives):
+            if texts[number] is None:
+                # 실패한 셀은 등록하지 않고 현재 프로세스에서 한 번 더 시도 (다시 실패하면 빈 문자열, 등록 안 함)
+                texts[number] = extract_text_from_cell(img, cell_boxes[missing[i]], api_key, row_height, dedup_index, hedge)
+            else:
+                dedup_index.add(signatures[missing[i]], texts[number])
+        for i, number in zip(missing, assignment):
+            cached[i] = texts[number]
+        return cached
+    if ocr_workers:
+        from page_buffer import ocr_cells_in_processes
+        return ocr_cells_in_processes(img, cell_boxes, api_key, row_height, max_workers=ocr_workers)
+    return [extract_text_from_cell(img, cell_box, api_key, row_height, dedup_index, hedge) for cell_box in cell_boxes]
+
+def detect_page_cells(image_path, bbox=None, memory_budget_mb=None, deskew=True, adaptive=True):
+    """페이지를 읽어 셀 영역을 검출하는 함수 (1~4단계, API 호출 없음)
+
+    adaptive: 글자 높이/획 두께/행 간격으로 커널, 셀 크기 필터, 이진화 방식을 정함 (문서별 캐시, False면 고정값)
+
+    반환값: (이미지, 셀 박스 목록, 평균 행 높이)
+    """
     # 이미지 로드
-    img = cv2.imread(image_path)
-    if img is None:
-        raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
-    
-    # 1단계: 수평선 검출
-    horiz_lines, bin_img, gray = detect_horizontal_lines(img)
-    
-    # 2단계: 평균 행 높이 계산
-    row_height = calculate_row_height(horiz_lines)
-    
-    # 3단계: 수직선 검출
-    vert_lines = detect_vertical_lines(bin_img)
+    if memory_budget_mb:
+        img = load_gray(image_path)
+    else:
+        img = cv2.imread(image_path)
+        if img is None:
+            raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
+    if bbox is not None:
+        x, y, w, h = bbox
+        img = img[y:y+h, x:x+w]
+    if deskew:
+        # 0단계: 기울기 보정 (축 정렬 커널이 기울어진 선을 조각내지 않도록)
+        # 메모리 예산 경로는 페이지 크기 회전 사본을 만들지 않도록 제자리에서 보정
+        img, _ = deskew_page(img, image_path, bbox, in_place=bool(memory_budget_mb))
+    # 선 검출 파라미터 (같은 문서의 다른 페이지/영역은 캐시 사용)
+    params = document_params(img, image_path) if adaptive else DEFAULT_PARAMS
+    row_height_options = {"default": params.line_spacing or 50, "min_gap": params.min_cell_height if adaptive else 0}
+    
+    if memory_budget_mb:
+        # 1~3단계: 띠 단위 수평선/수직선 검출 (이진화 사본을 페이지 크기로 만들지 않음)
+        horiz_lines, vert_lines = detect_lines_tiled(img, memory_budget_mb, params)
+        row_height = calculate_row_height(horiz_lines, **row_height_options)
+    else:
+        # 1단계: 수평선 검출
+        horiz_lines, bin_img, gray = detect_horizontal_lines(img, params)
+        
+        # 2단계: 평균 행 높이 계산
+        row_height = calculate_row_height(horiz_lines, **row_height_options)
+        
+        # 3단계: 수직선 검출
+        vert_lines = detect_vertical_lines(bin_img, params)
+        del bin_img, gray
     
     # 4단계: 셀 영역 검출
-    cell_boxes = detect_table_cells(img, horiz_lines, vert_lines)
+    cell_boxes = detect_table_cells(img, horiz_lines, vert_lines, params)
     print(f"검출된 셀 개수: {len(cell_boxes)}")
     
+    # 디버그 모드(TABLE_DEBUG=N)면 N 페이지당 1장 백그라운드로 축소 오버레이/좌표 보고서 기록
+    writer = debug_writer()
+    if writer is not None:
+        # 상위 폴더까지 포함 (계산서/도면 폴더의 같은 이름 페이지 구분)
+        page = os.path.join(os.path.basename(os.path.dirname(os.path.abspath(image_path))), os.path.basename(image_path))
+        if bbox is not None:
+            page = f"{page}@{','.join(map(str, bbox))}"
+        writer.submit(page, img, horiz_lines, vert_lines, cell_boxes, row_height=row_height, params=params)
+    return img, cell_boxes, row_height
+
+def extract_table_with_cv(api_key, image_path, ocr_workers=None, bbox=None, template_store=None,
+                          memory_budget_mb=None, dedup_index=None, deskew=True, adaptive=True, hedge=None):
+    """컴퓨터 비전 기반으로 테이블을 추출하는 메인 함수
+
+    ocr_workers: 셀 OCR을 실행할 프로세스 수 (None이면 현재 스레드에서 순차 실행)
+    bbox: 페이지 안의 표 영역 (x, y, w, h). 주어지면 해당 영역만 처리
+    template_store: layout_templates.LayoutTemplateStore. 헤더가 일치하면 헤더 셀 OCR 대신 저장된 헤더 텍스트 사용
+    memory_budget_mb: 지정하면 페이지를 그레이스케일로만 읽고 이 예산 안에서 띠 단위로 선 검출 (대형 도면용)
+    dedup_index: cell_dedup.CellDedupIndex. 페이지 간에 공유하면 반복되는 셀(D10@150, 층 이름 등)은 한 번만 OCR
+    deskew: 스캔 기울기를 추정해 선 검출 전에 보정 (추정 각도는 페이지별로 캐시)
+    adaptive: 페이지 통계(글자 높이, 획 두께, 행 간격)로 선 검출 파라미터와 열 허용 오차를 정함 (문서별로 캐시)
+    hedge: gemini_client.HedgePolicy. 주어지면 셀 OCR 요청 헤징
+
+    반환값: sparse_table.SparseTable (병합 셀을 한 번만 저장, result['rows']로 접근하면 그때 복제해 펼침)
+    """
+    print(f"컴퓨터 비전 방식으로 테이블 추출 시작: {image_path}")
+    
+    img, cell_boxes, row_height = detect_page_cells(image_path, bbox, memory_budget_mb, deskew, adaptive)
+    # 열 허용 오차 (detect_page_cells에서 추정한 값이 캐시되어 있음)
+    column_tolerance = (document_params(img, image_path) if adaptive else DEFAULT_PARAMS).column_tolerance
+    
     # 5단계: 테이블 구조 분석
+    # 헤더 템플릿 조회 (일치하면 열 위치와 헤더 텍스트를 재사용)
+    header_boxes, fingerprint, template = [], None, None
+    if template_store is not None:
+        header_boxes = find_header_cells(cell_boxes, row_height)
+        fingerprint = header_fingerprint(img, header_boxes)
+        template = template_store.match(fingerprint)
+    
+    if template:
+        print(f"헤더 템플릿 일치: {template['headers']}")
     # 대략적인 열 개수 추정 (x 좌표 기준으로 그룹핑)
-    x_coords = sorted(list(set([box[0] for box in cell_boxes])))
+    # 템플릿이 일치해도 같은 방식으로 열을 정함 (템플릿은 헤더 OCR만 대신하고 결과는 바꾸지 않음)
+    x_coords = table_columns(cell_boxes)
     num_cols = len(x_coords)
     
     # 대략적인 행 개수 추정
@@ -175,31 +293,37 @@ def extract_table_with_cv(api_key, image_path):
     
     print(f"예상 테이블 크기: {num_rows}행 x {num_cols}열")
     
-    # 6단계: DataFrame 초기화
-    df = pd.DataFrame([[None for _ in range(num_cols)] for _ in range(num_rows)])
+    # 6단계: 희소 표 초기화 (병합 셀은 행 스팬과 함께 한 번만 저장)
+    page_table = SparseTable([''] * num_cols, num_rows, num_cols)
     
     # 7단계: 각 셀에서 텍스트 추출 및 스팬 처리
-    for i, cell_box in enumerate(cell_boxes):
+    # 템플릿이 일치하면 헤더 셀은 OCR하지 않고 템플릿의 헤더 텍스트 사용
+    header_set = set(header_boxes)
+    body_boxes = [box for box in cell_boxes if not (template and box in header_set)]
+    body_texts = iter(ocr_cells(img, body_boxes, api_key, row_height, ocr_workers, dedup_index, hedge))
+    texts = []
+    for cell_box in cell_boxes:
+        if template and cell_box in header_set:
+            texts.append(template['headers'][header_boxes.index(cell_box)])
+        else:
+            texts.append(next(body_texts))
+    
+    # 새 헤더 레이아웃이면 템플릿으로 등록
+    if template_store is not None and not template and fingerprint:
+        template_store.add(fingerprint, [texts[cell_boxes.index(box)] for box in header_boxes])
+    
+    for i, (cell_box, text) in enumerate(zip(cell_boxes, texts)):
         try:
-            # 텍스트 추출
-            text = extract_text_from_cell(img, cell_box, api_key)
-            
             if text:  # 빈 텍스트가 아닌 경우만 처리
                 # 스팬 계산
                 span, start_row = calculate_cell_span(cell_box, row_height)
                 
-                # 열 인덱스 추정 (x 좌표 기준)
-                col_idx = 0
-                for j, x_coord in enumerate(x_coords):
-                    if abs(cell_box[0] - x_coord) < 20:  # 20px 오차 허용
-                        col_idx = j
-                        break
+                # 열 인덱스 추정 (x 좌표 기준, 기본 20px 오차 허용)
+                col_idx = column_index(x_coords, cell_box[0], column_tolerance)
                 
-                # DataFrame에 텍스트 할당 (스팬만큼 복제)
-                for row_offset in range(span):
-                    target_row = start_row + row_offset
-                    if 0 <= target_row < num_rows and 0 <= col_idx < num_cols:
-                        df.iat[target_row, col_idx] = text
+                # 표에 텍스트 할당 (복제하지 않고 스팬으로 저장)
+                if 0 <= start_row < num_rows and 0 <= col_idx < num_cols:
+                    page_table.add(start_row, col_idx, text, span)
                 
                 print(f"셀 {i+1}: '{text}' -> 행{start_row}~{start_row+span-1}, 열{col_idx}")
         
@@ -207,31 +331,11 @@ def extract_table_with_cv(api_key, image_path):
             print(f"셀 {i+1} 처리 중 오류: {e}")
             continue
     
-    # 8단계: 결과 정리
-    # 빈 행 제거
-    df_cleaned = df.dropna(how='all').reset_index(drop=True)
-    
-    # 헤더와 데이터 분리
-    if len(df_cleaned) > 0:
-        headers = df_cleaned.iloc[0].tolist()
-        data_rows = df_cleaned.iloc[1:].values.tolist()
-        
-        # None을 빈 문자열로 변경
-        headers = [str(h) if h is not None else '' for h in headers]
-        data_rows = [[str(cell) if cell is not None else '' for cell in row] for row in data_rows]
-        
-        return {
-            'headers': headers,
-            'rows': data_rows
-        }
-    else:
-        return {
-            'headers': [],
-            'rows': []
-        }
+    # 8단계: 결과 정리 (빈 행 제거, 첫 행을 헤더로 분리)
+    return split_header(page_table)
 
 def save_debug_images(img, horiz_lines, vert_lines, cell_boxes, output_dir="debug_output"):
-    """디버깅용 이미지 저장 함수"""
+    """디버깅용 이미지 저장 함수 (원본 해상도 PNG 4장, 수동 확인용. 처리 중 기록은 debug_artifacts 사용)"""
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
     
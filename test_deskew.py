@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+기울기 보정 회귀 테스트 스크립트
+
+- 기울지 않은 예제 페이지는 보정을 켜도 검출 셀 개수가 그대로인지 (추정 잡음으로 회전하지 않는지)
+- 일부러 기울인 페이지에서 메모리 예산 경로(제자리 전단 회전)가 일반 경로(어파인 회전)와 같은 셀 개수를 내는지
+확인합니다. (API 호출 없음, python test_deskew.py 또는 pytest test_deskew.py)
+"""
+
+import os
+import sys
+import glob
+import tempfile
+
+import cv2
+
+from deskew import _rotate
+from page_params import clear_cache
+from table_cv_extraction import detect_page_cells
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+SAMPLE_IMAGES = sorted(glob.glob(os.path.join(REPO_DIR, "img-split-*", "*.png"))
+                       + glob.glob(os.path.join(REPO_DIR, "test", "*.png")))
+SKEWED_IMAGE = os.path.join(REPO_DIR, "img-split-calculation", "right_img.png")
+SKEW_ANGLES = (0.7, 1.5)
+MEMORY_BUDGET_MB = 16
+
+def cell_count(image_path, **options):
+    clear_cache()
+    return len(detect_page_cells(image_path, **options)[1])
+
+def check_unrotated():
+    """기울지 않은 예제의 보정 전후 셀 개수를 비교하고 실패 메시지 목록을 반환하는 함수"""
+    failures = []
+    for image_path in SAMPLE_IMAGES:
+        expected, corrected = cell_count(image_path, deskew=False), cell_count(image_path, deskew=True)
+        if corrected != expected:
+            failures.append(f"{os.path.basename(image_path)}: 보정 후 셀 {corrected}개 (보정 없이 {expected}개)")
+    return failures
+
+def check_memory_budget():
+    """기울인 페이지의 일반 경로/메모리 예산 경로 셀 개수를 비교하고 실패 메시지 목록을 반환하는 함수"""
+    failures = []
+    img = cv2.imread(SKEWED_IMAGE)
+    with tempfile.TemporaryDirectory() as folder:
+        for angle in SKEW_ANGLES:
+            path = os.path.join(folder, f"skewed_{angle}.png")
+            cv2.imwrite(path, _rotate(img, angle, (255, 255, 255)))
+            full, budget = cell_count(path), cell_count(path, memory_budget_mb=MEMORY_BUDGET_MB)
+            if budget != full:
+                failures.append(f"{angle}도 기울임: 메모리 예산 경로 셀 {budget}개 (일반 경로 {full}개)")
+    return failures
+
+def test_unrotated_samples_keep_cell_counts():
+    failures = check_unrotated()
+    assert not failures, "\n".join(failures)
+
+def test_memory_budget_deskew_matches_full_page():
+    failures = check_memory_budget()
+    assert not failures, "\n".join(failures)
+
+if __name__ == "__main__":
+    failures = check_unrotated() + check_memory_budget()
+    for failure in failures:
+        print(f"❌ {failure}")
+    print("✅ 기울기 보정 회귀 없음" if not failures else f"❌ 실패 {len(failures)}건")
+    sys.exit(1 if failures else 0)
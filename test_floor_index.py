@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+층 구간 인덱스 테스트 스크립트
+
+- 층 순위 (B2F < PITF < 1F < RF < PH1F < PHRF)와 범위 해석 (B2~3F, 1F,3F~5F)
+- 층 열 찾기 (두께 300, 간격 250 같은 숫자 열을 층 열로 보지 않음)
+- 벽체-층 조회와 구간 겹침/누락 검사
+를 확인합니다. (API 호출 없음, python test_floor_index.py 또는 pytest test_floor_index.py)
+"""
+
+import sys
+
+from floor_index import FloorIndex, floor_rank, parse_floor_ranges, detect_columns
+
+HEADERS = ['WALL', '층수', '두께', '수직철근']
+TABLE = {'headers': HEADERS, 'rows': [
+    ['AW1', '11F~RF', '200', 'D10@400'],
+    ['AW1', '1F~10F', '250', 'D13@300'],
+    ['AW1', 'B2F~PITF', '300', 'D13@200'],
+    ['AW2', '5F~RF', '200', 'D10@400'],
+    ['AW2', '3F~6F', '250', 'D13@300'],
+    ['AW2', 'B2F~1F', '300', 'D13@200'],
+]}
+
+def test_floor_order():
+    labels = ["B2F", "B1", "PIT", "P1TF", "1F", "12층", "RF", "PH1F", "PHR"]
+    ranks = [floor_rank(label) for label in labels]
+    assert ranks == sorted(ranks) and len(set(ranks)) == len(ranks) - 1, ranks
+    assert floor_rank("PIT") == floor_rank("P1TF")
+
+def test_range_expansion():
+    assert parse_floor_ranges("B2~3F") == [(-2, 3)]
+    assert parse_floor_ranges("28F ~ 11F") == [(11, 28)]
+    assert parse_floor_ranges("1F, 3F~5F") == [(1, 1), (3, 5)]
+    assert parse_floor_ranges("PITF~RF") == [(floor_rank("PIT"), floor_rank("RF"))]
+
+def test_bare_numbers_are_not_floors_when_detecting_columns():
+    try:
+        parse_floor_ranges("300", strict=True)
+        assert False, "F/층이 없는 숫자를 층으로 해석함"
+    except ValueError:
+        pass
+    # 층수 헤더가 있으면 헤더를 우선
+    assert detect_columns(['두께', '층수'], [['300', '1~3'], ['250', '4~10']])[1] == 1
+    # 헤더가 없으면 F/층이 붙은 값이 많은 열 (두께/간격 숫자 열은 제외)
+    rows = [['AW1', '300', '1F~3F', '250'], ['AW1', '250', '4F~10F', '200']]
+    assert detect_columns(['', '', '', ''], rows)[1] == 2
+
+def test_lookup():
+    index = FloorIndex()
+    assert index.add_table(TABLE, "calc") == len(TABLE['rows'])
+    assert [row.floors for row in index.lookup("AW1", "15F")] == ["11F~RF"]
+    assert [row.floors for row in index.lookup("AW1", "PITF")] == ["B2F~PITF"]
+    assert index.governing("AW1", "RF").row[2] == '200'
+    assert index.lookup("AW3", "1F") == []
+
+def test_overlap_and_gap():
+    index = FloorIndex()
+    index.add_table(TABLE, "calc")
+    issues = {(issue.kind, issue.wall, issue.floors) for issue in index.check()}
+    assert issues == {("overlap", "AW2", "5F~6F"), ("gap", "AW2", "2F")}, issues
+
+if __name__ == "__main__":
+    failures = 0
+    for name, test in list(globals().items()):
+        if name.startswith("test_") and callable(test):
+            try:
+                test()
+                print(f"✅ {name}")
+            except AssertionError as e:
+                failures += 1
+                print(f"❌ {name}: {e}")
+    sys.exit(1 if failures else 0)
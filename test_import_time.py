@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+import 시간 예산 테스트 스크립트
+
+main/gemini_ocr/worker_service/gemini_client를 새 파이썬 프로세스에서 import했을 때
+OpenCV/pandas/genai SDK가 올라오지 않는지 확인합니다. 누적 import 시간은 참고용으로 출력만 하고,
+시간 예산 검사는 CI 장비 부하에 따라 흔들리므로 IMPORT_TIME_BUDGETS=1일 때만 실패로 봅니다.
+(python test_import_time.py 또는 pytest test_import_time.py)
+"""
+
+import os
+import sys
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# 가벼운 진입 모듈이 import하면 안 되는 무거운 의존성
+HEAVY_MODULES = ["cv2", "numpy", "pandas", "PIL", "google.genai"]
+# 모듈별 누적 import 시간 예산 (ms, IMPORT_TIME_BUDGETS=1일 때만 검사)
+BUDGET_ENV = "IMPORT_TIME_BUDGETS"
+IMPORT_BUDGETS_MS = {
+    "main": 150,
+    "gemini_ocr": 150,
+    "worker_service": 150,
+    "gemini_client": 50,
+}
+
+def measure_import(module):
+    """새 프로세스에서 모듈을 import하고 (누적 import 시간 ms, 로드된 무거운 모듈 목록)을 반환하는 함수"""
+    code = (
+        f"import sys, {module}; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    cumulative_us = None
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        parts = [part.strip() for part in line.split("|")]
+        if len(parts) == 3 and parts[2] == module:
+            cumulative_us = int(parts[1])
+    loaded = [name for name in completed.stdout.strip().split(",") if name]
+    return cumulative_us / 1000, loaded
+
+def test_entry_modules_skip_heavy_dependencies():
+    for module in IMPORT_BUDGETS_MS:
+        _, loaded = measure_import(module)
+        assert not loaded, f"{module} import 시 무거운 모듈이 로드됨: {loaded}"
+
+def test_entry_modules_within_budget():
+    if not os.getenv(BUDGET_ENV):
+        import pytest
+        pytest.skip(f"시간 예산 검사는 {BUDGET_ENV}=1일 때만 실행")
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        elapsed, _ = measure_import(module)
+        assert elapsed <= budget, f"{module} import {elapsed:.1f}ms > 예산 {budget}ms"
+
+if __name__ == "__main__":
+    failed = False
+    check_budget = bool(os.getenv(BUDGET_ENV))
+    for module, budget in IMPORT_BUDGETS_MS.items():
+        elapsed, loaded = measure_import(module)
+        ok = not loaded and (elapsed <= budget or not check_budget)
+        failed = failed or not ok
+        print(f"{'✅' if ok else '❌'} {module:<16} {elapsed:>7.1f}ms ({'예산' if check_budget else '참고: 예산'} {budget}ms)"
+              + (f"  무거운 모듈 로드: {', '.join(loaded)}" if loaded else ""))
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+헤더 템플릿 일치 여부에 따른 결과 변화 테스트 스크립트
+
+같은 페이지를 템플릿 저장소 없이, 템플릿 미스(처음 두 번은 등록/확인), 템플릿 일치(세 번째)로 추출해
+헤더/행이 모두 같은지 확인합니다. 셀 OCR은 셀 좌표로 만든 고정 텍스트로 바꿔 API를 호출하지 않습니다.
+저장소 자체는 확인 전 재사용 금지, OCR 불일치 시 재확인, 동시 등록 시 중복 없음, 경로 없이는 파일 미저장을 확인합니다.
+(python test_layout_templates.py 또는 pytest test_layout_templates.py)
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+import table_cv_extraction
+from layout_templates import LayoutTemplateStore
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_IMAGES = [os.path.join(REPO_DIR, "img-split-calculation", name) for name in ("left_img.png", "right_img.png")]
+
+def fake_ocr_cells(img, cell_boxes, api_key, row_height=None, ocr_workers=None, dedup_index=None, hedge=None):
+    """셀 좌표로 만든 고정 텍스트 (같은 셀은 항상 같은 텍스트)"""
+    return [f"{x},{y}" for x, y, _, _ in cell_boxes]
+
+def extract(image_path, template_store=None):
+    """셀 OCR을 고정 텍스트로 바꿔 추출하고 (헤더, 행)을 반환하는 함수"""
+    real_ocr_cells = table_cv_extraction.ocr_cells
+    table_cv_extraction.ocr_cells = fake_ocr_cells
+    try:
+        result = table_cv_extraction.extract_table_with_cv(None, image_path, template_store=template_store)
+    finally:
+        table_cv_extraction.ocr_cells = real_ocr_cells
+    return list(result['headers']), [list(row) for row in result['rows']]
+
+def check_image(image_path):
+    """템플릿 없음/미스/일치 결과를 비교하고 실패 메시지 목록을 반환하는 함수"""
+    name = os.path.basename(image_path)
+    with tempfile.TemporaryDirectory() as folder:
+        store = LayoutTemplateStore(os.path.join(folder, "templates.json"))
+        plain = extract(image_path)
+        miss = extract(image_path, store)
+        extract(image_path, store)  # 같은 헤더 OCR로 한 번 더 확인되어야 재사용
+        hits = sum(template.get("hits", 0) for template in store.templates)
+        hit = extract(image_path, store)
+        hits = sum(template.get("hits", 0) for template in store.templates) - hits
+    failures = []
+    if not store.templates:
+        failures.append(f"{name}: 헤더 템플릿이 등록되지 않음")
+    elif hits != 1:
+        failures.append(f"{name}: 다시 처리할 때 템플릿이 일치하지 않음")
+    for label, result in (("템플릿 미스", miss), ("템플릿 일치", hit)):
+        if result[0] != plain[0]:
+            failures.append(f"{name} {label}: 헤더 {len(result[0])}열 (템플릿 없이 {len(plain[0])}열)")
+        if result[1] != plain[1]:
+            failures.append(f"{name} {label}: 행 {len(result[1])}개가 템플릿 없이 추출한 결과와 다름")
+    return failures
+
+FINGERPRINT = {"separators": [0.0, 0.3, 0.6], "hash": 0x0F0F}
+HEADERS = ["WALL", "층수", "두께"]
+
+def check_store():
+    """저장소의 확인/동시성/저장 동작을 확인하고 실패 메시지 목록을 반환하는 함수"""
+    failures = []
+    store = LayoutTemplateStore()
+    store.add(FINGERPRINT, HEADERS)
+    if store.match(FINGERPRINT):
+        failures.append("한 페이지에서만 읽은 헤더를 재사용함")
+    store.add(FINGERPRINT, ["WALL", "충수", "두께"])
+    store.add(FINGERPRINT, HEADERS)
+    if store.match(FINGERPRINT):
+        failures.append("헤더 OCR이 엇갈렸는데 재사용함")
+    store.add(FINGERPRINT, HEADERS)
+    template = store.match(FINGERPRINT)
+    if not template or template["headers"] != HEADERS:
+        failures.append("같은 헤더로 두 번 확인된 템플릿을 재사용하지 않음")
+
+    store = LayoutTemplateStore()
+    threads = [threading.Thread(target=store.add, args=(FINGERPRINT, HEADERS)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if len(store.templates) != 1:
+        failures.append(f"동시에 등록한 같은 헤더가 템플릿 {len(store.templates)}개로 저장됨")
+
+    with tempfile.TemporaryDirectory() as folder:
+        cwd = os.getcwd()
+        os.chdir(folder)
+        try:
+            LayoutTemplateStore().add(FINGERPRINT, HEADERS)
+            if os.listdir(folder):
+                failures.append(f"경로 없이 만든 저장소가 파일을 씀: {os.listdir(folder)}")
+        finally:
+            os.chdir(cwd)
+    return failures
+
+def test_template_hit_matches_miss():
+    for image_path in TEST_IMAGES:
+        failures = check_image(image_path)
+        assert not failures, "\n".join(failures)
+
+def test_store_requires_confirmation():
+    failures = check_store()
+    assert not failures, "\n".join(failures)
+
+if __name__ == "__main__":
+    failures = check_store()
+    for image_path in TEST_IMAGES:
+        failures += check_image(image_path)
+    for failure in failures:
+        print(f"❌ {failure}")
+    print("✅ 템플릿 일치 여부와 관계없이 결과가 같음" if not failures else f"❌ 실패 {len(failures)}건")
+    sys.exit(1 if failures else 0)
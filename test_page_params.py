@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+선 검출 파라미터 추정 해상도 테스트 스크립트
+
+200dpi 계산서 스캔(test/ 폴더)을 150/200/300dpi로 다시 샘플링하고, 조명 그림자를 입힌 사본도 만들어
+추정한 글자 높이/행 간격이 해상도에 비례하는지, 셀 검출 결과가 원본 해상도와 같은지 확인합니다. (API 호출 없음)
+(python test_page_params.py 또는 pytest test_page_params.py)
+"""
+
+import os
+import sys
+import tempfile
+
+import cv2
+import numpy as np
+
+from page_params import document_key, document_params, clear_cache
+from table_cv_extraction import detect_page_cells
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_IMAGES = [os.path.join(REPO_DIR, "test", name) for name in ("test1.png", "test2.png")]
+# 테스트 이미지의 원본 해상도와 확인할 해상도
+SOURCE_DPI = 200
+TEST_DPIS = (150, 200, 300)
+# 원본 해상도에서 잰 글자 높이/행 간격 (px)
+SOURCE_TEXT_HEIGHT = 15
+SOURCE_LINE_SPACING = 28
+
+def resample(img, dpi):
+    """원본 이미지를 dpi 해상도로 다시 샘플링하는 함수"""
+    scale = dpi / SOURCE_DPI
+    if scale == 1:
+        return img
+    return cv2.resize(img, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC)
+
+def shade(img):
+    """오른쪽 아래로 갈수록 어두워지는 조명 그림자를 입히는 함수 (전역 OTSU가 흔들리는 조건)"""
+    height, width = img.shape[:2]
+    gradient = np.linspace(0, 110, width)[None, :, None] + np.linspace(0, 60, height)[:, None, None]
+    return np.clip(img.astype(np.float64) - gradient, 0, 255).astype(np.uint8)
+
+def detect_cells(img, name, adaptive=True):
+    """이미지를 임시 파일로 저장하고 셀을 검출하는 함수 (반환값: (셀 개수, 행 높이))"""
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, name)
+        cv2.imwrite(path, img)
+        _, cell_boxes, row_height = detect_page_cells(path, deskew=False, adaptive=adaptive)
+    return len(cell_boxes), row_height
+
+def check_image(image_path, verbose=False):
+    """이미지 하나를 해상도별로 확인하고 실패 메시지 목록을 반환하는 함수"""
+    clear_cache()
+    img = cv2.imread(image_path)
+    stem = os.path.splitext(os.path.basename(image_path))[0]
+    expected_cells, _ = detect_cells(img, f"{stem}_source.png")
+    failures = []
+    for dpi in TEST_DPIS:
+        scale = dpi / SOURCE_DPI
+        for shaded in (False, True):
+            page = resample(img, dpi)
+            if shaded:
+                page = shade(page)
+            label = f"{stem} {dpi}dpi{' 그림자' if shaded else ''}"
+            params = document_params(page)
+            cells, row_height = detect_cells(page, f"{stem}_{dpi}{'_shaded' if shaded else ''}.png")
+            fixed_cells, _ = detect_cells(page, f"{stem}_{dpi}_fixed.png", adaptive=False)
+            if verbose:
+                print(f"{label:<22} 글자 {params.text_height:>3}px 행 간격 {params.line_spacing}px "
+                      f"{'적응형' if params.adaptive_block else 'OTSU':<5} 셀 {cells} (고정값 {fixed_cells}, 원본 {expected_cells})")
+
+            if abs(params.text_height - SOURCE_TEXT_HEIGHT * scale) > max(2, 0.15 * SOURCE_TEXT_HEIGHT * scale):
+                failures.append(f"{label}: 글자 높이 {params.text_height}px (예상 {SOURCE_TEXT_HEIGHT * scale:.0f}px)")
+            if params.line_spacing is None or abs(params.line_spacing - SOURCE_LINE_SPACING * scale) > 0.1 * SOURCE_LINE_SPACING * scale:
+                failures.append(f"{label}: 행 간격 {params.line_spacing}px (예상 {SOURCE_LINE_SPACING * scale:.0f}px)")
+            if shaded and not params.adaptive_block:
+                failures.append(f"{label}: 그림자가 있는데 적응형 이진화를 사용하지 않음")
+            if cells != expected_cells:
+                failures.append(f"{label}: 셀 {cells}개 (원본 해상도 {expected_cells}개)")
+            if abs(row_height - SOURCE_LINE_SPACING * scale) > 0.1 * SOURCE_LINE_SPACING * scale:
+                failures.append(f"{label}: 행 높이 {row_height:.1f}px (예상 {SOURCE_LINE_SPACING * scale:.0f}px)")
+    return failures
+
+def test_params_follow_resolution():
+    for image_path in TEST_IMAGES:
+        failures = check_image(image_path)
+        assert not failures, "\n".join(failures)
+
+def test_rasterized_pages_share_document_params():
+    assert document_key("scans/calculation-101_p3.png") == document_key("scans/calculation-101_p74.png")
+    assert document_key("scans/left_img.png") != document_key("scans/right_img.png")
+
+if __name__ == "__main__":
+    failures = []
+    for image_path in TEST_IMAGES:
+        failures += check_image(image_path, verbose=True)
+    for failure in failures:
+        print(f"❌ {failure}")
+    print("✅ 모든 해상도에서 통과" if not failures else f"❌ 실패 {len(failures)}건")
+    sys.exit(1 if failures else 0)
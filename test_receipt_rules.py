@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+영수증 규칙 엔진의 법인카드 판단 테스트 스크립트
+
+법인카드 번호 앞자리(451844)는 카드번호 숫자 덩어리의 맨 앞에서만 인정하고,
+승인번호 등 다른 숫자 중간에 나온 451844로는 법인카드로 분류하지 않는지 확인합니다.
+(API 호출 없음, python test_receipt_rules.py 또는 pytest test_receipt_rules.py)
+"""
+
+import sys
+
+from receipt_rules import apply_rules
+
+# (카드정보, 예상 비고)
+CASES = [
+    ("신한카드 451844******1234", "법인카드"),
+    ("4518-44**-****-1234", "법인카드"),
+    ("4518 44** **** 1234", "법인카드"),
+    ("국민카드 5365-10**-****-7788 승인번호 30451844", ""),
+    ("국민카드 9451844*****1234", ""),
+]
+
+def check_cases():
+    """카드정보별 비고를 확인하고 실패 메시지 목록을 반환하는 함수"""
+    failures = []
+    for card_info, expected in CASES:
+        note = apply_rules({'h': card_info})[0]['f']
+        if note != expected:
+            failures.append(f"{card_info!r}: 비고 {note!r} (예상 {expected!r})")
+    return failures
+
+def test_corporate_prefix_only_at_start_of_number():
+    failures = check_cases()
+    assert not failures, "\n".join(failures)
+
+if __name__ == "__main__":
+    failures = check_cases()
+    for failure in failures:
+        print(f"❌ {failure}")
+    print("✅ 법인카드 판단 정상" if not failures else f"❌ 실패 {len(failures)}건")
+    sys.exit(1 if failures else 0)
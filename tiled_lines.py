@@ -0,0 +1,86 @@
+"""
+메모리 예산 기반 띠(band) 단위 선 검출
+
+매우 큰 도면 페이지에서 detect_horizontal_lines/detect_vertical_lines는 그레이스케일, 이진화, 선 마스크를
+페이지 크기로 한꺼번에 들고 있어 워커당 최대 메모리가 페이지 크기의 몇 배가 됩니다.
+여기서는 페이지를 그레이스케일로만 읽고, 겹치는 가로 띠 단위로 이진화/모폴로지 연산을 한 뒤
+띠 가운데(core) 부분만 결과 마스크에 기록합니다.
+
+- 이진화 임계값은 페이지 전체 히스토그램으로 한 번 계산한 OTSU 값을 모든 띠에 사용 (띠마다 달라지지 않음)
+- 수평선 커널(기본 40x1)은 행 단위 연산이라 겹침이 필요 없고, 수직선 커널(기본 1x20)은 위아래로 커널 높이만큼 겹쳐
+  띠 경계를 지나는 수직선이 전체 페이지 처리 결과와 똑같이 이어지도록 합니다.
+- 적응형 이진화(page_params)를 쓰는 문서는 겹침을 블록 크기의 절반만큼 더 늘려 띠 경계에서도 같은 결과를 냅니다.
+
+메모리 예산은 띠 처리 작업 메모리의 상한입니다. 그레이스케일 페이지와 결과 마스크 2장(페이지당 각 1byte/px)은
+예산과 별도로 상주합니다.
+"""
+
+import cv2
+import numpy as np
+
+from page_params import DEFAULT_PARAMS, binarize
+
+# 수평선/수직선 기본 커널 크기 (table_cv_extraction과 동일)
+HORIZONTAL_KERNEL = DEFAULT_PARAMS.horizontal_kernel
+VERTICAL_KERNEL = DEFAULT_PARAMS.vertical_kernel
+# 띠 처리 중 픽셀당 작업 메모리 (이진화 + 수평/수직 열림 연산 결과와 임시 버퍼, bytes)
+BAND_BYTES_PER_PIXEL = 5
+# 기본 작업 메모리 예산 (MB)
+DEFAULT_MEMORY_BUDGET_MB = 64
+
+def otsu_threshold(gray):
+    """그레이스케일 이미지의 히스토그램으로 OTSU 임계값을 계산하는 함수 (이진화 사본을 만들지 않음)"""
+    hist = cv2.calcHist([gray], [0], None, [256], [0, 256]).ravel().astype(np.float64)
+    total = hist.sum()
+    levels = np.arange(256, dtype=np.float64)
+    weight = np.cumsum(hist) / total
+    mean = np.cumsum(hist * levels) / total
+    global_mean = mean[-1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        variance = (global_mean * weight - mean) ** 2 / (weight * (1.0 - weight))
+    variance = np.nan_to_num(variance, nan=0.0, posinf=0.0)
+    return float(np.argmax(variance))
+
+def band_height_for_budget(width, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, overlap=VERTICAL_KERNEL[1]):
+    """메모리 예산 안에서 처리할 수 있는 띠 높이(겹침 제외)를 계산하는 함수"""
+    budget_rows = int(memory_budget_mb * 1024 * 1024 / (max(1, width) * BAND_BYTES_PER_PIXEL))
+    return max(2 * overlap, budget_rows - 2 * overlap)
+
+def detect_lines_tiled(gray, memory_budget_mb=DEFAULT_MEMORY_BUDGET_MB, params=DEFAULT_PARAMS):
+    """겹치는 가로 띠 단위로 수평선/수직선 마스크를 검출하는 함수
+
+    params: page_params.PageParams (커널 크기, 이진화 방식)
+    반환값: (horiz_lines, vert_lines) - 전체 페이지 처리(detect_horizontal_lines + detect_vertical_lines)와 같은 마스크
+    """
+    height, width = gray.shape[:2]
+    # 적응형 이진화는 블록 절반만큼 바깥 픽셀에 의존하므로, 그 위에 수직선 커널 높이만큼 더 겹침
+    overlap = params.vertical_kernel[1] + ((params.adaptive_block // 2 + 1) if params.adaptive_block else 0)
+    band_height = band_height_for_budget(width, memory_budget_mb, overlap)
+    threshold = None if params.adaptive_block else otsu_threshold(gray)
+
+    horiz_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, params.horizontal_kernel)
+    vert_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, params.vertical_kernel)
+    horiz_lines = np.zeros((height, width), dtype=np.uint8)
+    vert_lines = np.zeros((height, width), dtype=np.uint8)
+
+    for top in range(0, height, band_height):
+        bottom = min(height, top + band_height)
+        # 위아래로 겹침을 둔 띠를 처리하고 core(top~bottom)만 기록
+        band_top, band_bottom = max(0, top - overlap), min(height, bottom + overlap)
+        if threshold is None:
+            band = binarize(gray[band_top:band_bottom], params)
+        else:
+            _, band = cv2.threshold(gray[band_top:band_bottom], threshold, 255, cv2.THRESH_BINARY_INV)
+        core = slice(top - band_top, bottom - band_top)
+        horiz_lines[top:bottom] = cv2.morphologyEx(band[core], cv2.MORPH_OPEN, horiz_kernel)
+        vert_lines[top:bottom] = cv2.morphologyEx(band, cv2.MORPH_OPEN, vert_kernel)[core]
+        del band
+
+    return horiz_lines, vert_lines
+
+def load_gray(image_path):
+    """페이지를 그레이스케일로만 읽는 함수 (컬러 원본을 메모리에 올리지 않음)"""
+    gray = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    if gray is None:
+        raise ValueError(f"이미지를 로드할 수 없습니다: {image_path}")
+    return gray
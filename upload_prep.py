@@ -0,0 +1,147 @@
+"""
+업로드 전 이미지 준비 단계
+
+- 실제 이미지 포맷 감지 (mime_type을 파일 내용으로 결정)
+- 검출된 행 높이를 기준으로 목표 글자 높이까지 축소 (확대는 하지 않음)
+- 안전한 경우 그레이스케일/이진(bilevel)으로 변환
+- 여러 인코딩 후보 중 가장 작은 것을 선택
+"""
+
+import cv2
+import numpy as np
+
+# 행 높이 대비 글자 높이 비율 (계산서 표 기준 측정값)
+TEXT_TO_ROW_RATIO = 0.6
+# OCR 정확도를 유지하는 목표 글자 높이 (px)
+DEFAULT_TARGET_TEXT_HEIGHT = 14
+# 이보다 작게는 축소하지 않음
+MIN_SCALE = 0.3
+# 행 높이를 알 수 없는 사진(영수증 등)의 긴 변 최대 길이
+DEFAULT_MAX_SIDE = 1600
+
+MAGIC_NUMBERS = [
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"BM", "image/bmp"),
+    (b"II*\x00", "image/tiff"),
+    (b"MM\x00*", "image/tiff"),
+]
+
+def detect_mime_type(image_bytes):
+    """파일 내용(매직 넘버)으로 실제 이미지 포맷을 감지하는 함수"""
+    if image_bytes[:4] == b"RIFF" and image_bytes[8:12] == b"WEBP":
+        return "image/webp"
+    for magic, mime_type in MAGIC_NUMBERS:
+        if image_bytes.startswith(magic):
+            return mime_type
+    return "application/octet-stream"
+
+def is_grayscale_safe(img, tolerance=12):
+    """채널 간 차이가 거의 없으면 그레이스케일로 변환해도 안전하다고 판단하는 함수"""
+    if len(img.shape) == 2:
+        return True
+    small = cv2.resize(img, (0, 0), fx=0.25, fy=0.25, interpolation=cv2.INTER_AREA) if min(img.shape[:2]) > 400 else img
+    small = small.astype(np.int16)
+    spread = small.max(axis=2) - small.min(axis=2)
+    return float(np.percentile(spread, 99)) <= tolerance
+
+def is_bilevel_safe(gray, max_midtone_ratio=0.03):
+    """중간 밝기 픽셀이 거의 없는 인쇄 문서면 이진화해도 안전하다고 판단하는 함수"""
+    midtones = np.count_nonzero((gray > 64) & (gray < 192))
+    return midtones / gray.size <= max_midtone_ratio
+
+def _encode(img, ext, params=()):
+    ok, buffer = cv2.imencode(ext, img, list(params))
+    return buffer.tobytes() if ok else None
+
+def _load(image):
+    """경로, 바이트, NumPy 배열 중 무엇이든 (배열, 원본 바이트)로 읽는 함수"""
+    if isinstance(image, np.ndarray):
+        return image, None
+    if isinstance(image, str):
+        with open(image, "rb") as f:
+            image = f.read()
+    img = cv2.imdecode(np.frombuffer(image, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+    if img is None:
+        raise ValueError("이미지를 디코딩할 수 없습니다.")
+    if len(img.shape) == 3 and img.shape[2] == 4:
+        img = cv2.cvtColor(img, cv2.COLOR_BGRA2BGR)
+    return img, image
+
+def estimate_row_height(img):
+    """표 이미지의 행 높이를 수평선 검출로 추정하는 함수"""
+    from table_cv_extraction import detect_horizontal_lines, calculate_row_height
+    horiz_lines, _, _ = detect_horizontal_lines(img)
+    return calculate_row_height(horiz_lines)
+
+def prepare_upload(image, row_height=None, target_text_height=DEFAULT_TARGET_TEXT_HEIGHT,
+                   max_side=DEFAULT_MAX_SIDE, allow_bilevel=True, photo=False, convert=True):
+    """업로드할 이미지를 축소/변환/인코딩하여 (바이트, mime_type, 정보)를 반환하는 함수
+
+    image: 파일 경로, 이미지 바이트, 또는 NumPy 배열
+    row_height: 검출된 행 높이(px). "auto"면 수평선 검출로 추정, None이면 max_side 기준으로만 축소
+    max_side: 행 높이를 모르거나 photo=True일 때만 적용하는 긴 변 최대 길이 (행 높이가 있으면 목표 글자 높이가 우선)
+    target_text_height: 축소 후 목표 글자 높이(px). None이면 축소하지 않음
+    photo: 영수증 사진처럼 연속 톤 이미지면 True (JPEG 후보 사용, 이진화 안 함)
+    convert: False면 변환 없이 원본 바이트와 감지된 mime_type만 반환 (비교용)
+    """
+    if not convert:
+        if isinstance(image, np.ndarray):
+            # 잘라낸 영역 등 배열은 무손실 PNG로만 인코딩
+            image = _encode(image, ".png")
+        elif isinstance(image, str):
+            with open(image, "rb") as f:
+                image = f.read()
+        mime_type = detect_mime_type(image)
+        return image, mime_type, {"scale": 1.0, "mode": "original", "mime_type": mime_type,
+                                  "bytes": len(image), "original_bytes": len(image)}
+
+    img, original_bytes = _load(image)
+    height, width = img.shape[:2]
+
+    # 1단계: 축소 비율 결정
+    scale = 1.0
+    if target_text_height is not None:
+        if row_height == "auto":
+            row_height = estimate_row_height(img)
+        if row_height:
+            scale = target_text_height / (row_height * TEXT_TO_ROW_RATIO)
+        # 긴 변 제한은 사진용: 표는 글자 높이가 목표보다 작아지지 않도록 행 높이 기준만 사용
+        if max_side and (not row_height or photo) and max(height, width) * scale > max_side:
+            scale = max_side / max(height, width)
+        scale = max(MIN_SCALE, min(1.0, scale))
+    if scale < 1.0:
+        img = cv2.resize(img, (max(1, int(width * scale)), max(1, int(height * scale))), interpolation=cv2.INTER_AREA)
+
+    # 2단계: 색 공간 축소
+    mode = "color"
+    if is_grayscale_safe(img):
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if len(img.shape) == 3 else img
+        mode = "gray"
+        if allow_bilevel and not photo and is_bilevel_safe(img):
+            _, img = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            mode = "bilevel"
+
+    # 3단계: 인코딩 후보 중 가장 작은 것 선택
+    candidates = [("image/png", _encode(img, ".png", [cv2.IMWRITE_PNG_COMPRESSION, 9]))]
+    if mode == "bilevel" and hasattr(cv2, "IMWRITE_PNG_BILEVEL"):
+        candidates.append(("image/png", _encode(img, ".png", [cv2.IMWRITE_PNG_BILEVEL, 1, cv2.IMWRITE_PNG_COMPRESSION, 9])))
+    if photo:
+        candidates.append(("image/jpeg", _encode(img, ".jpg", [cv2.IMWRITE_JPEG_QUALITY, 85])))
+    if original_bytes is not None:
+        # 재인코딩이 원본보다 커지는 경우가 있어 원본 파일도 항상 후보로 둠 (가장 작으면 원본 그대로 업로드)
+        candidates.append((detect_mime_type(original_bytes), original_bytes))
+
+    mime_type, data = min((c for c in candidates if c[1]), key=lambda c: len(c[1]))
+    if data is original_bytes:
+        scale, mode = 1.0, "original"
+    info = {
+        "scale": round(float(scale), 3),
+        "mode": mode,
+        "mime_type": mime_type,
+        "bytes": len(data),
+        "original_bytes": len(original_bytes) if original_bytes is not None else None,
+    }
+    return data, mime_type, info
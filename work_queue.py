@@ -0,0 +1,198 @@
+"""
+우선순위/작업 종류별 공정성을 가진 공용 작업 큐
+
+영수증 처리(process_receipts)와 표 추출(process_calculations)이 각자 스레드 풀을 쓰면 같은 API 할당량을 두고
+조율 없이 경쟁합니다. 여기서는 프로세스 안의 모든 작업을 하나의 큐로 모아 전체 동시 실행 수를 제한하고,
+
+- 우선순위가 높은 작업(대화형 영수증 1장 등)을 먼저 시작하고
+- 같은 우선순위 안에서는 작업 종류(receipt/calculation/drawing ...)별로 번갈아 꺼내 한 종류가 독점하지 않게 하며
+- 긴급 작업용 슬롯을 남겨두어 대량 작업이 모든 슬롯을 차지하고 있어도 긴급 작업이 바로 시작되게 합니다.
+
+실행 중인 작업을 중단하지는 않으므로 대량 작업은 남는 슬롯을 계속 사용합니다.
+
+사용 예:
+    queue = WorkQueue(max_workers=4)
+    process_receipts(api_key, work_queue=queue, priority=URGENT)
+    process_calculations(api_key, work_queue=queue, priority=BULK)
+"""
+
+import threading
+from collections import deque
+from concurrent.futures import Future, wait
+
+URGENT = 0
+NORMAL = 1
+BULK = 2
+PRIORITY_NAMES = {"urgent": URGENT, "normal": NORMAL, "bulk": BULK}
+
+class _Job:
+    __slots__ = ("kind", "priority", "fn", "args", "kwargs", "future")
+
+    def __init__(self, kind, priority, fn, args, kwargs):
+        self.kind = kind
+        self.priority = priority
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+class WorkQueue:
+    """전체 동시 실행 수를 제한하는 우선순위 작업 큐 (스레드 풀)
+
+    max_workers: 모든 작업 종류를 합친 동시 실행 수
+    reserved_urgent: URGENT가 아닌 작업이 쓸 수 없는 슬롯 수 (긴급 작업 대기 시간 단축)
+    kind_limits: 작업 종류별 최대 동시 실행 수 (예: {"drawing": 2})
+    """
+
+    def __init__(self, max_workers=4, reserved_urgent=1, kind_limits=None):
+        if reserved_urgent >= max_workers:
+            raise ValueError("긴급 작업 예약 슬롯은 전체 슬롯보다 적어야 합니다.")
+        self.max_workers = max_workers
+        self.reserved_urgent = reserved_urgent
+        self.kind_limits = dict(kind_limits or {})
+        self.condition = threading.Condition()
+        self.queues = {}          # 우선순위 → {종류: deque[_Job]}
+        self.turns = {}           # 우선순위 → 종류 순서 (번갈아 꺼내기용)
+        self.running = {}         # 종류 → 실행 중인 작업 수
+        self.running_total = 0
+        self.running_non_urgent = 0
+        self.shutdown_requested = False
+        self.threads = [threading.Thread(target=self._worker, daemon=True, name=f"work-queue-{i}")
+                        for i in range(max_workers)]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, kind, fn, *args, priority=NORMAL, **kwargs):
+        """작업을 큐에 넣고 Future를 반환하는 함수"""
+        job = _Job(kind, priority, fn, args, kwargs)
+        with self.condition:
+            if self.shutdown_requested:
+                raise RuntimeError("종료된 작업 큐입니다.")
+            kinds = self.queues.setdefault(priority, {})
+            if kind not in kinds:
+                kinds[kind] = deque()
+                self.turns.setdefault(priority, deque()).append(kind)
+            kinds[kind].append(job)
+            self.condition.notify()
+        return job.future
+
+    def lane(self, kind, priority=NORMAL):
+        """ThreadPoolExecutor 대신 쓸 수 있는 작업 종류/우선순위 고정 제출 창구"""
+        return Lane(self, kind, priority)
+
+    def _next_job(self):
+        """지금 시작할 수 있는 작업 (없으면 None). condition을 잡은 상태에서 호출"""
+        for priority in sorted(self.queues):
+            if priority != URGENT and self.running_non_urgent >= self.max_workers - self.reserved_urgent:
+                continue
+            kinds, turns = self.queues[priority], self.turns[priority]
+            for _ in range(len(turns)):
+                kind = turns[0]
+                turns.rotate(-1)
+                limit = self.kind_limits.get(kind)
+                if kinds[kind] and (limit is None or self.running.get(kind, 0) < limit):
+                    return kinds[kind].popleft()
+        return None
+
+    def _worker(self):
+        while True:
+            with self.condition:
+                job = self._next_job()
+                while job is None:
+                    if self.shutdown_requested and not self.pending():
+                        return
+                    self.condition.wait()
+                    job = self._next_job()
+                self.running[job.kind] = self.running.get(job.kind, 0) + 1
+                self.running_total += 1
+                self.running_non_urgent += job.priority != URGENT
+
+            if job.future.set_running_or_notify_cancel():
+                try:
+                    job.future.set_result(job.fn(*job.args, **job.kwargs))
+                except BaseException as e:
+                    job.future.set_exception(e)
+
+            with self.condition:
+                self.running[job.kind] -= 1
+                self.running_total -= 1
+                self.running_non_urgent -= job.priority != URGENT
+                # 슬롯/종류별 한도가 풀렸으므로 기다리는 워커 모두 다시 확인
+                self.condition.notify_all()
+
+    def has_capacity(self, priority=NORMAL):
+        """이 우선순위의 작업을 지금 넣으면 바로 시작되는지 (외부 큐에서 작업을 꺼낼지 판단할 때 사용)"""
+        with self.condition:
+            if self.pending() or self.running_total >= self.max_workers:
+                return False
+            return priority == URGENT or self.running_non_urgent < self.max_workers - self.reserved_urgent
+
+    def pending(self):
+        """대기 중인 작업 수"""
+        return sum(len(jobs) for kinds in self.queues.values() for jobs in kinds.values())
+
+    def stats(self):
+        with self.condition:
+            return {"running": self.running_total, "pending": self.pending(),
+                    "running_by_kind": {kind: n for kind, n in self.running.items() if n}}
+
+    def shutdown(self, wait=True):
+        """새 작업을 받지 않고, wait=True면 남은 작업이 끝날 때까지 기다리는 함수"""
+        with self.condition:
+            self.shutdown_requested = True
+            self.condition.notify_all()
+        if wait:
+            for thread in self.threads:
+                thread.join()
+
+class Lane:
+    """WorkQueue에 같은 종류/우선순위로 제출하는 창구 (with 블록을 나갈 때 이 창구의 작업이 끝나기를 기다림)"""
+
+    def __init__(self, queue, kind, priority):
+        self.queue = queue
+        self.kind = kind
+        self.priority = priority
+        self.futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        future = self.queue.submit(self.kind, fn, *args, priority=self.priority, **kwargs)
+        self.futures.append(future)
+        return future
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        wait(self.futures)
+        return False
+
+if __name__ == "__main__":
+    import time
+    import statistics
+    from concurrent.futures import ThreadPoolExecutor
+
+    # API 호출 없이 대량 도면 작업 중에 들어오는 영수증 작업의 대기 시간을 기존 방식(각자 풀)과 비교
+    def task(seconds, submitted):
+        time.sleep(seconds)
+        return time.time() - submitted
+
+    def simulate(submit):
+        bulk = [submit("drawing", BULK, 0.05) for _ in range(200)]
+        urgent = []
+        for _ in range(10):
+            time.sleep(0.2)
+            urgent.append(submit("receipt", URGENT, 0.05))
+        wait(bulk + urgent)
+        return [future.result() for future in urgent], max(future.result() for future in bulk)
+
+    # 예약 슬롯이 없으면 긴급 작업은 실행 중인 작업 하나가 끝날 때까지 기다림 (작업이 길수록 예약이 유리)
+    for reserved in (0, 1):
+        queue = WorkQueue(max_workers=4, reserved_urgent=reserved)
+        urgent, makespan = simulate(lambda kind, priority, seconds: queue.submit(kind, task, seconds, time.time(), priority=priority))
+        queue.shutdown()
+        print(f"공용 큐 (4슬롯, 긴급 예약 {reserved}): 영수증 응답 중앙값 {statistics.median(urgent) * 1000:.0f}ms, 도면 완료 {makespan:.1f}s")
+
+    # 기존 방식: 같은 할당량(4)을 두 풀이 나눠 쓰는 대신 FIFO 풀 하나에 섞어 넣은 경우
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        urgent, makespan = simulate(lambda kind, priority, seconds: executor.submit(task, seconds, time.time()))
+    print(f"FIFO 풀 (4슬롯):               영수증 응답 중앙값 {statistics.median(urgent) * 1000:.0f}ms, 도면 완료 {makespan:.1f}s")
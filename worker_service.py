@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+상주 추출 워커 서비스 (SQLite 작업 큐)
+
+python main.py를 실행할 때마다 OpenCV/pandas/genai SDK를 다시 import하는 시작 비용을 없애기 위해, 한 번 띄워둔 워커가 모듈/클라이언트/헤더 템플릿을 메모리에 유지한 채
+로컬 SQLite 큐에서 작업을 꺼내 처리하고 결과를 큐에 다시 기록합니다.
+작업을 넣는 쪽은 sqlite3/json만 사용하므로 제출 오버헤드가 수 밀리초입니다.
+
+사용 예:
+    python worker_service.py serve --workers 4
+    python worker_service.py submit table img-split-calculation/left_img.png --method cv
+    python worker_service.py submit receipt img/receipt_0.jpg --mode rules --priority urgent
+    python worker_service.py status
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+
+from work_queue import WorkQueue, URGENT, NORMAL, BULK, PRIORITY_NAMES
+
+DEFAULT_QUEUE_PATH = "worker_jobs.sqlite3"
+# 큐가 비었을 때 워커/제출자가 다시 확인하는 간격 (초)
+POLL_INTERVAL = 0.02
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    priority INTEGER NOT NULL DEFAULT 1,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+"""
+
+# priority 열이 없던 이전 큐 파일은 열을 추가한 뒤 인덱스를 만듦
+PRIORITY_INDEX = "CREATE INDEX IF NOT EXISTS jobs_priority ON jobs (status, priority, id)"
+
+class JobQueue:
+    """SQLite 파일 하나로 된 작업 큐 (여러 프로세스에서 동시에 열어도 안전)"""
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH):
+        self.path = path
+        self.local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "priority" not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN priority INTEGER NOT NULL DEFAULT {NORMAL}")
+            conn.execute(PRIORITY_INDEX)
+
+    def _connect(self):
+        # 스레드마다 연결을 따로 사용 (sqlite3 연결은 스레드 간 공유 불가)
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.row_factory = sqlite3.Row
+            self.local.conn = conn
+        return conn
+
+    def submit(self, kind, payload, priority=NORMAL):
+        """작업을 큐에 넣고 작업 id를 반환하는 함수 (priority: work_queue.URGENT/NORMAL/BULK)"""
+        cursor = self._connect().execute(
+            "INSERT INTO jobs (kind, payload, priority, created_at) VALUES (?, ?, ?, ?)",
+            (kind, json.dumps(payload, ensure_ascii=False), priority, time.time()),
+        )
+        return cursor.lastrowid
+
+    def claim(self, max_priority=BULK):
+        """우선순위가 가장 높은 대기 작업 중 가장 오래된 것 하나를 running으로 바꾸고 반환하는 함수 (없으면 None)
+
+        max_priority: 이 값 이하(같거나 더 긴급한)의 작업만 꺼냄
+        """
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT * FROM jobs WHERE status = 'queued' AND priority <= ? ORDER BY priority, id LIMIT 1",
+                               (max_priority,)).fetchone()
+            if row is not None:
+                conn.execute("UPDATE jobs SET status = 'running', started_at = ? WHERE id = ?", (time.time(), row["id"]))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return dict(row) if row is not None else None
+
+    def finish(self, job_id, result=None, error=None):
+        """작업 결과(또는 오류)를 기록하는 함수"""
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+            ("error" if error else "done", json.dumps(result, ensure_ascii=False), error, time.time(), job_id),
+        )
+
+    def get(self, job_id):
+        """작업 상태를 조회하는 함수"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row is not None else None
+
+    def wait(self, job_id, timeout=None):
+        """작업이 끝날 때까지 기다렸다가 결과를 반환하는 함수 (오류면 RuntimeError)"""
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(f"작업이 없습니다: {job_id}")
+            if job["status"] == "done":
+                return json.loads(job["result"])
+            if job["status"] == "error":
+                raise RuntimeError(job["error"])
+            if deadline is not None and time.time() > deadline:
+                raise TimeoutError(f"작업 {job_id} 대기 시간 초과")
+            time.sleep(POLL_INTERVAL)
+
+    def requeue_running(self):
+        """이전 워커가 처리하다 멈춘 작업을 다시 대기 상태로 돌리는 함수"""
+        cursor = self._connect().execute("UPDATE jobs SET status = 'queued', started_at = NULL WHERE status = 'running'")
+        return cursor.rowcount
+
+    def counts(self):
+        """상태별 작업 개수"""
+        rows = self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+def submit_and_wait(kind, payload, queue_path=DEFAULT_QUEUE_PATH, timeout=None, priority=NORMAL):
+    """작업을 제출하고 결과를 기다리는 함수 (다른 도구에서 호출하는 진입점)"""
+    queue = JobQueue(queue_path)
+    return queue.wait(queue.submit(kind, payload, priority), timeout)
+
+class WarmWorker:
+    """모듈/클라이언트/헤더 템플릿을 메모리에 유지하고 작업을 처리하는 워커"""
+
+    def __init__(self, api_key):
+        # 무거운 import는 워커 시작 시 한 번만 (main은 처리 경로별로 지연 import하므로 여기서 미리 올려둠)
+        import main
+        import gemini_ocr
+        import table_cv_extraction
+        import row_strip_extraction
+        import pandas  # noqa: F401
+        from google.genai import types  # noqa: F401
+        from layout_templates import LayoutTemplateStore
+        from gemini_client import make_client
+
+        self.api_key = api_key
+        self.main = main
+        self.gemini_ocr = gemini_ocr
+        self.table_cv_extraction = table_cv_extraction
+        self.row_strip_extraction = row_strip_extraction
+        self.template_store = LayoutTemplateStore()
+        make_client(api_key)
+
+    def run(self, kind, payload):
+        """작업 종류별 처리 함수"""
+        if kind == "table":
+            return self.run_table(**payload)
+        if kind == "receipt":
+            front_info, handwritten_info = self.gemini_ocr.extract_front_info_gemini(
+                self.api_key, payload["image_path"], mode=payload.get("mode", "sequential"))
+            return {"front_info": front_info, "handwritten_info": handwritten_info}
+        raise ValueError(f"지원하지 않는 작업 종류입니다: {kind}")
+
+    def run_table(self, image_path, method="ai", bbox=None, rows_per_strip=None, memory_budget_mb=None):
+        """표 한 개 추출 ({'headers', 'rows'})"""
+        bbox = tuple(bbox) if bbox else None
+        if method == "strip":
+            return self.row_strip_extraction.extract_table_rowstrips(self.api_key, image_path, rows_per_strip=rows_per_strip or 4, bbox=bbox)
+        if method == "cv":
+            # SparseTable → {'headers', 'rows', 'spans'} (JSON 결과에 병합 스팬도 함께 기록)
+            return dict(self.table_cv_extraction.extract_table_with_cv(
+                self.api_key, image_path, bbox=bbox, template_store=self.template_store, memory_budget_mb=memory_budget_mb))
+        return self.main.extract_table_data_gemini(self.api_key, image_path, bbox=bbox)
+
+def serve(api_key, queue_path=DEFAULT_QUEUE_PATH, workers=4):
+    """큐에서 작업을 꺼내 workers개 스레드로 처리하는 상주 루프"""
+    queue = JobQueue(queue_path)
+    requeued = queue.requeue_running()
+    if requeued:
+        print(f"중단된 작업 {requeued}개를 다시 대기열에 넣었습니다.")
+
+    start = time.time()
+    worker = WarmWorker(api_key)
+    print(f"워커 준비 완료 ({time.time() - start:.2f}s): {queue_path}, 스레드 {workers}개")
+
+    # 워커가 2개 이상이면 1개는 긴급 작업용으로 남겨둠 (대량 작업이 밀려 있어도 대화형 요청이 바로 시작됨)
+    work = WorkQueue(max_workers=workers, reserved_urgent=1 if workers > 1 else 0)
+
+    def handle(job):
+        try:
+            print(f"작업 {job['id']} 시작 ({job['kind']})")
+            result = worker.run(job["kind"], json.loads(job["payload"]))
+            queue.finish(job["id"], result=result)
+            print(f"작업 {job['id']} 완료")
+        except Exception as e:
+            print(f"작업 {job['id']} 오류: {e}")
+            queue.finish(job["id"], error=str(e))
+
+    try:
+        while True:
+            # 빈 슬롯이 있을 때만 꺼냄. 일반 슬롯이 다 찼으면 긴급 작업만 꺼냄
+            if not work.has_capacity(URGENT):
+                time.sleep(POLL_INTERVAL)
+                continue
+            job = queue.claim(BULK if work.has_capacity(BULK) else URGENT)
+            if job is None:
+                time.sleep(POLL_INTERVAL)
+                continue
+            work.submit(job["kind"], handle, job, priority=job["priority"])
+    except KeyboardInterrupt:
+        print("워커를 종료합니다. (처리 중인 작업은 완료 후 종료)")
+    finally:
+        work.shutdown()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="상주 추출 워커 서비스")
+    parser.add_argument("--queue", default=DEFAULT_QUEUE_PATH, help="SQLite 큐 파일 경로")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="워커 실행")
+    serve_parser.add_argument("--workers", type=int, default=4)
+
+    submit_parser = sub.add_parser("submit", help="작업 제출 후 결과 출력")
+    submit_parser.add_argument("kind", choices=["table", "receipt"])
+    submit_parser.add_argument("image_path")
+    submit_parser.add_argument("--method", choices=["ai", "cv", "strip"], default="ai")
+    submit_parser.add_argument("--rows-per-strip", type=int)
+    submit_parser.add_argument("--bbox", help="표 영역 x,y,w,h")
+    submit_parser.add_argument("--mode", default="sequential", help="영수증 처리 모드")
+    submit_parser.add_argument("--priority", choices=list(PRIORITY_NAMES), default="normal")
+    submit_parser.add_argument("--timeout", type=float)
+
+    sub.add_parser("status", help="상태별 작업 개수 출력")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        api_key = os.getenv('GEMINI_API_KEY') or input("Gemini API 키를 입력하세요: ")
+        serve(api_key, args.queue, args.workers)
+    elif args.command == "submit":
+        if args.kind == "table":
+            payload = {"image_path": os.path.abspath(args.image_path), "method": args.method}
+            if args.rows_per_strip:
+                payload["rows_per_strip"] = args.rows_per_strip
+            if args.bbox:
+                payload["bbox"] = [int(v) for v in args.bbox.split(",")]
+        else:
+            payload = {"image_path": os.path.abspath(args.image_path), "mode": args.mode}
+        start = time.time()
+        result = submit_and_wait(args.kind, payload, args.queue, args.timeout, PRIORITY_NAMES[args.priority])
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+        print(f"소요 시간: {time.time() - start:.2f}s")
+    else:
+        print(JobQueue(args.queue).counts())